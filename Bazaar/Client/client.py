@@ -6,13 +6,15 @@ from typing import Optional, Tuple
 
 from Bazaar.Client.referee import ProxyReferee
 from Bazaar.Player.mechanism import Mechanism
+from Bazaar.Player.policies import POLICIES, policy_names
 from Bazaar.Common.turn_state import TurnState
+from Bazaar.Server.player import MAX_RESPONSE_TIME
 from Bazaar.Server.server import DEFAULT_HOST
 
 MIN_PORT_NUM = 1024
 MAX_PORT_NUM = 65353
-SIZE_POLICY = "purchase-size"
-POINTS_POLICY = "purchase-points"
+# Leaves the other half of the server's response time for messaging.
+SEARCH_SECONDS = MAX_RESPONSE_TIME / 2
 
 class Client:
     """
@@ -62,7 +64,7 @@ class Client:
         """
         Initializes the player Mechanism with the given name and policy.
         """
-        return Mechanism(name=name, policy=policy)
+        return Mechanism(name=name, policy=policy, search_seconds=SEARCH_SECONDS)
 
     def init_proxy_referee(self, player: Mechanism) -> ProxyReferee:
         """
@@ -102,18 +104,19 @@ class Client:
 
     def prompt_policy(self) -> str:
         """
-        Prompts the player to enter their policy.
+        Prompts the player to enter their policy, out of the registered ones.
 
-        :returns: The player's policy (one of 'purchase-points' or 'purchase-size').
+        :returns: The player's policy (the name of a registered policy, e.g. 'purchase-points' or 'purchase-size').
         """
-        print("""Which policy would you like your AI player to use? (1 or 2)
-        1. Maximize the number of points received in one turn.
-        2. Maximize the number of cards bought in one turn.""")
+        names = policy_names()
+        print(f"Which policy would you like your AI player to use? (1 to {len(names)})")
+        for choice, name in enumerate(names, start=1):
+            print(f"        {choice}. {POLICIES[name].description}")
         policy_choice = int(input())
 
-        while not policy_choice in [1, 2]:
+        while not policy_choice in range(1, len(names) + 1):
             policy_choice = int(input("Invalid option. Please try again: "))
-        policy = POINTS_POLICY if policy_choice == 1 else SIZE_POLICY
+        policy = names[policy_choice - 1]
 
         return policy
 
@@ -0,0 +1,104 @@
+from typing import Hashable, List, Tuple
+
+from pydantic import BaseModel, Field
+
+from Bazaar.Common.cards import Card
+from Bazaar.Common.pebble import PebbleColor
+
+
+class AffordabilityIndex(BaseModel):
+    """
+    Index of a row of cards that answers which of them a wallet can buy with bitset operations.
+    Bit i of a mask stands for the card at position i. For every color and every amount k, the index keeps the mask
+    of the cards that need at most k pebbles of that color; the cards a wallet can buy are the AND of the masks
+    picked by its count of each color. The last mask of a color always holds every card.
+
+    :param requirements: count vector of the cost of every card, in row order
+    :type requirements: List[Tuple[int, ...]]
+    :param keys: Card.key of every card, in row order
+    :type keys: List[Hashable]
+    :param within: per color, the masks of the cards needing at most 0, 1, 2, ... pebbles of that color
+    :type within: List[List[int]]
+    """
+
+    requirements: List[Tuple[int, ...]] = Field(default_factory=list)
+    keys: List[Hashable] = Field(default_factory=list)
+    within: List[List[int]] = Field(default_factory=lambda: [[0] for _ in PebbleColor])
+
+    @classmethod
+    def from_cards(cls, cards: List[Card]) -> "AffordabilityIndex":
+        """
+        Builds the index of a row of cards.
+
+        :param cards: cards in row order
+        :type cards: List[Card]
+        :return: index of the cards
+        :rtype: AffordabilityIndex
+        """
+        index = cls()
+        for card in cards:
+            index.append(card)
+        return index
+
+    def affordable(self, wallet_counts: Tuple[int, ...]) -> int:
+        """
+        Returns the mask of the cards a wallet can buy.
+
+        :param wallet_counts: count vector of the wallet
+        :type wallet_counts: Tuple[int, ...]
+        :return: mask with bit i set if the wallet can buy the card at position i
+        :rtype: int
+        """
+        mask = (1 << len(self.requirements)) - 1
+        for levels, count in zip(self.within, wallet_counts):
+            mask &= levels[min(count, len(levels) - 1)]
+        return mask
+
+    @staticmethod
+    def positions(mask: int) -> List[int]:
+        """
+        Returns the positions of the cards in a mask, in row order.
+
+        :param mask: mask of cards
+        :type mask: int
+        :return: positions of the set bits, in increasing order
+        :rtype: List[int]
+        """
+        positions = []
+        while mask:
+            low = mask & -mask
+            positions.append(low.bit_length() - 1)
+            mask ^= low
+        return positions
+
+    def append(self, card: Card) -> None:
+        """
+        Adds a card at the end of the row.
+
+        :param card: card to add
+        :type card: Card
+        """
+        bit = 1 << len(self.requirements)
+        requirement = card.pebbles.counts
+        for levels, needed in zip(self.within, requirement):
+            while len(levels) <= needed:
+                levels.append(levels[-1])
+            for amount in range(needed, len(levels)):
+                levels[amount] |= bit
+        self.requirements.append(requirement)
+        self.keys.append(card.key)
+
+    def remove(self, position: int) -> None:
+        """
+        Removes the card at a position of the row; the cards after it move one position down.
+
+        :param position: position of the card, negative positions count from the end
+        :type position: int
+        """
+        position %= len(self.requirements)
+        below = (1 << position) - 1
+        for levels in self.within:
+            for amount, mask in enumerate(levels):
+                levels[amount] = (mask & below) | ((mask >> (position + 1)) << position)
+        del self.requirements[position]
+        del self.keys[position]
@@ -1,7 +1,8 @@
 import random
 
+from functools import cached_property
 from pydantic import BaseModel, conlist, model_validator
-from typing import Tuple
+from typing import Optional, Tuple
 
 from Bazaar.Common.data import PEBBLE_COUNT, CARD_REWARDS, MIN_CARDS_NUM, MAX_CARDS_NUM
 from Bazaar.Common.game_interface import Board
@@ -35,16 +36,19 @@ class Card(BaseModel):
         return values
 
     @staticmethod
-    def generate_random():
+    def generate_random(rng: Optional[random.Random] = None):
         """
         Static method. Randomly generates a number of pebbles equal to PEBBLE_COUNT
         and returns a Card instance with those pebbles as a field.
 
+        :param rng: random number generator to draw from, the global random module if not given
+        :type rng: Optional[random.Random]
         :returns: a Card instance with randomly generated pebbles
         :rtype: Card
         """
-        card_pebbles = PebbleCollection.generate_random(PEBBLE_COUNT)
-        happy_face = random.choice([True, False])
+        rng = rng or random
+        card_pebbles = PebbleCollection.generate_random(PEBBLE_COUNT, rng)
+        happy_face = rng.choice([True, False])
         return Card(pebbles=card_pebbles, happy_face=happy_face)
 
     @staticmethod
@@ -115,11 +119,7 @@ class Card(BaseModel):
         :return: player wallet and bank after the transaction
         :rtype: Tuple[PebbleCollection, PebbleCollection]
         """
-        player_pebbles_copy = PebbleCollection(pebbles=tuple(player_wallet.pebbles))
-        bank_copy = PebbleCollection(pebbles=tuple(bank.pebbles))
-        player_pebbles_copy = player_pebbles_copy - self.pebbles
-        bank_copy = bank_copy + self.pebbles
-        return (player_pebbles_copy, bank_copy)
+        return (player_wallet - self.pebbles, bank + self.pebbles)
 
     def __str__(self):
         """
@@ -147,13 +147,24 @@ class Card(BaseModel):
         happy_face_same = self.happy_face == other.happy_face
         return pebbles_same and happy_face_same
 
+    @cached_property
+    def key(self) -> Tuple[Tuple[int, ...], bool]:
+        """
+        Canonical key of this card: the count vector of its cost and its happy face.
+        Two cards are equal exactly when their keys are equal. The key is computed once and kept on the frozen instance.
+
+        :returns: count vector of the pebbles and the happy face flag
+        :rtype: Tuple[Tuple[int, ...], bool]
+        """
+        return (self.pebbles.counts, self.happy_face)
+
     def __hash__(self):
         """
         Overrides the default hash method to properly calculate hash values for this object.
 
         :returns: hashable object for this Card object, accounting for pebbles and happy_face fields
         """
-        return hash((self.pebbles, self.happy_face))
+        return hash(self.key)
 
     def __lt__(self, other) -> bool:
         """
@@ -162,12 +173,16 @@ class Card(BaseModel):
         :param other: other instance of the Card class.
         :returns: True if this and other cards don’t both come with a face and this card doesn’t display one (other card has a face)
         :rtype: bool
+
+        This order is not total: a card without a face is less than one with a face, which can in turn be less than it
+        by their pebbles. So cards have no sort key of their own, and sorting them keeps using this method;
+        only the pebbles are compared by their cached sort_key.
         """
         other_card_displays_face = other.happy_face
         if other_card_displays_face and not self.happy_face:
             return True
         else:
-            return self.pebbles < other.pebbles
+            return self.pebbles.sort_key < other.pebbles.sort_key
 
 
 class Cards(BaseModel):
@@ -181,19 +196,21 @@ class Cards(BaseModel):
     cards: conlist(Card, min_length=MIN_CARDS_NUM, max_length=MAX_CARDS_NUM) = []
 
     @classmethod
-    def generate_random(cls, count: int = MAX_CARDS_NUM):
+    def generate_random(cls, count: int = MAX_CARDS_NUM, rng: Optional[random.Random] = None):
         """
         Class method. Randomly generates a number of cards equal to the count argument
         and returns a Cards object with the generated Card objects as a field.
 
         :param count: number of cards to generate
         :type count: int
+        :param rng: random number generator to draw from, the global random module if not given
+        :type rng: Optional[random.Random]
         :returns: a Cards object with randomly generated Card objects
         :rtype: Cards
         """
         cards = []
         for _ in range(count):
-            card = Card.generate_random()
+            card = Card.generate_random(rng)
             cards.append(card)
         return cls(cards=cards)
 
@@ -325,6 +342,9 @@ class Cards(BaseModel):
         :type card: Card
         """
         self.cards.append(card)
+        index = self.__dict__.get("_affordability")
+        if index is not None:
+            index.append(card)
 
     def pop_card(self, index: int) -> Card:
         """
@@ -333,4 +353,35 @@ class Cards(BaseModel):
         :param index: index at which to pop the card
         :type index: int
         """
-        return self.cards.pop(index)
+        card = self.cards.pop(index)
+        affordability = self.__dict__.get("_affordability")
+        if affordability is not None:
+            affordability.remove(index)
+        return card
+
+    def remove_card(self, card: Card) -> None:
+        """
+        Removes the first card equal to the given one from the list of cards stored in this Cards class instance.
+
+        :param card: card to remove
+        :type card: Card
+        """
+        self.pop_card(self.cards.index(card))
+
+    @property
+    def affordability(self):
+        """
+        Index of these cards answering which of them a wallet can buy (see AffordabilityIndex).
+        It is built on first use, kept up to date by add_card, pop_card and remove_card, and rebuilt if the list
+        was changed in any other way. It is not a field, so it does not take part in comparisons or serialization.
+
+        :return: affordability index of these cards
+        :rtype: AffordabilityIndex
+        """
+        from Bazaar.Common.affordability import AffordabilityIndex
+
+        index = self.__dict__.get("_affordability")
+        if index is None or index.keys != [card.key for card in self.cards]:
+            index = AffordabilityIndex.from_cards(self.cards)
+            self.__dict__["_affordability"] = index
+        return index
@@ -13,6 +13,7 @@ CARD_REWARDS = {
     (3, False): 1,
     (3, True): 2,
 }
+MAX_CARD_REWARD = max(CARD_REWARDS.values())
 MIN_EQUATION_SIZE = 1
 MAX_EQUATION_SIZE = 4
 MIN_CARDS_NUM = 0
@@ -1,9 +1,11 @@
 import json
 import random
 
+from functools import cached_property
+
 from collections import Counter
 from pydantic import BaseModel, model_validator, conlist, conset
-from typing import List, Dict, Tuple
+from typing import List, Dict, FrozenSet, Tuple, Optional
 
 from Bazaar.Common.data import MIN_EQUATION_SIZE, MAX_EQUATION_SIZE
 from Bazaar.Common.pebble import Pebble, PebbleColor, PebbleCollection
@@ -69,22 +71,31 @@ class Equation(BaseModel):
             )
 
     @classmethod
-    def generate_random(cls):
-        all_pebbles = [Pebble(color=PebbleColor(color)) for color in PebbleColor]
+    def generate_random(cls, rng: Optional[random.Random] = None):
+        """
+        Generates a random undirected equation whose sides hold different colors.
+
+        :param rng: random number generator to draw from, the global random module if not given
+        :type rng: Optional[random.Random]
+        :return: random equation
+        :rtype: Equation
+        """
+        rng = rng or random
+        all_pebbles = Pebble.all()
 
-        lhs_size = random.randint(MIN_EQUATION_SIZE, MAX_EQUATION_SIZE)
-        lhs = tuple(random.choice(all_pebbles) for _ in range(lhs_size))
+        lhs_size = rng.randint(MIN_EQUATION_SIZE, MAX_EQUATION_SIZE)
+        lhs = tuple(rng.choice(all_pebbles) for _ in range(lhs_size))
         lhs_colors = {pebble.color for pebble in lhs}
 
         available_pebbles_for_rhs = tuple(
             pebble for pebble in all_pebbles if pebble.color not in lhs_colors
         )
-        rhs_size = random.randint(MIN_EQUATION_SIZE, MAX_EQUATION_SIZE)
-        rhs = tuple(random.choice(available_pebbles_for_rhs) for _ in range(rhs_size))
+        rhs_size = rng.randint(MIN_EQUATION_SIZE, MAX_EQUATION_SIZE)
+        rhs = tuple(rng.choice(available_pebbles_for_rhs) for _ in range(rhs_size))
 
         return cls(
-            lhs=PebbleCollection(pebbles=lhs),
-            rhs=PebbleCollection(pebbles=rhs),
+            lhs=PebbleCollection.from_trusted(lhs),
+            rhs=PebbleCollection.from_trusted(rhs),
             directed=False,
         )
 
@@ -101,14 +112,12 @@ class Equation(BaseModel):
         :returns: Tuple containing two PebbleCollection: updated player pebbles and updated bank pebbles after the trade.
         :rtype: Tuple[PebbleCollection, PebbleCollection]
         """
-        player_pebbles_copy = PebbleCollection(pebbles=tuple(player_pebbles.pebbles))
-        bank_copy = PebbleCollection(pebbles=tuple(bank.pebbles))
         if self.directed:
-            player_pebbles_copy -= self.lhs
-            player_pebbles_copy += self.rhs
-            bank_copy -= self.rhs
-            bank_copy += self.lhs
-        return (player_pebbles_copy, bank_copy)
+            return (player_pebbles - self.lhs + self.rhs, bank - self.rhs + self.lhs)
+        return (
+            PebbleCollection.from_trusted(player_pebbles.pebbles, player_pebbles.counts),
+            PebbleCollection.from_trusted(bank.pebbles, bank.counts),
+        )
 
     def to_list(self) -> List[List[str]]:
         """
@@ -192,15 +201,34 @@ class Equation(BaseModel):
                 self.lhs == other.rhs and self.rhs == other.lhs
             )
 
+    @cached_property
+    def key(self) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+        """
+        Canonical key of this equation: the count vectors of both sides, sorted so that the key does not
+        depend on which side is the left-hand side. Equal equations (directed or not) always share a key.
+        The key is computed once and kept on the frozen instance.
+
+        :return: sorted pair of side count vectors
+        :rtype: Tuple[Tuple[int, ...], Tuple[int, ...]]
+        """
+        lhs_counts, rhs_counts = self.lhs.counts, self.rhs.counts
+        return (lhs_counts, rhs_counts) if lhs_counts <= rhs_counts else (rhs_counts, lhs_counts)
+
     def __hash__(self):
-        """Hashing an equation."""
-        # Convert lhs and rhs to frozenset to ignore order
-        lhs_set = frozenset(self.lhs.pebbles)
-        rhs_set = frozenset(self.rhs.pebbles)
+        """Hashing an equation by its canonical, order-independent key."""
+        return hash(self.key)
+
+    @cached_property
+    def sort_key(self) -> Tuple[Tuple[int, str], Tuple[int, str]]:
+        """
+        Key __lt__ orders equations by: the sort_key of the left-hand side, then the one of the right-hand side.
+        Unlike key, it depends on which side is the left-hand side. The key is computed once and kept on the frozen
+        instance.
 
-        # Hash both sides and sort the results to ensure consistency in order
-        sides = (lhs_set, rhs_set)
-        return hash(tuple(sorted(sides, key=lambda x: hash(x))))
+        :return: sort keys of both sides
+        :rtype: Tuple[Tuple[int, str], Tuple[int, str]]
+        """
+        return self.lhs.sort_key, self.rhs.sort_key
 
     def __lt__(self, other):
         """
@@ -216,10 +244,172 @@ class Equation(BaseModel):
         """
         if not isinstance(other, Equation):
             raise TypeError("Other Equation must be of type Equation.")
-        if self.lhs == other.lhs:
-            return self.rhs < other.rhs
-        return self.lhs < other.lhs
+        return self.sort_key < other.sort_key
+
+
+
+class DirectedTrade(BaseModel):
+    """
+    One direction of an equation, precomputed as count vectors in (red, white, blue, green, yellow) order.
+
+    :param equation: the directed equation, trading lhs for rhs
+    :type equation: Equation
+    :param give: pebbles the wallet must hold and hands to the bank
+    :type give: Tuple[int, ...]
+    :param receive: pebbles the bank must hold and hands to the wallet
+    :type receive: Tuple[int, ...]
+    :param delta: change of the wallet after the trade (the bank changes by the negated delta)
+    :type delta: Tuple[int, ...]
+    """
 
+    equation: Equation
+    give: Tuple[int, ...]
+    receive: Tuple[int, ...]
+    delta: Tuple[int, ...]
+
+    model_config = {"frozen": True}
+
+    @classmethod
+    def from_sides(cls, give: PebbleCollection, receive: PebbleCollection):
+        """
+        Builds the directed trade that gives one side of an equation and receives the other.
+
+        :param give: side handed over by the wallet
+        :type give: PebbleCollection
+        :param receive: side handed over by the bank
+        :type receive: PebbleCollection
+        :return: precomputed directed trade
+        :rtype: DirectedTrade
+        """
+        return cls(
+            equation=Equation(lhs=give, rhs=receive, directed=True),
+            give=give.counts,
+            receive=receive.counts,
+            delta=tuple(
+                receive_count - give_count
+                for give_count, receive_count in zip(give.counts, receive.counts)
+            ),
+        )
+
+    def allowed(self, wallet_counts: Tuple[int, ...], bank_counts: Tuple[int, ...]) -> bool:
+        """
+        Checks whether this trade can be made with the given wallet and bank count vectors.
+
+        :param wallet_counts: count vector of the wallet
+        :type wallet_counts: Tuple[int, ...]
+        :param bank_counts: count vector of the bank
+        :type bank_counts: Tuple[int, ...]
+        :return: True if the wallet holds the given side and the bank holds the received side, False otherwise
+        :rtype: bool
+        """
+        for needed, held in zip(self.give, wallet_counts):
+            if needed > held:
+                return False
+        for needed, held in zip(self.receive, bank_counts):
+            if needed > held:
+                return False
+        return True
+
+
+class CompiledEquations(BaseModel):
+    """
+    Immutable table with both directions of every equation in a game, in the order
+    RuleBook.tradable_equation produces them: for each equation, LHS -> RHS first, then RHS -> LHS.
+
+    :param source: the equations this table was built from
+    :type source: Tuple[Equation, ...]
+    :param trades: directed trades of all equations
+    :type trades: Tuple[DirectedTrade, ...]
+    """
+
+    source: Tuple[Equation, ...]
+    trades: Tuple[DirectedTrade, ...]
+
+    model_config = {"frozen": True}
+
+    @classmethod
+    def build(cls, equations: List[Equation]):
+        """
+        Precomputes the directed trades of the given equations.
+
+        :param equations: equations available in the game
+        :type equations: List[Equation]
+        :return: compiled equation table
+        :rtype: CompiledEquations
+        """
+        trades = []
+        for equation in equations:
+            trades.append(DirectedTrade.from_sides(equation.lhs, equation.rhs))
+            trades.append(DirectedTrade.from_sides(equation.rhs, equation.lhs))
+        return cls(source=tuple(equations), trades=tuple(trades))
+
+    def compiled_from(self, equations: List[Equation]) -> bool:
+        """
+        Checks whether this table was built from exactly these equation instances.
+
+        :param equations: equations to check
+        :type equations: List[Equation]
+        :return: True if the table is still up to date for the equations, False otherwise
+        :rtype: bool
+        """
+        return len(equations) == len(self.source) and all(
+            equation is compiled for equation, compiled in zip(equations, self.source)
+        )
+
+    @cached_property
+    def members(self) -> FrozenSet[Equation]:
+        """
+        Set of the source equations, for membership tests by canonical key instead of list scans.
+        Since equation equality is undirected, a directed rule is a member if either of its directions is.
+
+        :return: the source equations as a frozen set
+        :rtype: FrozenSet[Equation]
+        """
+        return frozenset(self.source)
+
+    @cached_property
+    def closure(self):
+        """
+        Reachability closure of the trades in this table, populated as states are explored.
+        Every holder of this table (and of copies of the Equations it was compiled for) shares the closure.
+
+        :return: closure of this trade table
+        :rtype: TradeClosure
+        """
+        from Bazaar.Common.trade_closure import TradeClosure
+
+        return TradeClosure(trades=self.trades)
+
+    def allowed_trades(
+        self, wallet_counts: Tuple[int, ...], bank_counts: Tuple[int, ...]
+    ) -> List[DirectedTrade]:
+        """
+        Returns every directed trade that can be made with the given wallet and bank count vectors.
+
+        :param wallet_counts: count vector of the wallet
+        :type wallet_counts: Tuple[int, ...]
+        :param bank_counts: count vector of the bank
+        :type bank_counts: Tuple[int, ...]
+        :return: allowed directed trades in table order
+        :rtype: List[DirectedTrade]
+        """
+        return [trade for trade in self.trades if trade.allowed(wallet_counts, bank_counts)]
+
+    def tradable_equations(
+        self, player_pebbles: PebbleCollection, bank: PebbleCollection
+    ) -> List[Equation]:
+        """
+        Returns the directed equations that can be traded with the given wallet and bank.
+        The equations are the ones built at compile time, so no new models are allocated.
+
+        :param player_pebbles: the pebbles the player has
+        :type player_pebbles: PebbleCollection
+        :param bank: the pebbles the bank has
+        :type bank: PebbleCollection
+        :return: directed equations that can be used to trade
+        :rtype: List[Equation]
+        """
+        return [trade.equation for trade in self.allowed_trades(player_pebbles.counts, bank.counts)]
 
 
 class Equations(BaseModel):
@@ -228,37 +418,49 @@ class Equations(BaseModel):
     equations: conlist(Equation, min_length=0, max_length=10)
 
     @classmethod
-    def generate_random(cls, count):
+    def generate_random(cls, count, rng: Optional[random.Random] = None):
         """
         Generates equations randomly.
         :param count: Number of equations to generate.
+        :param rng: random number generator to draw from, the global random module if not given.
         :return: Returns new Equations.
         """
         equations = []
+        generated = set()
         while len(equations) < count:
-            equation = Equation.generate_random()
-            while equation in equations:
-                equation = Equation.generate_random()
+            equation = Equation.generate_random(rng)
+            while equation in generated:
+                equation = Equation.generate_random(rng)
             equations.append(equation)
+            generated.add(equation)
         return cls(equations=equations)
 
+    def compile(self) -> CompiledEquations:
+        """
+        Returns the compiled table of directed trades for these equations.
+        The table is built on first use and kept with this object (copies share it) until the list of equations changes.
+
+        :return: compiled equation table
+        :rtype: CompiledEquations
+        """
+        compiled = self.__dict__.get("_compiled")
+        if compiled is None or not compiled.compiled_from(self.equations):
+            compiled = CompiledEquations.build(self.equations)
+            self.__dict__["_compiled"] = compiled
+        return compiled
+
     def filter_equations(
         self, player_pebbles: PebbleCollection, bank: PebbleCollection
     ) -> List[Equation]:
         """
         Returns the subset of the equations where they can be used to trade given the pebbles you have.
+        Each usable equation appears once per direction it can be traded in (see RuleBook.tradable_equation).
 
         :param player_pebbles: the pebbles you have.
         :param bank: the pebbles the bank has.
         :return: Equations that can be used to trade.
         """
-        from Bazaar.Common.rule_book import RuleBook
-
-        usable_directed_equations = []
-        for equation in self.equations:
-            usable_trades = RuleBook.tradable_equation(equation, player_pebbles, bank)
-            usable_directed_equations += usable_trades
-        return usable_directed_equations
+        return self.compile().tradable_equations(player_pebbles, bank)
 
     @staticmethod
     def validate_deserialize_data(data: list) -> bool:
@@ -0,0 +1,71 @@
+import random
+from typing import Iterator, Optional, Tuple
+
+from pydantic import BaseModel
+
+from Bazaar.Common.cards import Cards
+from Bazaar.Common.data import MAX_CARDS_NUM, MAX_EQUATION_NUM
+from Bazaar.Common.equations import Equations
+
+
+class GameGenerator(BaseModel):
+    """
+    Reproducible source of equation sets and decks for many games.
+    Every game draws from its own random number generator, seeded from the generator seed and the game index,
+    so game i gets the same equations and deck no matter which other games are generated, in which order,
+    or in which process.
+
+    :param seed: seed shared by all games of this generator
+    :type seed: int
+    :param equation_count: number of equations in every equation set
+    :type equation_count: int
+    :param card_count: number of cards in every deck
+    :type card_count: int
+    """
+
+    seed: int
+    equation_count: int = MAX_EQUATION_NUM
+    card_count: int = MAX_CARDS_NUM
+
+    def rng(self, index: int) -> random.Random:
+        """
+        Returns a fresh random number generator for the game with the given index.
+
+        :param index: index of the game
+        :type index: int
+        :return: random number generator of that game
+        :rtype: random.Random
+        """
+        return random.Random(f"{self.seed}:{index}")
+
+    def game(self, index: int) -> Tuple[Equations, Cards]:
+        """
+        Generates the equations and the deck of the game with the given index.
+        The equations are unique within the set and drawn before the deck, from the same game generator.
+
+        :param index: index of the game
+        :type index: int
+        :return: equations and deck of that game
+        :rtype: Tuple[Equations, Cards]
+        """
+        rng = self.rng(index)
+        equations = Equations.generate_random(self.equation_count, rng)
+        cards = Cards.generate_random(self.card_count, rng)
+        return equations, cards
+
+    def stream(self, start: int = 0, stop: Optional[int] = None) -> Iterator[Tuple[Equations, Cards]]:
+        """
+        Lazily generates the games with indices from start up to stop (forever if stop is not given).
+        Workers can split a tournament by giving each its own range of indices.
+
+        :param start: index of the first game
+        :type start: int
+        :param stop: index after the last game, None for an endless stream
+        :type stop: Optional[int]
+        :return: iterator over the equations and deck of every game
+        :rtype: Iterator[Tuple[Equations, Cards]]
+        """
+        index = start
+        while stop is None or index < stop:
+            yield self.game(index)
+            index += 1
@@ -7,7 +7,25 @@ from typing import Tuple
 from pydantic import BaseModel, conlist
 from copy import copy
 
+import numpy as np
+
 __PEBBLE_ORDER__ = ["red", "white", "blue", "green", "yellow"]
+__PEBBLE_INDEX__ = {color: index for index, color in enumerate(__PEBBLE_ORDER__)}
+__COLOR_COUNT__ = len(__PEBBLE_ORDER__)
+# Color indices in the order of the color names, which is the order PebbleCollection.__lt__ compares pebbles in
+__NAME_ORDER__ = sorted(range(__COLOR_COUNT__), key=lambda index: __PEBBLE_ORDER__[index])
+
+# Packed keys hold one 8-bit field per color: 7 bits for the count and a guard bit on top used by dominance checks.
+__PACK_FIELD_BITS__ = 8
+__PACK_COUNT_MASK__ = (1 << (__PACK_FIELD_BITS__ - 1)) - 1
+__PACK_GUARD_BITS__ = sum(
+    1 << (__PACK_FIELD_BITS__ * index + __PACK_FIELD_BITS__ - 1)
+    for index in range(__COLOR_COUNT__)
+)
+MAX_PACKED_COUNT = __PACK_COUNT_MASK__
+# Shift of every color's field, and the weight it is multiplied by, for packing many count vectors at once
+__PACK_SHIFTS__ = np.arange(__COLOR_COUNT__, dtype=np.int64) * __PACK_FIELD_BITS__
+__PACK_WEIGHTS__ = np.left_shift(np.int64(1), __PACK_SHIFTS__)
 
 
 class PebbleColor(str, Enum):
@@ -99,19 +117,13 @@ class Pebble(BaseModel):
     def __lt__(self, other) -> bool:
         """
         Overrides the default implementation of less than comparison between two Pebble instances.
+        Colors are ranked in (red, white, blue, green, yellow) order.
 
         :param other: other instance of the Pebble class.
-        :returns: True if the color of this Pebble is alphabetically smaller than other, False otherwise.
+        :returns: True if the color of this Pebble comes before the color of other, False otherwise.
         :rtype: bool
         """
-        if self == other:
-            return False
-        for elem in __PEBBLE_ORDER__:
-            if self.color == elem:
-                return True
-            elif other.color == elem:
-                return False
-        raise RuntimeError("This should never happen")
+        return __PEBBLE_INDEX__[self.color] < __PEBBLE_INDEX__[other.color]
 
     @staticmethod
     def get_rgb(color) -> Tuple[int, int, int]:
@@ -130,9 +142,153 @@ class Pebble(BaseModel):
         }
         return mapping[color]
 
+    @staticmethod
+    def of(color) -> "Pebble":
+        """
+        Returns the shared Pebble instance of the given color.
+        Pebbles are only ever compared by color, so every collection can reuse one instance per color
+        instead of validating a new Pebble for each slot.
+
+        :param color: one of "red", "white", "blue", "green", "yellow", or the matching PebbleColor
+        :return: interned Pebble of that color
+        :rtype: Pebble
+        """
+        return __INTERNED_PEBBLES__[getattr(color, "value", color)]
+
+    @staticmethod
+    def all() -> Tuple["Pebble", ...]:
+        """
+        Returns the shared Pebble instance of every color, in (red, white, blue, green, yellow) order.
+
+        :return: one interned Pebble per color
+        :rtype: Tuple[Pebble, ...]
+        """
+        return __ALL_PEBBLES__
+
+
+__INTERNED_PEBBLES__ = {color: Pebble(color=color) for color in __PEBBLE_ORDER__}
+__ALL_PEBBLES__ = tuple(__INTERNED_PEBBLES__.values())
+
+
 class PebbleCollection(BaseModel):
+    """
+    A multiset of pebbles.
+
+    Next to the ordered pebbles tuple, every collection keeps a count vector with one slot per PebbleColor
+    (in red, white, blue, green, yellow order). The vector is derived from the tuple the first time it is needed
+    and carried over by the arithmetic below, so subset checks, equality and hashing cost a fixed 5 slots
+    no matter how many pebbles the collection holds.
+
+    The cached vector lives in the instance __dict__ next to the pebbles field instead of in pydantic private
+    attributes, whose reads and writes go through pydantic's __getattr__ and __setattr__ on every access.
+    """
+
     pebbles: tuple = tuple()
 
+    @property
+    def counts(self) -> Tuple[int, ...]:
+        """
+        Returns the number of pebbles of each color in this collection, in (red, white, blue, green, yellow) order.
+        The vector is recomputed only if the pebbles tuple was replaced since it was last derived.
+
+        :return: count vector of this collection
+        :rtype: Tuple[int, ...]
+        """
+        cache = self.__dict__
+        if cache.get("_counted") is not self.pebbles:
+            counts = [0] * __COLOR_COUNT__
+            for pebble in self.pebbles:
+                counts[__PEBBLE_INDEX__[pebble.color]] += 1
+            self._set_counts(tuple(counts))
+        return cache["_counts"]
+
+    @property
+    def sort_key(self) -> Tuple[int, str]:
+        """
+        Returns the key __lt__ orders collections by: the number of pebbles, then the first letters of the pebble
+        colors in sorted order. Keys are totally ordered, and equal exactly when the collections are equal.
+        Like counts, the key is derived once per pebbles tuple and kept in the instance __dict__.
+
+        :return: size of this collection and its sorted color letters
+        :rtype: Tuple[int, str]
+        """
+        cache = self.__dict__
+        if cache.get("_sort_keyed") is not self.pebbles:
+            counts = self.counts
+            letters = "".join(__PEBBLE_ORDER__[index][0] * counts[index] for index in __NAME_ORDER__)
+            cache["_sort_key"] = (len(self.pebbles), letters)
+            cache["_sort_keyed"] = self.pebbles
+        return cache["_sort_key"]
+
+    def _set_counts(self, counts: Tuple[int, ...]) -> None:
+        """
+        Records an already known count vector for the current pebbles tuple.
+
+        :param counts: count vector matching the pebbles of this collection
+        :type counts: Tuple[int, ...]
+        """
+        self.__dict__["_counts"] = counts
+        self.__dict__["_counted"] = self.pebbles
+
+    @classmethod
+    def from_trusted(cls, pebbles: tuple, counts: Optional[Tuple[int, ...]] = None):
+        """
+        Builds a collection without running pydantic validation, through model_construct.
+        Only meant for pebbles that already went through validation or come from Pebble.of, never for raw input;
+        data crossing the JSON boundary goes through deserialize instead.
+
+        :param pebbles: tuple of Pebble instances
+        :type pebbles: tuple
+        :param counts: count vector matching the pebbles, if already known
+        :type counts: Optional[Tuple[int, ...]]
+        :return: new PebbleCollection holding the given pebbles
+        :rtype: PebbleCollection
+        """
+        collection = cls.model_construct(pebbles=pebbles)
+        if counts is not None:
+            collection._set_counts(counts)
+        return collection
+
+    @classmethod
+    def from_counts(cls, counts: Tuple[int, ...]):
+        """
+        Builds a collection straight from a count vector. Pebbles are laid out in (red, white, blue, green, yellow) order.
+
+        :param counts: number of pebbles of each color, in (red, white, blue, green, yellow) order
+        :type counts: Tuple[int, ...]
+        :return: new PebbleCollection holding the counted pebbles
+        :rtype: PebbleCollection
+        :raises: ValueError if the vector does not have one non-negative slot per color
+        """
+        counts = tuple(counts)
+        if len(counts) != __COLOR_COUNT__ or any(count < 0 for count in counts):
+            raise ValueError(f"Count vector must hold {__COLOR_COUNT__} non-negative counts.")
+        collection = cls.from_trusted(ordered_pebbles(counts), counts)
+        collection.__dict__["_ordered"] = collection.pebbles
+        return collection
+
+    @classmethod
+    def from_packed(cls, key: int):
+        """
+        Builds a collection from a packed key produced by pack.
+
+        :param key: packed count vector
+        :type key: int
+        :return: new PebbleCollection holding the packed pebbles
+        :rtype: PebbleCollection
+        """
+        return cls.from_counts(unpack_counts(key))
+
+    def pack(self) -> int:
+        """
+        Returns the packed-integer key of this collection. Equal collections share a key, so it can stand in for the
+        collection in dict-based caches.
+
+        :return: packed count vector of this collection
+        :rtype: int
+        """
+        return pack_counts(self.counts)
+
     def __add__(self, other):
         """
         Overrides the add function of the PebbleCollection class.
@@ -143,16 +299,18 @@ class PebbleCollection(BaseModel):
         :rtype: PebbleCollection
         :raises: TypeError if other is not an instance of PebbleCollection
         """
-        if isinstance(other, PebbleCollection):
-            this_list_of_pebbles = list(copy(self.pebbles))
-            other_list_of_pebbles = list(other.pebbles)
-            return PebbleCollection(pebbles=(tuple(this_list_of_pebbles + other_list_of_pebbles)))
-        else:
+        if not isinstance(other, PebbleCollection):
             raise TypeError("The second argument is not of type PebbleCollection")
+        counts = tuple(
+            this_count + other_count
+            for this_count, other_count in zip(self.counts, other.counts)
+        )
+        return PebbleCollection.from_trusted(self.pebbles + other.pebbles, counts)
 
     def __sub__(self, other):
         """
         Overrides the subtract function of the PebbleCollection class.
+        Pebbles are removed in the order they appear in this collection, so the remaining ones keep their order.
 
         :param other: other instance of PebbleCollection to be subtracted from this instance
         :type other: PebbleCollection
@@ -164,14 +322,22 @@ class PebbleCollection(BaseModel):
         if not isinstance(other, PebbleCollection):
             raise TypeError("The second argument is not of type PebbleCollection")
 
-        new_list_of_pebbles = list(copy(self.pebbles))
-        for pebble in other.pebbles:
-            if pebble not in new_list_of_pebbles:
-                return PebbleCollection(pebbles=self.pebbles)
-            else:
-                new_list_of_pebbles.remove(pebble)
+        if not other.subset_of(self):
+            return PebbleCollection.from_trusted(self.pebbles, self.counts)
 
-        return PebbleCollection(pebbles=tuple(new_list_of_pebbles))
+        to_remove = list(other.counts)
+        remaining_pebbles = []
+        for pebble in self.pebbles:
+            index = __PEBBLE_INDEX__[pebble.color]
+            if to_remove[index]:
+                to_remove[index] -= 1
+            else:
+                remaining_pebbles.append(pebble)
+        counts = tuple(
+            this_count - other_count
+            for this_count, other_count in zip(self.counts, other.counts)
+        )
+        return PebbleCollection.from_trusted(tuple(remaining_pebbles), counts)
 
     def __eq__(self, other):
         """Overrides the equal function of the PebbleCollection class.
@@ -182,15 +348,18 @@ class PebbleCollection(BaseModel):
         False otherwise
         :rtype: bool
         """
-        return Counter(self.pebbles) == Counter(other.pebbles)
+        if not isinstance(other, PebbleCollection):
+            return False
+        return self.counts == other.counts
 
     def __hash__(self):
         """
         Overrides the hash function of the PebbleCollection class.
+        Hashes the count vector, so collections that are equal regardless of order share a hash.
 
         :returns: Hash of the Pebble collection.
         """
-        return hash(self.pebbles)
+        return hash(self.counts)
 
     def __list_str__(self):
         """covert the list_of_pebble to a list of sorted string representation of pebble in lexicographical order.
@@ -202,7 +371,7 @@ class PebbleCollection(BaseModel):
         """
         Overrides the default implementation of less than comparison between two pebble collections.
         The comparison first check the size of pebbles, then compare the string representation of pebbles
-        lexicographically if the size are the same.
+        lexicographically if the size are the same. Both are kept in the cached sort_key.
 
         :param other: other instance of the PebbleCollection class.
         :returns: True if this PebbleCollection is smaller than other pebble collection, False otherwise.
@@ -210,27 +379,21 @@ class PebbleCollection(BaseModel):
         """
         if not isinstance(other, PebbleCollection):
             raise TypeError("The second argument is not of type PebbleCollection")
-        if len(self.pebbles) == len(other.pebbles):
-            return self.__list_str__() < other.__list_str__()
-
-        return len(self.pebbles) < len(other.pebbles)
+        return self.sort_key < other.sort_key
 
     def subset_of(self, other) -> bool:
         """
         Checks if this PebbleCollection is subset of another PebbleCollection.
-        NOTE: using counter to take account of the number of same color
+        NOTE: compares count vectors to take account of the number of same color
 
         :param other: other instance of PebbleCollection to be subset of
         :type other: PebbleCollection
         :returns: True if this PebbleCollection is subset of other PebbleCollection, False otherwise
         :rtype: bool
         """
-        self_counter = Counter(self.pebbles)
-        other_counter = Counter(other.pebbles)
-        for pebble, count in self_counter.items():
-            if other_counter[pebble] < count:
+        for this_count, other_count in zip(self.counts, other.counts):
+            if this_count > other_count:
                 return False
-
         return True
 
     @staticmethod
@@ -261,9 +424,8 @@ class PebbleCollection(BaseModel):
         """
         if not PebbleCollection.validate_deserialize_data(data):
             raise Exception("Invalid PebbleCollection data provided.")
-        pebbles = (Pebble(color=PebbleColor(color)) for color in data)
-        newPebbleColllection = cls(pebbles=pebbles)
-        return newPebbleColllection
+        pebbles = tuple(Pebble.of(color) for color in data)
+        return cls.from_trusted(pebbles)
 
     def serialize(self) -> list:
         """
@@ -279,15 +441,24 @@ class PebbleCollection(BaseModel):
         Draws a pebble from this pebble collection in a deterministic manner.
         Specifically, iterates through the sequence of colors in order (red, white, blue, green, yellow) and,
         if a pebble of that color is available, picks it.
+        The drawn color is looked up in the count vector and the remaining pebbles are left in color order,
+        so consecutive draws from the same bank never sort it again.
 
         :return: A pebble from this pebble collection, None if no more pebbles are available to draw.
         :rtype: Optional[Pebble]
         """
         if not self.pebbles:
             return None
-        sorted_pebbles = sorted(self.pebbles)
-        pebble = sorted_pebbles[0]
-        self.pebbles = tuple(sorted_pebbles[1:])
+        counts = list(self.counts)
+        rank = next(rank for rank, count in enumerate(counts) if count)
+        counts[rank] -= 1
+        if self.__dict__.get("_ordered") is self.pebbles:
+            pebble, pebbles = self.pebbles[0], self.pebbles[1:]
+        else:
+            pebble, pebbles = Pebble.of(__PEBBLE_ORDER__[rank]), ordered_pebbles(counts)
+        self.pebbles = pebbles
+        self._set_counts(tuple(counts))
+        self.__dict__["_ordered"] = pebbles
         return pebble
 
     def add_pebble(self, pebble: Pebble):
@@ -302,18 +473,123 @@ class PebbleCollection(BaseModel):
         self.pebbles = self.pebbles + tuple([pebble])
 
     @classmethod
-    def generate_random(cls, size: int):
+    def generate_random(cls, size: int, rng: Optional[random.Random] = None):
         """
         Generates a random PebbleCollection object with a specified number of random pebbles.
 
         :param size: number of pebbles to add to the collection.
         :type size: int
+        :param rng: random number generator to draw from, the global random module if not given
+        :type rng: Optional[random.Random]
         :return: PebbleCollection object with random pebbles.
         :rtype: PebbleCollection
         """
-        all_pebbles = [Pebble(color=color) for color in PebbleColor]
-        pebbles=tuple(random.choices(all_pebbles, k=size))
-        return cls(pebbles=pebbles)
+        rng = rng or random
+        pebbles = tuple(rng.choices(Pebble.all(), k=size))
+        return cls.from_trusted(pebbles)
+
+
+def ordered_pebbles(counts: Tuple[int, ...]) -> tuple:
+    """
+    Lays out the pebbles described by a count vector in (red, white, blue, green, yellow) order.
+
+    :param counts: number of pebbles of each color
+    :type counts: Tuple[int, ...]
+    :return: tuple of interned Pebble instances
+    :rtype: tuple
+    """
+    return tuple(
+        Pebble.of(color) for color, count in zip(__PEBBLE_ORDER__, counts) for _ in range(count)
+    )
+
+
+def pack_counts(counts: Tuple[int, ...]) -> int:
+    """
+    Packs a count vector into a single integer, one 8-bit field per color in (red, white, blue, green, yellow) order.
+
+    :param counts: number of pebbles of each color
+    :type counts: Tuple[int, ...]
+    :return: packed key
+    :rtype: int
+    :raises: ValueError if a count does not fit into the 7 bits of its field
+    """
+    key = 0
+    for index, count in enumerate(counts):
+        if not 0 <= count <= MAX_PACKED_COUNT:
+            raise ValueError(f"Pebble counts must be between 0 and {MAX_PACKED_COUNT} to be packed.")
+        key |= count << (__PACK_FIELD_BITS__ * index)
+    return key
+
+
+def unpack_counts(key: int) -> Tuple[int, ...]:
+    """
+    Unpacks a key produced by pack_counts back into a count vector.
+
+    :param key: packed key
+    :type key: int
+    :return: number of pebbles of each color, in (red, white, blue, green, yellow) order
+    :rtype: Tuple[int, ...]
+    """
+    return tuple(
+        (key >> (__PACK_FIELD_BITS__ * index)) & __PACK_COUNT_MASK__
+        for index in range(__COLOR_COUNT__)
+    )
+
+
+def pack_rows(counts) -> np.ndarray:
+    """
+    Packs the rows of an N x 5 count array at once, with one matrix product against the field weights.
+    Keys are the ones pack_counts returns for the same count vectors.
+
+    :param counts: N x 5 array (or nested sequence) of pebble counts
+    :return: array of N packed keys
+    :rtype: np.ndarray
+    :raises: ValueError if a count does not fit into the 7 bits of its field
+    """
+    counts = np.asarray(counts, dtype=np.int64).reshape(-1, __COLOR_COUNT__)
+    if ((counts < 0) | (counts > MAX_PACKED_COUNT)).any():
+        raise ValueError(f"Pebble counts must be between 0 and {MAX_PACKED_COUNT} to be packed.")
+    return counts @ __PACK_WEIGHTS__
+
+
+def pack_all(collections) -> List[int]:
+    """
+    Packs many collections at once (see pack_rows).
+
+    :param collections: iterable of PebbleCollection instances
+    :return: packed keys in the order of the given collections
+    :rtype: List[int]
+    """
+    return pack_rows([collection.counts for collection in collections]).tolist()
+
+
+def unpack_all(keys) -> List[Tuple[int, ...]]:
+    """
+    Unpacks many keys at once, shifting every key by the offset of every field in one array operation.
+
+    :param keys: iterable of packed keys
+    :return: count vectors in the order of the given keys
+    :rtype: List[Tuple[int, ...]]
+    """
+    keys = np.asarray(list(keys), dtype=np.int64).reshape(-1, 1)
+    return [tuple(row) for row in ((keys >> __PACK_SHIFTS__) & __PACK_COUNT_MASK__).tolist()]
+
+
+def dominates(key: int, other_key: int) -> bool:
+    """
+    Checks whether the collection packed as key holds at least as many pebbles of every color as the one packed
+    as other_key, i.e. whether other is a subset of it.
+    Setting the guard bit of every field before subtracting keeps borrows inside their field; a guard bit survives
+    exactly when that color's count did not go below zero.
+
+    :param key: packed key of the larger candidate
+    :type key: int
+    :param other_key: packed key of the smaller candidate
+    :type other_key: int
+    :return: True if every count in key is greater than or equal to the matching count in other_key
+    :rtype: bool
+    """
+    return ((key | __PACK_GUARD_BITS__) - other_key) & __PACK_GUARD_BITS__ == __PACK_GUARD_BITS__
 
 
 def list_of_all_pebbles() -> PebbleCollection:
@@ -323,7 +599,7 @@ def list_of_all_pebbles() -> PebbleCollection:
     :returns: PebbleCollection containing Pebble instances of all available colors.
     :rtype: PebbleCollection
     """
-    return PebbleCollection(pebbles=[Pebble(color=color) for color in PebbleColor])
+    return PebbleCollection.from_counts((1,) * __COLOR_COUNT__)
 
 
 def init_bank() -> PebbleCollection:
@@ -333,7 +609,4 @@ def init_bank() -> PebbleCollection:
     :return: PebbleCollection of size 100 representing the state of the bank at the beginning of the game.
     :rtype: PebbleCollection
     """
-    all_pebbles = []
-    for color in PebbleColor:
-        all_pebbles += [Pebble(color=color) for _ in range(20)]
-    return PebbleCollection(pebbles=tuple(all_pebbles))
+    return PebbleCollection.from_counts((20,) * __COLOR_COUNT__)
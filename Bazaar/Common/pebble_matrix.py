@@ -0,0 +1,184 @@
+from typing import List, Tuple
+
+import numpy as np
+from pydantic import BaseModel, ConfigDict, model_validator
+
+from Bazaar.Common.cards import Card
+from Bazaar.Common.data import CARD_REWARDS
+from Bazaar.Common.equations import Equation
+from Bazaar.Common.pebble import PebbleCollection, pack_rows
+
+COLOR_COUNT = 5
+# Remaining wallet sizes above this value score the same as this value (see RuleBook.score_if_bought).
+_MAX_SCORED_REMAINDER = 3
+
+
+def _as_rows(collections) -> np.ndarray:
+    """
+    Converts PebbleCollections, Cards, a PebbleMatrix or an array of count vectors into an M x 5 count array.
+
+    :param collections: the collections to convert
+    :return: array with one count vector per row
+    :rtype: np.ndarray
+    """
+    if isinstance(collections, PebbleMatrix):
+        return collections.counts
+    if isinstance(collections, np.ndarray):
+        return collections.reshape(-1, COLOR_COUNT)
+    if isinstance(collections, (PebbleCollection, Card)):
+        collections = [collections]
+    rows = [
+        item.pebbles.counts if isinstance(item, Card) else item.counts
+        for item in collections
+    ]
+    return np.array(rows, dtype=np.int64).reshape(-1, COLOR_COUNT)
+
+
+class PebbleMatrix(BaseModel):
+    """
+    N wallets or banks stored as an N x 5 integer array, one row per collection and one column per color
+    in (red, white, blue, green, yellow) order. Every operation works on all rows at once.
+
+    :param counts: N x 5 array of pebble counts
+    :type counts: np.ndarray
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True, frozen=True)
+
+    counts: np.ndarray
+
+    @model_validator(mode="before")
+    def validate_shape(cls, values):
+        """
+        Validates that counts is a two-dimensional array with one column per color and no negative counts.
+        """
+        counts = values.get("counts")
+        if not isinstance(counts, np.ndarray) or counts.ndim != 2 or counts.shape[1] != COLOR_COUNT:
+            raise ValueError(f"PebbleMatrix counts must be an N x {COLOR_COUNT} array.")
+        if (counts < 0).any():
+            raise ValueError("PebbleMatrix counts must not be negative.")
+        return values
+
+    @classmethod
+    def from_collections(cls, collections) -> "PebbleMatrix":
+        """
+        Builds a matrix with one row per given PebbleCollection.
+
+        :param collections: iterable of PebbleCollection instances
+        :return: matrix holding the count vectors of the collections
+        :rtype: PebbleMatrix
+        """
+        return cls(counts=_as_rows(list(collections)))
+
+    @classmethod
+    def repeat(cls, collection: PebbleCollection, size: int) -> "PebbleMatrix":
+        """
+        Builds a matrix holding the same collection in each of its rows, e.g. one bank shared by many wallets.
+
+        :param collection: collection to repeat
+        :type collection: PebbleCollection
+        :param size: number of rows
+        :type size: int
+        :return: matrix with size copies of the collection
+        :rtype: PebbleMatrix
+        """
+        return cls(counts=np.tile(np.array(collection.counts, dtype=np.int64), (size, 1)))
+
+    def to_collections(self) -> List[PebbleCollection]:
+        """
+        Converts every row back into a PebbleCollection, with pebbles laid out in color order.
+
+        :return: one PebbleCollection per row
+        :rtype: List[PebbleCollection]
+        """
+        return [PebbleCollection.from_counts(tuple(int(count) for count in row)) for row in self.counts]
+
+    def pack(self) -> List[int]:
+        """
+        Returns the packed-integer key of every row (see pebble.pack_counts), packing all rows at once.
+
+        :return: one packed key per row
+        :rtype: List[int]
+        """
+        return pack_rows(self.counts).tolist()
+
+    def sizes(self) -> np.ndarray:
+        """
+        Returns the number of pebbles in every row.
+
+        :return: array of N pebble totals
+        :rtype: np.ndarray
+        """
+        return self.counts.sum(axis=1)
+
+    def contains(self, collections) -> np.ndarray:
+        """
+        Batched subset_of: checks every one of the M given collections against every row.
+
+        :param collections: M PebbleCollections, Cards (their cost), equation sides, or an M x 5 count array
+        :return: N x M boolean array whose [i, j] entry is True if collection j is a subset of row i
+        :rtype: np.ndarray
+        """
+        rows = _as_rows(collections)
+        return (self.counts[:, None, :] >= rows[None, :, :]).all(axis=2)
+
+    def trade(
+        self, equation: Equation, banks: "PebbleMatrix", left_to_right: bool = True
+    ) -> Tuple["PebbleMatrix", "PebbleMatrix", np.ndarray]:
+        """
+        Applies one direction of an equation to every (wallet, bank) row pair.
+        The trade only happens in rows where the wallet holds the given side and the bank holds the received side;
+        other rows are returned unchanged.
+
+        :param equation: equation to trade
+        :type equation: Equation
+        :param banks: banks matching the wallets in this matrix, either N rows or a single row shared by all wallets
+        :type banks: PebbleMatrix
+        :param left_to_right: True to give the left-hand side and receive the right-hand side, False for the opposite
+        :type left_to_right: bool
+        :return: wallets after the trade, banks after the trade, and an N boolean array marking the traded rows
+        :rtype: Tuple[PebbleMatrix, PebbleMatrix, np.ndarray]
+        """
+        give, receive = (equation.lhs, equation.rhs) if left_to_right else (equation.rhs, equation.lhs)
+        give_row = np.array(give.counts, dtype=np.int64)
+        receive_row = np.array(receive.counts, dtype=np.int64)
+        bank_counts = np.broadcast_to(banks.counts, self.counts.shape)
+
+        tradable = (self.counts >= give_row).all(axis=1) & (bank_counts >= receive_row).all(axis=1)
+        delta = np.where(tradable[:, None], receive_row - give_row, 0)
+        return (
+            PebbleMatrix(counts=self.counts + delta),
+            PebbleMatrix(counts=bank_counts - delta),
+            tradable,
+        )
+
+    def score_if_bought(self, cards) -> np.ndarray:
+        """
+        Batched RuleBook.score_if_bought: the points every row would receive for buying each of the given cards.
+
+        :param cards: M Card instances
+        :return: N x M integer array of points, 0 where the row cannot afford the card
+        :rtype: np.ndarray
+        """
+        if isinstance(cards, Card):
+            cards = [cards]
+        costs = _as_rows(cards)
+        affordable = self.contains(costs)
+        remaining = self.sizes()[:, None] - costs.sum(axis=1)[None, :]
+        remaining = np.clip(remaining, 0, _MAX_SCORED_REMAINDER)
+
+        rewards = np.array(
+            [
+                [CARD_REWARDS.get((size, card.happy_face), 0) for card in cards]
+                for size in range(_MAX_SCORED_REMAINDER + 1)
+            ],
+            dtype=np.int64,
+        )
+        points = np.take_along_axis(rewards, remaining, axis=0)
+        return np.where(affordable, points, 0)
+
+    def __len__(self) -> int:
+        """
+        Returns the number of rows in this matrix.
+        """
+        return self.counts.shape[0]
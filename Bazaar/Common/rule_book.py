@@ -88,32 +88,6 @@ class RuleBook:
             )
         return usable_equations
 
-    @staticmethod
-    def __validate_equations(
-        equations: list[Equation], wallet: PebbleCollection, bank: PebbleCollection
-    ) -> Optional[Tuple[PebbleCollection, PebbleCollection]]:
-        """
-        check if a list of Equation can be performed in order with given bank and wallet at the beginning.
-
-        :param equations: list of equation player request to exchange in this turn. Player request to draw a pebble if no equation
-        :data equations: Equations
-        :param wallet:player's wallet
-        :data equations: PebbleCollection
-        :param bank: bank state
-        :data bank: PebbleCollection
-        :return: None if exchange sequence is invalid, player wallet and bank after applying exchanges if valid.
-        :rtype: Optional[Tuple[PebbleCollection, PebbleCollection]]
-        """
-        current_wallet = copy(wallet)
-        current_bank = copy(bank)
-        for eq in equations:
-            if not RuleBook.can_trade_equation(eq, current_wallet, current_bank):
-                return None
-            current_wallet, current_bank = eq.trade_equation(
-                current_wallet, current_bank
-            )
-        return current_wallet, current_bank
-
     @staticmethod
     def validate_exchange_request(
         turn_state: TurnState, rules: List[Equation], equations: Equations
@@ -137,9 +111,14 @@ class RuleBook:
             return active_player_wallet, current_bank
         if len(rules) > MAX_EXCHANGE_DEPTH:
             return None
-        if not all([rule in equations.equations for rule in rules]):
+        compiled = equations.compile()
+        if not all(rule in compiled.members for rule in rules):
+            return None
+        if compiled.closure.follow(active_player_wallet.counts, current_bank.counts, rules) is None:
             return None
-        return RuleBook.__validate_equations(rules, active_player_wallet, current_bank)
+        for rule in rules:
+            active_player_wallet, current_bank = rule.trade_equation(active_player_wallet, current_bank)
+        return active_player_wallet, current_bank
 
     @staticmethod
     def can_purchase_card(card, player_wallet: PebbleCollection) -> bool:
@@ -252,10 +231,22 @@ class RuleBook:
             return 0
 
         remaining_wallet = player_wallet - card.pebbles
-        remaining_pebbles = len(remaining_wallet.pebbles)
-        remaining_pebbles = 3 if remaining_pebbles > 3 else remaining_pebbles
+        return RuleBook.card_reward(len(remaining_wallet.pebbles), card.happy_face)
+
+    @staticmethod
+    def card_reward(remaining_pebbles: int, happy_face: bool) -> int:
+        """
+        Returns the number of points a card is worth when bought, given the number of pebbles left in the wallet.
 
-        return CARD_REWARDS.get((remaining_pebbles, card.happy_face), 0)
+        :param remaining_pebbles: number of pebbles in the wallet after the purchase
+        :type remaining_pebbles: int
+        :param happy_face: whether the card displays a happy face
+        :type happy_face: bool
+        :returns: number of points the card adds to the player's score
+        :rtype: int
+        """
+        remaining_pebbles = 3 if remaining_pebbles > 3 else remaining_pebbles
+        return CARD_REWARDS.get((remaining_pebbles, happy_face), 0)
 
     @staticmethod
     def draw_bank_pebble(bank: PebbleCollection) -> Optional[Pebble]:
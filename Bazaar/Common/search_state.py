@@ -0,0 +1,169 @@
+from typing import List, Optional, Tuple
+
+from pydantic import BaseModel, Field
+
+from Bazaar.Common.equations import DirectedTrade
+from Bazaar.Common.pebble import __PACK_FIELD_BITS__, pack_counts
+
+# Weight of every color in SearchState.key: the fields of pebble.pack_counts, so the key of a wallet is its
+# PebbleCollection.pack() key
+_KEY_WEIGHTS = tuple(1 << (__PACK_FIELD_BITS__ * index) for index in range(5))
+
+# Moves made so far as a parent-pointer chain: (latest move, chain of the moves before it), None when empty
+Trail = Optional[Tuple]
+
+
+class SearchState(BaseModel):
+    """
+    Wallet and bank of a search, changed in place by make/unmake moves instead of copied at every node.
+    A trade or purchase is made with apply_trade or apply_purchase and taken back, last made first, with undo_trade
+    or undo_purchase. Every move records its wallet change in an undo log, and its index (a trade index or a card
+    position) in a parent-pointer trail, so the path to a node is never copied unless path() is asked for it.
+    The wallet also has an integer key that is updated with every move, to memoize states without building tuples.
+    It is the packed-integer key of PebbleCollection.pack, which holds as long as no color has more pebbles than
+    pebble.MAX_PACKED_COUNT between the wallet and the bank.
+
+    :param wallet: count vector of the wallet, changed in place
+    :type wallet: List[int]
+    :param bank: count vector of the bank, changed in place
+    :type bank: List[int]
+    :param key: packed-integer key of the wallet, equal for equal wallets
+    :type key: int
+    :param trail: indices of the moves made, latest first, as a parent-pointer chain
+    :type trail: Trail
+    :param log: pebbles moved by every move made, in order, with +1 if they went to the wallet and -1 if to the bank
+    :type log: List[Tuple[Tuple[int, ...], int]]
+    """
+
+    wallet: List[int]
+    bank: List[int]
+    key: int = 0
+    trail: Trail = None
+    log: List[Tuple[Tuple[int, ...], int]] = Field(default_factory=list)
+
+    @classmethod
+    def start(cls, wallet_counts: Tuple[int, ...], bank_counts: Tuple[int, ...]) -> "SearchState":
+        """
+        Builds the state a search starts from.
+
+        :param wallet_counts: count vector of the wallet
+        :type wallet_counts: Tuple[int, ...]
+        :param bank_counts: count vector of the bank
+        :type bank_counts: Tuple[int, ...]
+        :return: state holding copies of both vectors, with no moves made
+        :rtype: SearchState
+        :raises: ValueError if a count of the wallet does not fit into a field of its key
+        """
+        return cls(
+            wallet=list(wallet_counts),
+            bank=list(bank_counts),
+            key=pack_counts(wallet_counts),
+        )
+
+    def wallet_counts(self) -> Tuple[int, ...]:
+        """
+        Returns a snapshot of the wallet.
+
+        :return: count vector of the wallet
+        :rtype: Tuple[int, ...]
+        """
+        return tuple(self.wallet)
+
+    def bank_counts(self) -> Tuple[int, ...]:
+        """
+        Returns a snapshot of the bank.
+
+        :return: count vector of the bank
+        :rtype: Tuple[int, ...]
+        """
+        return tuple(self.bank)
+
+    def path(self) -> Tuple[int, ...]:
+        """
+        Returns the indices of the moves made so far, first made first.
+
+        :return: indices of the moves
+        :rtype: Tuple[int, ...]
+        """
+        indices = []
+        trail = self.trail
+        while trail is not None:
+            index, trail = trail
+            indices.append(index)
+        return tuple(reversed(indices))
+
+    def apply_trade(self, index: int, trade: DirectedTrade) -> bool:
+        """
+        Makes a trade if the wallet and the bank allow it.
+
+        :param index: index of the trade, recorded in the trail
+        :type index: int
+        :param trade: trade to make
+        :type trade: DirectedTrade
+        :return: True if the trade was made, False if it is not allowed (the state is then unchanged)
+        :rtype: bool
+        """
+        if not trade.allowed(self.wallet, self.bank):
+            return False
+        self.__move(index, trade.delta, 1)
+        return True
+
+    def undo_trade(self) -> None:
+        """
+        Takes back the last trade made.
+        """
+        self.__undo()
+
+    def apply_purchase(self, position: int, cost: Tuple[int, ...]) -> bool:
+        """
+        Buys a card if the wallet holds its cost; the cost goes to the bank.
+
+        :param position: position of the card, recorded in the trail
+        :type position: int
+        :param cost: count vector of the pebbles on the card
+        :type cost: Tuple[int, ...]
+        :return: True if the card was bought, False if the wallet cannot pay for it (the state is then unchanged)
+        :rtype: bool
+        """
+        for needed, held in zip(cost, self.wallet):
+            if needed > held:
+                return False
+        self.__move(position, cost, -1)
+        return True
+
+    def undo_purchase(self) -> None:
+        """
+        Takes back the last purchase made.
+        """
+        self.__undo()
+
+    def __move(self, index: int, change: Tuple[int, ...], sign: int) -> None:
+        """
+        Adds sign times change to the wallet and takes it from the bank, then records the move.
+        The key and the trail are written straight into the instance __dict__, skipping pydantic's __setattr__.
+        """
+        fields = self.__dict__
+        wallet, bank, key = fields["wallet"], fields["bank"], fields["key"]
+        for color, amount in enumerate(change):
+            if amount:
+                wallet[color] += sign * amount
+                bank[color] -= sign * amount
+                key += sign * amount * _KEY_WEIGHTS[color]
+        fields["key"] = key
+        fields["log"].append((change, sign))
+        fields["trail"] = (index, fields["trail"])
+
+    def __undo(self) -> None:
+        """
+        Reverts the last move recorded in the log.
+        """
+        fields = self.__dict__
+        change, sign = fields["log"].pop()
+        wallet, bank, key = fields["wallet"], fields["bank"], fields["key"]
+        for color, amount in enumerate(change):
+            if amount:
+                wallet[color] -= sign * amount
+                bank[color] += sign * amount
+                key -= sign * amount * _KEY_WEIGHTS[color]
+        fields["key"] = key
+        fields["trail"] = fields["trail"][1]
@@ -0,0 +1,73 @@
+import random
+import unittest
+from copy import copy
+
+from Bazaar.Common.affordability import AffordabilityIndex
+from Bazaar.Common.cards import Card, Cards
+from Bazaar.Common.pebble import Pebble, PebbleCollection
+from Bazaar.Common.rule_book import RuleBook
+
+
+class TestAffordabilityIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.cards = Cards.deserialize(
+            [
+                {"face?": True, "pebbles": ["red", "red", "white", "blue", "green"]},
+                {"face?": False, "pebbles": ["yellow", "yellow", "yellow", "yellow", "yellow"]},
+                {"face?": False, "pebbles": ["red", "white", "blue", "green", "yellow"]},
+            ]
+        )
+        self.wallet = PebbleCollection.deserialize(["red", "red", "white", "blue", "green", "yellow"])
+
+    def expected(self, cards: Cards, wallet: PebbleCollection) -> int:
+        return sum(
+            1 << position
+            for position, card in enumerate(cards.cards)
+            if RuleBook.can_purchase_card(card, wallet)
+        )
+
+    def test_affordable(self):
+        """Test the mask of the cards a wallet can buy."""
+        index = AffordabilityIndex.from_cards(self.cards.cards)
+        self.assertEqual(index.affordable(self.wallet.counts), 0b101)
+        self.assertEqual(index.positions(0b101), [0, 2])
+        self.assertEqual(index.affordable(PebbleCollection().counts), 0)
+        self.assertEqual(index.affordable((0, 0, 0, 0, 9)), 0b010)
+
+    def test_matches_can_purchase_card(self):
+        """Test the index against RuleBook.can_purchase_card on random rows and wallets."""
+        rng = random.Random(3)
+        for _ in range(50):
+            cards = Cards.generate_random(rng.randint(0, 8), rng)
+            wallet = PebbleCollection(pebbles=[rng.choice(Pebble.all()) for _ in range(rng.randint(0, 12))])
+            self.assertEqual(cards.affordability.affordable(wallet.counts), self.expected(cards, wallet))
+
+    def test_incremental_updates(self):
+        """Test that purchases and refills keep the index of a row up to date without rebuilding it."""
+        index = self.cards.affordability
+        refill = Card.deserialize({"face?": True, "pebbles": ["white", "white", "white", "white", "white"]})
+
+        self.cards.remove_card(self.cards.cards[0])
+        self.cards.add_card(refill)
+        self.assertIs(self.cards.affordability, index)
+        self.assertEqual(index.affordable(self.wallet.counts), self.expected(self.cards, self.wallet))
+        self.assertEqual(index.affordable((0, 5, 0, 0, 0)), 0b100)
+
+        self.assertEqual(self.cards.pop_card(-1), refill)
+        self.assertIs(self.cards.affordability, index)
+        self.assertEqual(index.affordable((0, 5, 0, 0, 0)), 0)
+
+    def test_rebuilt_after_direct_changes(self):
+        """Test that changing the list directly does not leave a stale index, and that the index is not a field."""
+        index = self.cards.affordability
+        self.cards.cards.pop(0)
+        self.assertIsNot(self.cards.affordability, index)
+        self.assertEqual(self.cards.affordability.affordable(self.wallet.counts), 0b10)
+
+        self.assertEqual(copy(self.cards), Cards(cards=list(self.cards.cards)))
+        self.assertEqual(self.cards.serialize(), Cards(cards=list(self.cards.cards)).serialize())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -344,6 +344,23 @@ class TestCards(unittest.TestCase):
     def test_cards_contains(self):
         self.assertIn(self.cardRGWBY, self.cards)
 
+    def test_card_key_and_hash(self):
+        """
+        Test that equal cards share a key and hash regardless of the order of their pebbles.
+        """
+        reordered_card = Card(
+            pebbles=self.collectionBY + self.collectionRGW, happy_face=False
+        )
+        self.assertEqual(reordered_card.key, self.cardRGWBY.key)
+        self.assertEqual(hash(reordered_card), hash(self.cardRGWBY))
+        happy_card = Card(pebbles=self.cardRGWBY.pebbles, happy_face=True)
+        self.assertNotEqual(happy_card.key, self.cardRGWBY.key)
+        self.assertNotEqual(self.cardRWBBY.key, self.cardRGWBY.key)
+
+        cards = set(self.cards.cards)
+        self.assertIn(reordered_card, cards)
+        self.assertNotIn(happy_card, cards)
+
     def test_invalid_card_count(self):
         """
         Test that Cards cannot be initialized with more than 20 cards or less than 0 cards.
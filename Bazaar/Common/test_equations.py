@@ -132,6 +132,34 @@ class TestEquation(unittest.TestCase):
         self.assertTrue(eq1 == eq3)
         self.assertTrue(eq1 == eq4)
 
+    def test_equation_key_and_hash(self):
+        """Test that equal equations share a key and hash, and that pebble multiplicity is part of the key."""
+        eq1 = Equation(lhs=self.collectionRG, rhs=self.collectionBY, directed=False)
+        eq2 = Equation(lhs=self.collectionBY, rhs=self.collectionRG, directed=True)
+        self.assertEqual(eq1, eq2)
+        self.assertEqual(eq1.key, eq2.key)
+        self.assertEqual(hash(eq1), hash(eq2))
+
+        collectionBYY = PebbleCollection(pebbles=(self.blue, self.yellow, self.yellow))
+        eq3 = Equation(lhs=self.collectionRG, rhs=collectionBYY)
+        self.assertNotEqual(eq1, eq3)
+        self.assertNotEqual(eq1.key, eq3.key)
+
+        equations = {eq1, eq3}
+        self.assertIn(eq2, equations)
+        self.assertEqual(len(equations | {eq2}), 2)
+
+    def test_equation_sort_key(self):
+        """Test that equations are ordered by their left-hand sides, then by their right-hand sides."""
+        rg_by = Equation(lhs=self.collectionRG, rhs=self.collectionBY)
+        rg_w = Equation(lhs=self.collectionRG, rhs=PebbleCollection(pebbles=(self.white,)))
+        by_rg = Equation(lhs=self.collectionBY, rhs=self.collectionRG)
+        self.assertEqual(rg_by.sort_key, (self.collectionRG.sort_key, self.collectionBY.sort_key))
+        self.assertTrue(rg_w < rg_by)
+        self.assertTrue(by_rg < rg_w)
+        self.assertFalse(rg_by < rg_by)
+        self.assertEqual(sorted([rg_by, rg_w, by_rg]), [by_rg, rg_w, rg_by])
+
     def test_trade_equation_valid(self):
         """
         Test that a valid trade correctly updates both player and bank pebble collections.
@@ -781,6 +809,45 @@ class TestEquations(unittest.TestCase):
         for eq in filtered_equations:
             self.assertIn(eq, expected_equations)
 
+    def test_compile(self):
+        """Tests that the compiled table holds both directions of every equation with their count vectors."""
+        compiled = self.equations.compile()
+        self.assertIs(compiled, self.equations.compile())
+        self.assertEqual(len(compiled.trades), 2 * len(self.equations.equations))
+        first = compiled.trades[0]
+        equation = self.equations.equations[0]
+        self.assertEqual(first.equation, Equation(lhs=equation.lhs, rhs=equation.rhs, directed=True))
+        self.assertEqual(first.give, equation.lhs.counts)
+        self.assertEqual(first.receive, equation.rhs.counts)
+        self.assertEqual(
+            first.delta, tuple(r - l for l, r in zip(equation.lhs.counts, equation.rhs.counts))
+        )
+        self.assertEqual(compiled.trades[1].give, equation.rhs.counts)
+
+        self.equations.equations.append(Equation.deserialize([["white"], ["green"]]))
+        self.assertIsNot(compiled, self.equations.compile())
+        self.assertEqual(len(self.equations.compile().trades), 2 * len(self.equations.equations))
+
+    def test_filter_equations_matches_rule_book(self):
+        """Tests that the compiled filter returns the same directed equations, in order, as RuleBook.tradable_equation."""
+        from Bazaar.Common.rule_book import RuleBook
+
+        equations = Equations.deserialize(
+            [[["red"], ["blue", "blue"]], [["green", "white"], ["red"]], [["yellow"], ["white"]]]
+        )
+        wallets = [["red", "green", "white"], ["blue", "blue", "yellow"], [], ["red"] * 4]
+        banks = [["blue", "blue", "white", "red"], ["red", "yellow"], ["white"] * 3]
+        for wallet_data in wallets:
+            for bank_data in banks:
+                wallet = PebbleCollection.deserialize(wallet_data)
+                bank = PebbleCollection.deserialize(bank_data)
+                expected = []
+                for equation in equations.equations:
+                    expected += RuleBook.tradable_equation(equation, wallet, bank)
+                result = equations.filter_equations(wallet, bank)
+                self.assertEqual([eq.serialize() for eq in result], [eq.serialize() for eq in expected])
+                self.assertTrue(all(eq.directed for eq in result))
+
 
 if __name__ == "__main__":
     unittest.main(argv=[""], exit=False)
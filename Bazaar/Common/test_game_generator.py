@@ -0,0 +1,47 @@
+import unittest
+
+from Bazaar.Common.cards import Cards
+from Bazaar.Common.data import MAX_CARDS_NUM, MAX_EQUATION_NUM
+from Bazaar.Common.equations import Equations
+from Bazaar.Common.game_generator import GameGenerator
+
+
+class TestGameGenerator(unittest.TestCase):
+
+    def setUp(self):
+        self.generator = GameGenerator(seed=42)
+
+    def test_game_is_reproducible(self):
+        """Test that a game only depends on the seed and its index."""
+        equations, cards = self.generator.game(3)
+        self.assertEqual(len(equations.equations), MAX_EQUATION_NUM)
+        self.assertEqual(len(cards.cards), MAX_CARDS_NUM)
+
+        self.generator.game(7)
+        self.assertEqual(GameGenerator(seed=42).game(3), (equations, cards))
+        self.assertNotEqual(GameGenerator(seed=43).game(3), (equations, cards))
+        self.assertNotEqual(self.generator.game(4), (equations, cards))
+
+    def test_game_matches_generate_random(self):
+        """Test that a game draws its equations, then its deck, from the game's generator."""
+        rng = self.generator.rng(0)
+        equations = Equations.generate_random(MAX_EQUATION_NUM, rng)
+        cards = Cards.generate_random(MAX_CARDS_NUM, rng)
+        self.assertEqual(self.generator.game(0), (equations, cards))
+
+    def test_equations_are_unique(self):
+        """Test that no equation appears twice in a set."""
+        for equations, _ in self.generator.stream(0, 20):
+            self.assertEqual(len(set(equations.equations)), len(equations.equations))
+
+    def test_stream(self):
+        """Test that a stream yields the games of its index range in order."""
+        games = list(GameGenerator(seed=1, equation_count=2, card_count=5).stream(2, 5))
+        self.assertEqual(len(games), 3)
+        self.assertEqual(games[0], GameGenerator(seed=1, equation_count=2, card_count=5).game(2))
+        self.assertEqual(len(games[2][0].equations), 2)
+        self.assertEqual(len(games[2][1].cards), 5)
+
+
+if __name__ == "__main__":
+    unittest.main()
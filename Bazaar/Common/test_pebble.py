@@ -22,6 +22,12 @@ class TestPebbleMethods(unittest.TestCase):
         self.assertEqual(str(blue_pebble), "b")
         self.assertEqual(str(white_pebble), "w")
 
+    def test_pebble_of(self):
+        """Test that Pebble.of hands out one shared instance per color."""
+        self.assertIs(Pebble.of("red"), Pebble.of(PebbleColor.RED))
+        self.assertEqual(Pebble.of("blue"), Pebble(color=PebbleColor.BLUE))
+        self.assertIsNot(Pebble.of("blue"), Pebble.of("green"))
+
 
 class TestPebbleCollection(unittest.TestCase):
 
@@ -111,6 +117,102 @@ class TestPebbleCollection(unittest.TestCase):
         # Case where other collection is empty
         self.assertFalse(self.collection1.subset_of(collection_empty))
 
+    def test_counts(self):
+        """Test the count vector kept alongside the pebbles of a PebbleCollection."""
+        self.assertEqual(self.collection3.counts, (1, 0, 1, 1, 0))
+        self.assertEqual(self.empty_collection.counts, (0, 0, 0, 0, 0))
+        self.assertEqual((self.collection3 - self.collection1).counts, (0, 0, 1, 0, 0))
+        self.assertEqual((self.collection1 + self.collection2).counts, (1, 0, 1, 1, 1))
+
+        collection = PebbleCollection(pebbles=tuple([self.red]))
+        collection.add_pebble(self.red)
+        self.assertEqual(collection.counts, (2, 0, 0, 0, 0))
+
+    def test_subtract_keeps_order(self):
+        """Test that subtracting removes the first matching pebbles and keeps the rest in order."""
+        collection = PebbleCollection(
+            pebbles=tuple([self.blue, self.red, self.green, self.red, self.blue])
+        )
+        result = collection - PebbleCollection(pebbles=tuple([self.red, self.blue]))
+        self.assertEqual(result.pebbles, tuple([self.green, self.red, self.blue]))
+
+    def test_from_counts(self):
+        """Test building a PebbleCollection from a count vector."""
+        collection = PebbleCollection.from_counts((1, 0, 1, 1, 0))
+        self.assertEqual(collection, self.collection3)
+        self.assertEqual(collection.serialize(), ["red", "blue", "green"])
+        self.assertEqual(PebbleCollection.from_counts((0, 0, 0, 0, 0)), self.empty_collection)
+        with self.assertRaises(ValueError):
+            PebbleCollection.from_counts((1, 2))
+        with self.assertRaises(ValueError):
+            PebbleCollection.from_counts((1, 0, 0, 0, -1))
+
+    def test_hash_ignores_order(self):
+        """Test that equal PebbleCollections hash the same regardless of pebble order."""
+        reordered = PebbleCollection(pebbles=tuple([self.blue, self.green, self.red]))
+        self.assertEqual(hash(reordered), hash(self.collection3))
+        self.assertEqual(len({reordered, self.collection3}), 1)
+
+    def test_pack(self):
+        """Test packing a PebbleCollection into an integer key and back."""
+        key = self.collection3.pack()
+        self.assertEqual(unpack_counts(key), (1, 0, 1, 1, 0))
+        self.assertEqual(PebbleCollection.from_packed(key), self.collection3)
+        reordered = PebbleCollection(pebbles=tuple([self.blue, self.green, self.red]))
+        self.assertEqual(reordered.pack(), key)
+        self.assertEqual(self.empty_collection.pack(), 0)
+        self.assertEqual(
+            pack_all([self.collection1, self.collection2]),
+            [self.collection1.pack(), self.collection2.pack()],
+        )
+        self.assertEqual(unpack_all([key, 0]), [(1, 0, 1, 1, 0), (0, 0, 0, 0, 0)])
+        self.assertEqual(pack_all([]), [])
+        self.assertEqual(unpack_all(pack_all([init_bank(), self.collection1])), [init_bank().counts, self.collection1.counts])
+        self.assertEqual(pack_rows([(MAX_PACKED_COUNT,) * 5]).tolist(), [pack_counts((MAX_PACKED_COUNT,) * 5)])
+        with self.assertRaises(ValueError):
+            pack_counts((MAX_PACKED_COUNT + 1, 0, 0, 0, 0))
+        with self.assertRaises(ValueError):
+            pack_rows([(0, 0, MAX_PACKED_COUNT + 1, 0, 0)])
+
+    def test_dominates(self):
+        """Test dominance checks on packed keys against subset_of."""
+        collections = [
+            self.empty_collection,
+            self.collection1,
+            self.collection2,
+            self.collection3,
+            PebbleCollection(pebbles=tuple([self.red, self.red])),
+            init_bank(),
+        ]
+        for collection, other in zip(collections, collections[::-1]):
+            self.assertEqual(
+                dominates(collection.pack(), other.pack()), other.subset_of(collection)
+            )
+        self.assertTrue(dominates(pack_counts((127, 0, 5, 0, 0)), pack_counts((127, 0, 4, 0, 0))))
+        self.assertFalse(dominates(pack_counts((0, 0, 5, 0, 0)), pack_counts((1, 0, 4, 0, 0))))
+
+    def test_deserialize_uses_interned_pebbles(self):
+        """Test that deserialized collections reuse the interned pebbles and still validate their input."""
+        collection = PebbleCollection.deserialize(["red", "blue", "red"])
+        self.assertEqual(collection.serialize(), ["red", "blue", "red"])
+        self.assertIs(collection.pebbles[0], collection.pebbles[2])
+        self.assertIs(collection.pebbles[1], Pebble.of("blue"))
+        with self.assertRaises(Exception):
+            PebbleCollection.deserialize(["red", "purple"])
+
+    def test_from_trusted(self):
+        """Test building a PebbleCollection without validation."""
+        collection = PebbleCollection.from_trusted(tuple([self.red, self.green, self.blue]))
+        self.assertEqual(collection, self.collection3)
+        self.assertEqual(collection.counts, (1, 0, 1, 1, 0))
+        self.assertEqual(collection.model_dump(), self.collection3.model_dump())
+        self.assertEqual(collection.model_fields_set, {"pebbles"})
+        copied = collection.model_copy()
+        self.assertEqual(copied, collection)
+        self.assertEqual(copied.counts, (1, 0, 1, 1, 0))
+        counted = PebbleCollection.from_trusted(tuple([self.red, self.red]), (2, 0, 0, 0, 0))
+        self.assertEqual(counted, PebbleCollection(pebbles=tuple([self.red, self.red])))
+
     def test_pebble_collection_list_str(self):
         """Test the __str__ method of PebbleCollection class."""
         list_allpebbles = list_of_all_pebbles()
@@ -141,6 +243,24 @@ class TestPebbleCollection(unittest.TestCase):
         self.assertTrue(smaller_collection < self.collection1)
         self.assertFalse(self.collection1 < smaller_collection)
 
+    def test_sort_key(self):
+        """Test that the cached sort key orders collections like their sizes and sorted color names do."""
+        rng = random.Random(5)
+        collections = [
+            PebbleCollection(pebbles=tuple(rng.choice(Pebble.all()) for _ in range(rng.randint(0, 6))))
+            for _ in range(60)
+        ]
+        for this in collections:
+            for other in collections:
+                by_names = (len(this.pebbles), this.__list_str__()) < (len(other.pebbles), other.__list_str__())
+                self.assertEqual(this < other, by_names)
+                self.assertEqual(this.sort_key == other.sort_key, this == other)
+
+        collection = PebbleCollection(pebbles=tuple([self.red, self.green]))
+        self.assertEqual(collection.sort_key, (2, "gr"))
+        collection.add_pebble(self.blue)
+        self.assertEqual(collection.sort_key, (3, "bgr"))
+
     def test_empty_collection(self):
         """Test that an empty PebbleCollection works as expected."""
         result = self.empty_collection + self.collection1
@@ -202,6 +322,20 @@ class TestPebbleCollection(unittest.TestCase):
         self.assertEqual(len(collection_BRRGBY.pebbles), 3)
         self.assertEqual(collection_BRRGBY, collection_GBY)
 
+    def test_draw_pebble_keeps_bank_in_color_order(self):
+        bank = PebbleCollection.deserialize(["yellow", "green", "red", "white", "green"])
+        self.assertEqual(bank.draw_pebble(), Pebble(color=PebbleColor.RED))
+        self.assertEqual(bank.serialize(), ["white", "green", "green", "yellow"])
+        bank.add_pebble(Pebble(color=PebbleColor.BLUE))
+        self.assertEqual(bank.draw_pebble(), Pebble(color=PebbleColor.WHITE))
+        self.assertEqual(bank.serialize(), ["blue", "green", "green", "yellow"])
+        self.assertEqual(bank.counts, (0, 0, 1, 2, 1))
+
+        full_bank = init_bank()
+        drawn = [full_bank.draw_pebble().color for _ in range(100)]
+        self.assertEqual(drawn, [color.value for color in PebbleColor for _ in range(20)])
+        self.assertIsNone(full_bank.draw_pebble())
+
     def test_init_bank(self):
         bank = init_bank()
         self.assertEqual(len(bank.pebbles), 100)
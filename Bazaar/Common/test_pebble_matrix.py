@@ -0,0 +1,84 @@
+import unittest
+
+import numpy as np
+from pydantic import ValidationError
+
+from Bazaar.Common.cards import Card
+from Bazaar.Common.equations import Equation
+from Bazaar.Common.pebble import PebbleCollection, init_bank
+from Bazaar.Common.pebble_matrix import PebbleMatrix
+from Bazaar.Common.rule_book import RuleBook
+
+
+class TestPebbleMatrix(unittest.TestCase):
+
+    def setUp(self):
+        self.wallets = [
+            PebbleCollection.deserialize(["red", "red", "blue", "green", "green", "yellow"]),
+            PebbleCollection.deserialize(["white", "blue"]),
+            PebbleCollection.deserialize([]),
+            PebbleCollection.deserialize(["red", "white", "blue", "green", "yellow", "yellow"]),
+        ]
+        self.matrix = PebbleMatrix.from_collections(self.wallets)
+        self.cards = [
+            Card.deserialize({"pebbles": ["red", "red", "blue", "green", "green"], "face?": True}),
+            Card.deserialize({"pebbles": ["red", "white", "blue", "green", "yellow"], "face?": False}),
+        ]
+        self.equation = Equation.deserialize([["red", "red"], ["white"]])
+
+    def test_round_trip(self):
+        """Test converting collections into a matrix and back."""
+        self.assertEqual(self.matrix.counts.shape, (4, 5))
+        self.assertEqual(self.matrix.to_collections(), self.wallets)
+        self.assertEqual(self.matrix.pack(), [wallet.pack() for wallet in self.wallets])
+        self.assertEqual(list(self.matrix.sizes()), [6, 2, 0, 6])
+        self.assertEqual(len(PebbleMatrix.repeat(init_bank(), 3)), 3)
+
+    def test_invalid_shape(self):
+        """Test that counts must be an N x 5 array of non-negative counts."""
+        with self.assertRaises(ValidationError):
+            PebbleMatrix(counts=np.zeros((2, 4), dtype=np.int64))
+        with self.assertRaises(ValidationError):
+            PebbleMatrix(counts=-np.ones((2, 5), dtype=np.int64))
+
+    def test_contains(self):
+        """Test the batched subset check against subset_of."""
+        sides = [self.equation.lhs, self.equation.rhs] + [card.pebbles for card in self.cards]
+        result = self.matrix.contains(sides)
+        self.assertEqual(result.shape, (4, 4))
+        for row, wallet in enumerate(self.wallets):
+            for column, side in enumerate(sides):
+                self.assertEqual(result[row, column], side.subset_of(wallet))
+        self.assertTrue((self.matrix.contains(self.cards) == result[:, 2:]).all())
+
+    def test_trade(self):
+        """Test trading both directions of an equation on every row."""
+        bank = PebbleMatrix.from_collections([init_bank()])
+        wallets, banks, traded = self.matrix.trade(self.equation, bank)
+        self.assertEqual(list(traded), [True, False, False, False])
+        expected_wallet, expected_bank = Equation(
+            lhs=self.equation.lhs, rhs=self.equation.rhs, directed=True
+        ).trade_equation(self.wallets[0], init_bank())
+        self.assertEqual(wallets.to_collections()[0], expected_wallet)
+        self.assertEqual(banks.to_collections()[0], expected_bank)
+        self.assertEqual(wallets.to_collections()[1:], self.wallets[1:])
+        self.assertEqual(banks.to_collections()[1], init_bank())
+
+        _, _, traded = self.matrix.trade(self.equation, bank, left_to_right=False)
+        self.assertEqual(list(traded), [False, True, False, True])
+
+        empty_bank = PebbleMatrix.from_collections([PebbleCollection()])
+        _, _, traded = self.matrix.trade(self.equation, empty_bank)
+        self.assertFalse(traded.any())
+
+    def test_score_if_bought(self):
+        """Test the batched score against RuleBook.score_if_bought."""
+        result = self.matrix.score_if_bought(self.cards)
+        self.assertEqual(result.shape, (4, 2))
+        for row, wallet in enumerate(self.wallets):
+            for column, card in enumerate(self.cards):
+                self.assertEqual(result[row, column], RuleBook.score_if_bought(card, wallet))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+from Bazaar.Common.equations import Equation, Equations
+from Bazaar.Common.pebble import PebbleCollection
+from Bazaar.Common.search_state import SearchState
+
+
+class TestSearchState(unittest.TestCase):
+
+    def setUp(self):
+        self.trades = Equations(
+            equations=[
+                Equation.deserialize([["red"], ["blue"]]),
+                Equation.deserialize([["blue", "blue"], ["green", "yellow"]]),
+            ]
+        ).compile().trades
+        self.state = SearchState.start((2, 0, 1, 0, 0), (1, 1, 1, 1, 1))
+
+    def test_trades_are_undone_in_reverse_order(self):
+        """Test that trades change the wallet and bank in place and that undoing them restores both."""
+        key = self.state.key
+        red_to_blue = next(index for index, trade in enumerate(self.trades) if trade.give == (1, 0, 0, 0, 0))
+        blues_away = next(index for index, trade in enumerate(self.trades) if trade.give == (0, 0, 2, 0, 0))
+
+        self.assertFalse(self.state.apply_trade(blues_away, self.trades[blues_away]))
+        self.assertTrue(self.state.apply_trade(red_to_blue, self.trades[red_to_blue]))
+        self.assertTrue(self.state.apply_trade(blues_away, self.trades[blues_away]))
+        self.assertEqual(self.state.wallet_counts(), (1, 0, 0, 1, 1))
+        self.assertEqual(self.state.bank_counts(), (2, 1, 2, 0, 0))
+        self.assertEqual(self.state.key, PebbleCollection.from_counts((1, 0, 0, 1, 1)).pack())
+        self.assertEqual(self.state.path(), (red_to_blue, blues_away))
+
+        self.state.undo_trade()
+        self.assertEqual(self.state.wallet_counts(), (1, 0, 2, 0, 0))
+        self.state.undo_trade()
+        self.assertEqual(self.state.wallet_counts(), (2, 0, 1, 0, 0))
+        self.assertEqual(self.state.bank_counts(), (1, 1, 1, 1, 1))
+        self.assertEqual(self.state.key, key)
+        self.assertEqual(self.state.path(), ())
+        self.assertEqual(self.state.log, [])
+
+    def test_purchases_share_the_trail(self):
+        """Test that purchases pay the bank, that the wallet key follows the wallet, and that paths share parents."""
+        self.assertFalse(self.state.apply_purchase(0, (0, 0, 2, 0, 0)))
+        self.assertTrue(self.state.apply_purchase(3, (1, 0, 1, 0, 0)))
+        parent = self.state.trail
+        self.assertTrue(self.state.apply_purchase(1, (1, 0, 0, 0, 0)))
+        self.assertIs(self.state.trail[1], parent)
+        self.assertEqual(self.state.path(), (3, 1))
+        self.assertEqual(self.state.wallet_counts(), (0, 0, 0, 0, 0))
+        self.assertEqual(self.state.bank_counts(), (3, 1, 2, 1, 1))
+        self.assertEqual(self.state.key, SearchState.start((0, 0, 0, 0, 0), ()).key)
+        self.assertEqual(self.state.key, PebbleCollection().pack())
+
+        self.state.undo_purchase()
+        self.assertEqual(self.state.key, SearchState.start((1, 0, 0, 0, 0), ()).key)
+        self.assertIs(self.state.trail, parent)
+
+
+if __name__ == "__main__":
+    unittest.main()
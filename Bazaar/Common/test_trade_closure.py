@@ -0,0 +1,119 @@
+import sys
+import unittest
+from copy import copy
+
+from Bazaar.Common.equations import Equation, Equations
+from Bazaar.Common.pebble import PebbleCollection, init_bank
+from Bazaar.Common.trade_closure import ReachableCache
+
+
+class TestTradeClosure(unittest.TestCase):
+
+    def setUp(self):
+        self.equations = Equations(
+            equations=[
+                Equation.deserialize([["red", "red"], ["white"]]),
+                Equation.deserialize([["white"], ["blue", "green"]]),
+            ]
+        )
+        self.closure = self.equations.compile().closure
+        self.wallet = PebbleCollection.deserialize(["red", "red", "yellow"])
+
+    def test_closure_is_shared(self):
+        """Test that copies of the equations share one closure."""
+        self.assertIs(copy(self.equations).compile().closure, self.closure)
+
+    def test_reachable(self):
+        """Test the wallets reachable from a state and the trade paths kept for them."""
+        reached = self.closure.reachable(self.wallet.counts, init_bank().counts)
+        self.assertEqual(
+            reached,
+            (
+                ((0, 1, 0, 0, 1), (0,)),
+                ((0, 0, 1, 1, 1), (0, 2)),
+            ),
+        )
+        self.assertEqual(self.closure.trades[0].equation, self.equations.equations[0])
+
+    def test_reachable_breaks_ties_like_less_pebble_exchange(self):
+        """Test which of two shortest paths to a wallet is kept."""
+        equations = Equations(
+            equations=[
+                Equation.deserialize([["red"], ["blue"]]),
+                Equation.deserialize([["white"], ["green"]]),
+            ]
+        )
+        closure = equations.compile().closure
+        wallet = PebbleCollection.deserialize(["red", "white"])
+        reached = dict(closure.reachable(wallet.counts, init_bank().counts))
+
+        self.assertEqual(reached[(0, 1, 1, 0, 0)], (0,))
+        self.assertEqual(reached[(1, 0, 0, 1, 0)], (2,))
+        # (2, 0) comes after (0, 2), and its second trade is less than the one of (0, 2)
+        self.assertEqual(reached[(0, 0, 1, 1, 0)], (2, 0))
+        self.assertNotIn(wallet.counts, reached)
+
+    def test_reachable_clamps_bank(self):
+        """Test that banks larger than any sequence can use share an entry, and that small banks limit trades."""
+        cache = ReachableCache()
+        self.closure.reachable(self.wallet.counts, init_bank().counts, cache)
+        self.closure.reachable(self.wallet.counts, (20, 4, 20, 20, 20), cache)
+        self.assertEqual(cache.stats(), {"entries": 1, "hits": 1, "misses": 1, "evictions": 0})
+
+        no_white = (20, 0, 20, 20, 20)
+        self.assertEqual(self.closure.reachable(self.wallet.counts, no_white), ())
+
+    def test_cache_is_shared_across_equal_tables(self):
+        """Test that closures of equal equation sets share cached results."""
+        cache = ReachableCache()
+        other = copy(self.equations.equations)
+        other_closure = Equations(equations=other).compile().closure
+        self.assertIsNot(other_closure, self.closure)
+
+        self.closure.reachable(self.wallet.counts, init_bank().counts, cache)
+        other_closure.reachable(self.wallet.counts, init_bank().counts, cache)
+        self.assertEqual(cache.hits, 1)
+
+    def test_cache_evicts_least_recently_used(self):
+        """Test the bound, the counters and exporting entries to another cache."""
+        cache = ReachableCache(max_entries=2)
+        cache.put("a", ())
+        cache.put("b", ())
+        self.assertEqual(cache.get("a"), ())
+        cache.put("c", ())
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.stats(), {"entries": 2, "hits": 1, "misses": 1, "evictions": 1})
+
+        copied = ReachableCache()
+        copied.load(cache.export())
+        self.assertEqual(list(copied.entries), ["a", "c"])
+        self.assertEqual(copied.stats()["evictions"], 0)
+        cache.clear()
+        self.assertEqual(cache.stats(), {"entries": 0, "hits": 0, "misses": 0, "evictions": 0})
+
+    def test_cache_size_bytes(self):
+        """Test that the size estimate grows with the entries and counts values shared by entries once."""
+        cache = ReachableCache()
+        empty = cache.size_bytes()
+        reached = (((1, 0, 0, 0, 0), (0,)), ((0, 1, 0, 0, 0), (1, 0)))
+        cache.put("a", reached)
+        one, table = cache.size_bytes(), sys.getsizeof(cache.entries)
+        self.assertGreater(one, empty)
+        cache.put("b", reached)
+        self.assertEqual(cache.size_bytes() - one, sys.getsizeof("b") + sys.getsizeof(cache.entries) - table)
+
+    def test_follow(self):
+        """Test applying rules to a state."""
+        rules = [
+            Equation.deserialize([["red", "red"], ["white"]], True),
+            Equation.deserialize([["white"], ["blue", "green"]], True),
+        ]
+        self.assertEqual(
+            self.closure.follow(self.wallet.counts, init_bank().counts, rules),
+            ((0, 0, 1, 1, 1), (22, 20, 19, 19, 20)),
+        )
+        self.assertIsNone(self.closure.follow(self.wallet.counts, init_bank().counts, rules[::-1]))
+
+
+if __name__ == "__main__":
+    unittest.main()
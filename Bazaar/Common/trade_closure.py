@@ -0,0 +1,359 @@
+import sys
+from functools import cached_property
+from typing import Dict, Hashable, List, Optional, OrderedDict, Tuple
+
+from pydantic import BaseModel, Field
+
+from Bazaar.Common.data import MAX_EXCHANGE_DEPTH
+from Bazaar.Common.equations import DirectedTrade, Equation
+
+Counts = Tuple[int, ...]
+Path = Tuple[int, ...]
+Reached = Tuple[Tuple[Counts, Path], ...]
+
+DEFAULT_CACHE_ENTRIES = 1024
+
+
+class ReachableCache(BaseModel):
+    """
+    Bounded least-recently-used cache of TradeClosure search results.
+    Keys combine the trade table with the (wallet, clamped bank) state, so one cache can serve any number of games,
+    and games played with the same equations share entries. Keys and values are plain tuples of integers,
+    so entries can be exported to (or loaded from) other processes.
+
+    :param max_entries: number of results kept before the least recently used one is evicted
+    :type max_entries: int
+    :param hits: number of lookups answered from the cache
+    :type hits: int
+    :param misses: number of lookups that had to search
+    :type misses: int
+    :param evictions: number of results dropped to stay within max_entries
+    :type evictions: int
+    :param entries: cached results, least recently used first
+    :type entries: OrderedDict[Hashable, Reached]
+    """
+
+    max_entries: int = DEFAULT_CACHE_ENTRIES
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    entries: OrderedDict[Hashable, Reached] = Field(default_factory=OrderedDict)
+
+    def get(self, key: Hashable) -> Optional[Reached]:
+        """
+        Looks up a result and marks it as most recently used.
+
+        :param key: key of the result
+        :type key: Hashable
+        :return: the cached result, None if it is not cached
+        :rtype: Optional[Reached]
+        """
+        reached = self.entries.get(key)
+        if reached is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return reached
+
+    def put(self, key: Hashable, reached: Reached) -> None:
+        """
+        Stores a result, evicting the least recently used ones if the cache is full.
+
+        :param key: key of the result
+        :type key: Hashable
+        :param reached: result to store
+        :type reached: Reached
+        """
+        self.entries[key] = reached
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the counters of this cache.
+
+        :return: number of entries, hits, misses and evictions
+        :rtype: Dict[str, int]
+        """
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def size_bytes(self) -> int:
+        """
+        Estimates the memory the entries of this cache take: the table itself and every key and value in it,
+        nested tuples included. Objects shared between entries (e.g. small ints or the trade table of a key)
+        are counted once.
+
+        :return: estimated size of the entries, in bytes
+        :rtype: int
+        """
+        seen = set()
+        return sys.getsizeof(self.entries) + sum(
+            _deep_size(key, seen) + _deep_size(value, seen) for key, value in self.entries.items()
+        )
+
+    def export(self) -> List[Tuple[Hashable, Reached]]:
+        """
+        Returns all entries, least recently used first, e.g. to seed the cache of a worker process.
+
+        :return: list of (key, result) pairs
+        :rtype: List[Tuple[Hashable, Reached]]
+        """
+        return list(self.entries.items())
+
+    def load(self, entries: List[Tuple[Hashable, Reached]]) -> None:
+        """
+        Adds exported entries to this cache without touching the counters.
+
+        :param entries: (key, result) pairs as returned by export
+        :type entries: List[Tuple[Hashable, Reached]]
+        """
+        evictions = self.evictions
+        for key, reached in entries:
+            self.put(key, reached)
+        self.evictions = evictions
+
+    def clear(self) -> None:
+        """
+        Drops all entries and resets the counters.
+        """
+        self.entries.clear()
+        self.hits = self.misses = self.evictions = 0
+
+
+def _deep_size(value, seen: set) -> int:
+    """
+    Returns the size of a value and of the tuples, lists and sets it holds, skipping the objects in seen
+    and adding the ones counted to it.
+    """
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, (tuple, list, set, frozenset)):
+        size += sum(_deep_size(item, seen) for item in value)
+    return size
+
+
+SHARED_REACHABLE_CACHE = ReachableCache()
+
+
+class TradeClosure(BaseModel):
+    """
+    Lazily populated closure of the trade graph of one game. For a (wallet, bank) state it records every wallet
+    reachable within depth trades, together with the trade sequence all_possible_exchanges keeps for it.
+    States are keyed by count vectors, with the bank clamped to the most any depth-long sequence can take out of it,
+    so states that only differ in a large bank share one entry. The closure is built once per set of equations
+    (see CompiledEquations.closure) and shared by every in-process player and the referee; its results live in
+    a ReachableCache.
+
+    :param trades: directed trades of the game, in CompiledEquations order
+    :type trades: Tuple[DirectedTrade, ...]
+    :param depth: maximum number of trades in a sequence
+    :type depth: int
+    :param cache: cache of search results used when reachable is not given one, the process-wide cache by default
+    :type cache: ReachableCache
+    """
+
+    trades: Tuple[DirectedTrade, ...]
+    depth: int = MAX_EXCHANGE_DEPTH
+    cache: ReachableCache = Field(default_factory=lambda: SHARED_REACHABLE_CACHE)
+
+    @cached_property
+    def key(self) -> Tuple:
+        """
+        Key of the trade table: the depth and the (given, received) count vectors of every trade, in order.
+        Closures with equal keys find the same results.
+
+        :return: key of this closure
+        :rtype: Tuple
+        """
+        return (self.depth, tuple((trade.give, trade.receive) for trade in self.trades))
+
+    @cached_property
+    def bank_caps(self) -> Counts:
+        """
+        Per color, the number of bank pebbles above which every trade of a depth-long sequence is affordable
+        by the bank. Bank counts above the cap behave exactly like the cap.
+
+        :return: cap of every color in (red, white, blue, green, yellow) order
+        :rtype: Tuple[int, ...]
+        """
+        caps = [0] * len(self.trades[0].receive) if self.trades else []
+        for trade in self.trades:
+            caps = [max(cap, needed) for cap, needed in zip(caps, trade.receive)]
+        return tuple(cap * self.depth for cap in caps)
+
+    @cached_property
+    def trade_index(self) -> Dict[Tuple[Counts, Counts], int]:
+        """
+        Index of every directed trade by its (given, received) count vectors.
+
+        :return: mapping from the sides of a directed trade to its position in trades
+        :rtype: Dict[Tuple[Counts, Counts], int]
+        """
+        return {(trade.give, trade.receive): index for index, trade in enumerate(self.trades)}
+
+    @cached_property
+    def precedes(self) -> Tuple[Tuple[bool, ...], ...]:
+        """
+        Table of Equation.__lt__ between the directed equations of all trades, used to compare trade paths.
+
+        :return: table whose [i][j] entry is True if the equation of trade i is less than the one of trade j
+        :rtype: Tuple[Tuple[bool, ...], ...]
+        """
+        return tuple(
+            tuple(this.equation < other.equation for other in self.trades) for this in self.trades
+        )
+
+    def clamp(self, bank_counts: Counts) -> Counts:
+        """
+        Clamps a bank count vector to the bank caps.
+
+        :param bank_counts: count vector of the bank
+        :type bank_counts: Tuple[int, ...]
+        :return: clamped count vector
+        :rtype: Tuple[int, ...]
+        """
+        if not self.trades:
+            return ()
+        return tuple(min(count, cap) for count, cap in zip(bank_counts, self.bank_caps))
+
+    def successors(self, wallet_counts: Counts, bank_counts: Counts) -> List[Tuple[int, Counts, Counts]]:
+        """
+        Returns the states one trade away from the given state, in trade table order.
+
+        :param wallet_counts: count vector of the wallet
+        :type wallet_counts: Tuple[int, ...]
+        :param bank_counts: count vector of the bank
+        :type bank_counts: Tuple[int, ...]
+        :return: index of the trade made, wallet counts and bank counts after it
+        :rtype: List[Tuple[int, Tuple[int, ...], Tuple[int, ...]]]
+        """
+        next_states = []
+        for index, trade in enumerate(self.trades):
+            if trade.allowed(wallet_counts, bank_counts):
+                next_states.append(
+                    (
+                        index,
+                        tuple(count + change for count, change in zip(wallet_counts, trade.delta)),
+                        tuple(count - change for count, change in zip(bank_counts, trade.delta)),
+                    )
+                )
+        return next_states
+
+    def reachable(
+        self, wallet_counts: Counts, bank_counts: Counts, cache: Optional[ReachableCache] = None
+    ) -> Reached:
+        """
+        Returns every wallet reachable from the given state with one to depth trades, in the order
+        all_possible_exchanges lists them, together with the trade path kept for each wallet.
+        Results are cached per (trade table, wallet, clamped bank).
+
+        :param wallet_counts: count vector of the wallet
+        :type wallet_counts: Tuple[int, ...]
+        :param bank_counts: count vector of the bank
+        :type bank_counts: Tuple[int, ...]
+        :param cache: cache to use instead of the one of this closure
+        :type cache: Optional[ReachableCache]
+        :return: reached wallet counts and indices of the trades leading there
+        :rtype: Tuple[Tuple[Tuple[int, ...], Tuple[int, ...]], ...]
+        """
+        if cache is None:
+            cache = self.cache
+        state = (wallet_counts, self.clamp(bank_counts))
+        key = (self.key, state)
+        reached = cache.get(key)
+        if reached is None:
+            reached = self.__search(*state)
+            cache.put(key, reached)
+        return reached
+
+    def __search(self, wallet_counts: Counts, bank_counts: Counts) -> Tuple[Tuple[Counts, Path], ...]:
+        """
+        Breadth-first search over wallets, with a table from every wallet found to its distance from the start.
+        The bank never needs to be tracked per path: trades only move pebbles between wallet and bank, so the bank
+        at a wallet is the start bank minus whatever the wallet gained.
+
+        The result is the one the depth-first exchange search used to produce. That search kept, for every wallet,
+        the last of its shortest paths (taken in depth-first order, i.e. sorted) that Exchange.less_pebble_exchange
+        preferred over the path kept so far, and listed the wallets in depth-first order of their kept paths.
+        So each layer collects all shortest paths of its wallets, folds them the same way, and the result is
+        sorted by kept path.
+        """
+        distances = {wallet_counts: 0}
+        frontier = {wallet_counts: [()]}
+        kept = []
+        for distance in range(1, self.depth + 1):
+            reached = {}
+            for wallet, paths in frontier.items():
+                bank = tuple(
+                    count - (now - start) for count, now, start in zip(bank_counts, wallet, wallet_counts)
+                )
+                for index, next_wallet, _ in self.successors(wallet, bank):
+                    if next_wallet in distances:
+                        continue
+                    next_paths = reached.setdefault(next_wallet, [])
+                    next_paths.extend(path + (index,) for path in paths)
+            for next_wallet, paths in reached.items():
+                paths.sort()
+                best = paths[0]
+                for path in paths[1:]:
+                    if self.__less_path(path, best):
+                        best = path
+                distances[next_wallet] = distance
+                kept.append((next_wallet, best))
+            frontier = reached
+        kept.sort(key=lambda entry: entry[1])
+        return tuple(kept)
+
+    def __less_path(self, path: Path, other: Path) -> bool:
+        """
+        Exchange.less_pebble_exchange on trade paths of the same length.
+        """
+        if len(path) == len(other):
+            for index, other_index in zip(path, other):
+                if self.precedes[index][other_index]:
+                    return True
+        return len(path) < len(other)
+
+    def follow(
+        self, wallet_counts: Counts, bank_counts: Counts, rules: List[Equation]
+    ) -> Optional[Tuple[Counts, Counts]]:
+        """
+        Applies the given rules in order to a state, checking each against the wallet and bank it meets.
+        A directed rule trades its left-hand side for its right-hand side; an undirected rule only needs one of its
+        directions to be allowed and, like Equation.trade_equation, leaves the state unchanged.
+
+        :param wallet_counts: count vector of the wallet
+        :type wallet_counts: Tuple[int, ...]
+        :param bank_counts: count vector of the bank
+        :type bank_counts: Tuple[int, ...]
+        :param rules: equations of the game to apply
+        :type rules: List[Equation]
+        :return: wallet and bank counts after the rules, None if any rule cannot be made
+        :rtype: Optional[Tuple[Tuple[int, ...], Tuple[int, ...]]]
+        """
+        for rule in rules:
+            forward = self.trade_index.get((rule.lhs.counts, rule.rhs.counts))
+            if rule.directed:
+                if forward is None or not self.trades[forward].allowed(wallet_counts, bank_counts):
+                    return None
+                delta = self.trades[forward].delta
+                wallet_counts = tuple(count + change for count, change in zip(wallet_counts, delta))
+                bank_counts = tuple(count - change for count, change in zip(bank_counts, delta))
+            else:
+                backward = self.trade_index.get((rule.rhs.counts, rule.lhs.counts))
+                if not any(
+                    index is not None and self.trades[index].allowed(wallet_counts, bank_counts)
+                    for index in (forward, backward)
+                ):
+                    return None
+        return wallet_counts, bank_counts
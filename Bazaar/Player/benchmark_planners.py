@@ -0,0 +1,41 @@
+import random
+import sys
+import time
+from typing import Optional, Tuple
+
+from Bazaar.Player.mechanism import Mechanism
+from Bazaar.Referee.referee import Referee
+
+
+def play(policy: str, seed: int, search_nodes: Optional[int] = None) -> Tuple[bool, float]:
+    """
+    Plays one seeded game of a player of the given policy against three purchase-points players.
+    The player sits in a different seat for every seed, and the other players and the game are the same for a seed.
+
+    :return: whether the player won (ties win) and the seconds the game took
+    """
+    random.seed(seed)
+    players = [Mechanism(name=f"greedy{index}", policy="purchase-points") for index in range(3)]
+    players.insert(seed % 4, Mechanism(name="tested", policy=policy, search_nodes=search_nodes))
+    start = time.perf_counter()
+    winners, _ = Referee(rng=random.Random(seed)).execute_game(players=players)
+    return any(winner.actor.name == "tested" for winner in winners), time.perf_counter() - start
+
+
+def main(games: int = 20, playouts: int = 200) -> None:
+    """
+    Plays the same games with a purchase-points, a purchase-mcts and a purchase-expectimax player in the same seat,
+    and compares their wins and the time the games took. The expectimax player keeps the deadline of its policy.
+    Run with ``python3 -m Bazaar.Player.benchmark_planners [games] [playouts]``.
+    """
+    for policy, search_nodes in (("purchase-points", None), ("purchase-mcts", playouts), ("purchase-expectimax", None)):
+        wins = seconds = 0
+        for seed in range(games):
+            won, elapsed = play(policy, seed, search_nodes)
+            wins += won
+            seconds += elapsed
+        print(f"{policy}: {wins}/{games} games won, {seconds / games:.2f} s per game")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,102 @@
+import random
+import sys
+import time
+from typing import List, Tuple
+
+from Bazaar.Common.cards import Card, Cards
+from Bazaar.Common.equations import Equations
+from Bazaar.Common.pebble import Pebble, PebbleCollection
+from Bazaar.Common.turn_state import TurnState
+from Bazaar.Player.exchanges import Exchange, all_possible_exchanges
+from Bazaar.Player.purchases import PurchaseSequence
+from Bazaar.Player.strategy import Strategy
+
+Candidate = Tuple[Exchange, PurchaseSequence]
+
+
+def filter_passes(candidates: List[Candidate]) -> Candidate:
+    """
+    The tie-break as it was before the keys: repeated filter passes that compute each criterion again per pass,
+    with is_purchasable copying the sequence once per card for the remaining pebbles.
+    """
+    fewest = min(len(exchange.pebble_exchanges) for exchange, _ in candidates)
+    candidates = [candidate for candidate in candidates if len(candidate[0].pebble_exchanges) == fewest]
+    while len(candidates) > 1:
+        scores = [sequence.get_purchase_sequence_score(exchange.wallet) for exchange, sequence in candidates]
+        best_score = max(scores)
+        candidates = [candidate for candidate, score in zip(candidates, scores) if score == best_score]
+        if len(candidates) == 1:
+            break
+        remaining = []
+        for exchange, sequence in candidates:
+            own = sequence.model_copy(update={"sequence": Cards(cards=list(sequence.sequence.cards))})
+            remaining.append(len(own.get_purchase_sequence_remaining_pebbles(exchange.wallet).pebbles))
+        most_left = max(remaining)
+        candidates = [candidate for candidate, left in zip(candidates, remaining) if left == most_left]
+        if len(candidates) == 1:
+            break
+        smallest = candidates[0][0].wallet
+        kept = []
+        for exchange, sequence in candidates:
+            if exchange.wallet == smallest:
+                kept.append((exchange, sequence))
+            elif exchange.wallet < smallest:
+                smallest = exchange.wallet
+                kept = [(exchange, sequence)]
+        candidates = kept
+    return candidates[0]
+
+
+def random_turn(rng: random.Random) -> Tuple[Strategy, List[Candidate]]:
+    """
+    Builds a random turn and pairs every exchange of it with its best purchase.
+    The cards show no faces, so more exchanges tie on points and the later tie-breaks run.
+    """
+    equations = Equations.generate_random(rng.randint(3, 10), rng)
+    wallet = PebbleCollection(pebbles=[rng.choice(Pebble.all()) for _ in range(rng.randint(4, 10))])
+    bank = PebbleCollection(pebbles=[rng.choice(Pebble.all()) for _ in range(rng.randint(10, 20))])
+    cards = Cards(
+        cards=[
+            Card(pebbles=PebbleCollection(pebbles=[rng.choice(Pebble.all()) for _ in range(5)]), happy_face=False)
+            for _ in range(4)
+        ]
+    )
+    turn_state = TurnState(
+        bank=bank, active_player_wallet=wallet, active_player_score=0, player_scores=[], cards=cards
+    )
+    strategy = Strategy(equations=equations, turn_state=turn_state, policy="purchase-points")
+    candidates = [
+        (exchange, strategy.best_purchase(exchange.bank, cards, exchange.wallet))
+        for exchange in all_possible_exchanges(equations, wallet, bank).exchanges
+    ]
+    return strategy, candidates
+
+
+def main(turns: int = 200, seed: int = 0) -> None:
+    """
+    Times the filter passes against the keyed tie-break on the same random turns and checks they pick the same winner.
+    Run with ``python3 -m Bazaar.Player.benchmark_tie_break [turns] [seed]``.
+    """
+    rng = random.Random(seed)
+    passes_time = keys_time = 0.0
+    compared = 0
+    for _ in range(turns):
+        strategy, candidates = random_turn(rng)
+        if not candidates:
+            continue
+        start = time.perf_counter()
+        expected = filter_passes(candidates)
+        passes_time += time.perf_counter() - start
+        start = time.perf_counter()
+        winner = strategy.tie_break_exchange_and_purchase(candidates)
+        keys_time += time.perf_counter() - start
+        assert winner[0].pebble_exchanges == expected[0].pebble_exchanges
+        compared += 1
+    print(f"turns compared: {compared}")
+    print(f"filter passes: {passes_time * 1000:.1f} ms")
+    print(f"keys: {keys_time * 1000:.1f} ms")
+    print(f"speedup: {passes_time / keys_time:.2f}x")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,86 @@
+import time
+from typing import Dict, Optional
+
+from pydantic import BaseModel
+
+
+class SearchBudget(BaseModel):
+    """
+    Limits how much work one search may do, by wall-clock time, by number of nodes, or both.
+    A node is one exchange whose best purchase was evaluated. The budget also records how much of it was used.
+
+    :param seconds: wall-clock time the search may take, None for no limit
+    :type seconds: Optional[float]
+    :param max_nodes: number of nodes the search may evaluate, None for no limit
+    :type max_nodes: Optional[int]
+    :param started: time.monotonic() value when the search started
+    :type started: float
+    :param nodes: number of nodes evaluated so far
+    :type nodes: int
+    :param depth_completed: deepest exchange depth the search evaluated completely
+    :type depth_completed: int
+    :param exhausted: True if the search stopped because the budget ran out
+    :type exhausted: bool
+    """
+
+    seconds: Optional[float] = None
+    max_nodes: Optional[int] = None
+    started: float = 0.0
+    nodes: int = 0
+    depth_completed: int = 0
+    exhausted: bool = False
+
+    def start(self) -> "SearchBudget":
+        """
+        Starts the clock and resets the usage of this budget.
+
+        :return: this budget
+        :rtype: SearchBudget
+        """
+        self.started = time.monotonic()
+        self.nodes = 0
+        self.depth_completed = 0
+        self.exhausted = False
+        return self
+
+    def elapsed(self) -> float:
+        """
+        Returns the number of seconds since the budget was started.
+
+        :return: elapsed wall-clock time
+        :rtype: float
+        """
+        return time.monotonic() - self.started
+
+    def spend(self) -> bool:
+        """
+        Checks whether another node may be evaluated and, if so, counts it.
+        Once the budget has run out, it stays exhausted until started again.
+
+        :return: True if the node may be evaluated, False if the budget is exhausted
+        :rtype: bool
+        """
+        if not self.exhausted:
+            out_of_nodes = self.max_nodes is not None and self.nodes >= self.max_nodes
+            out_of_time = self.seconds is not None and self.elapsed() >= self.seconds
+            self.exhausted = out_of_nodes or out_of_time
+        if self.exhausted:
+            return False
+        self.nodes += 1
+        return True
+
+    def report(self) -> Dict[str, object]:
+        """
+        Returns the limits and the usage of this budget, e.g. to tune house players for a machine.
+
+        :return: limits, nodes evaluated, deepest completed depth, elapsed time and whether the budget ran out
+        :rtype: Dict[str, object]
+        """
+        return {
+            "seconds": self.seconds,
+            "max_nodes": self.max_nodes,
+            "nodes": self.nodes,
+            "depth_completed": self.depth_completed,
+            "elapsed": self.elapsed(),
+            "exhausted": self.exhausted,
+        }
@@ -8,6 +8,7 @@ from Bazaar.Common.data import MAX_EXCHANGE_DEPTH
 from Bazaar.Common.equations import Equation, Equations
 from Bazaar.Common.cards import Cards, Card
 from Bazaar.Common.pebble import PebbleCollection
+from Bazaar.Common.trade_closure import ReachableCache
 
 MAX_EXCHANGE_DEPTH = 4
 
@@ -178,76 +179,47 @@ class Exchanges(BaseModel):
         self.exchanges = [exchange for exchange in self.exchanges if exchange.pebble_exchanges]
 
 def all_possible_exchanges(
-    equations: Equations, wallet: PebbleCollection, bank: PebbleCollection
+    equations: Equations,
+    wallet: PebbleCollection,
+    bank: PebbleCollection,
+    cache: Optional[ReachableCache] = None,
 ) -> Exchanges:
     """
     Return an Exchanges instance contains all possible exchanges the pass in wallet could make
     that up to exchange of four equations.
+    Each reachable wallet appears once, with one of its shortest trade sequences (ties are broken with
+    Exchange.less_pebble_exchange). The wallets come from the breadth-first search of the game's shared
+    TradeClosure, so each state is only searched once per game.
 
     :param equations: the available equations  for exchange
     :param wallet: current wallet of player
     :param bank: current bank
+    :param cache: cache of search results, the process-wide cache if not given
     :return : an exchange contain all possible exchanges
     :rtype: Exchanges
     """
 
-    initial_exchange = Exchange(wallet=wallet, bank=bank, pebble_exchanges=[])
+    compiled = equations.compile()
+    replayed = {(): Exchange(wallet=wallet, bank=bank, pebble_exchanges=[])}
     explored = Exchanges()
-    explored.put(initial_exchange)
-
-    exchange_search(initial_exchange, equations,explored)
-
-    explored.remove_empty_sequences()
+    for _, path in compiled.closure.reachable(wallet.counts, bank.counts, cache):
+        explored.put(replay_trades(compiled.trades, path, replayed))
     return explored
 
-def exchange_search(current_exchange:Exchange, equations: Equations, explored:Exchanges):
-    """
-    run a search
-
-    :param current_exchange:
-    :param equations:
-    :param explored:
-    :return:
-    """
-
-    if len(current_exchange.pebble_exchanges) >= MAX_EXCHANGE_DEPTH:
-        return
-    possible_exchanges = current_exchange.possible_next_exchange(equations)
-    if len(possible_exchanges) == 0:
-        return
-    for next_exchange in possible_exchanges:
-        add_if_better(explored,next_exchange)
-        exchange_search(next_exchange,equations,explored)
-
-def add_if_better(explored:Exchanges, new_exchange: Exchange):
-    """
-    add if the explored does not have the wallet, or pebble exchange of this exchange is less than the pebble_exchange of
-    exchange that have the same wallet in the list. Remove the exchange have the same wallet but bigger pebble exchange
-
-    :param explored:
-    :param new_exchange:
+def replay_trades(trades, path, replayed: dict) -> Exchange:
     """
-
-    same_wallet_exchange = explored.exchange_with_wallet(new_exchange.wallet)
-    if same_wallet_exchange:
-        if new_exchange.less_pebble_exchange(same_wallet_exchange):
-            explored.exchanges.remove(same_wallet_exchange)
-            explored.exchanges.append(new_exchange)
-    else:
-        explored.exchanges.append(new_exchange)
-def __update_frontier_nodes(
-    frontier: Exchanges, equations: Equations, current_exchange: Exchange
-):
-    """
-    Add possible next level exchanges going from this exchange to the frontier.
-
-    :param frontier: The Exchanges to be explored
-    :param equations: All possible equations
-    :param current_exchange: The current Exchange being explored
+    Builds the Exchange reached by making the trades at the given indices, reusing the exchanges already built
+    for prefixes of the path.
+
+    :param trades: directed trades of the game
+    :param path: indices of the trades to make, in order
+    :param replayed: exchanges built so far, keyed by their trade path; must contain the empty path
+    :return: exchange after the trades
+    :rtype: Exchange
     """
-    possible_exchanges = current_exchange.possible_next_exchange(equations)
-    for exchange in possible_exchanges:
-        next_wallet = exchange.wallet
-        next_pebble_exchanges = exchange.pebble_exchanges
-        if not frontier.have_wallet_n_exchanges(next_wallet, next_pebble_exchanges):
-            frontier.put(exchange)
+    exchange = replayed.get(path)
+    if exchange is None:
+        previous = replay_trades(trades, path[:-1], replayed)
+        exchange = previous.perform_exchange(trades[path[-1]].equation)
+        replayed[path] = exchange
+    return exchange
@@ -0,0 +1,257 @@
+import random
+from typing import Hashable, List, Optional, OrderedDict, Sequence, Tuple
+
+from pydantic import ConfigDict, Field
+
+from Bazaar.Common.data import PEBBLE_COUNT
+from Bazaar.Common.equations import Equations
+from Bazaar.Common.trade_closure import ReachableCache
+from Bazaar.Common.turn_state import TurnState
+from Bazaar.Player.budget import SearchBudget
+from Bazaar.Player.exchanges import Exchange
+from Bazaar.Player.policies import PolicyBudget, PurchasePoints, TurnPlanner, get_policy, register_policy
+from Bazaar.Player.purchases import PurchaseSequence
+from Bazaar.Player.simulator import STARTING_BANK, VISIBLE_CARDS, CardValue, Counts, SimCard, can_pay
+from Bazaar.Player.turns import TurnAction, draw_counts, materialize, next_actions, trade_counts, turn_actions
+
+DEFAULT_TURNS = 3
+DEFAULT_SECONDS = 1.0
+DEFAULT_TABLE_ENTRIES = 1 << 16
+
+# Visible cards of a search state, in row order
+Row = Tuple[SimCard, ...]
+
+
+class TranspositionTable(ReachableCache):
+    """
+    Bounded least-recently-used cache of the values ExpectimaxPlanner found for states.
+    The key is the wallet, the bank and the visible cards, together with the number of turns the value looks ahead;
+    the value is the expected value of the cards bought over those turns.
+
+    :param entries: value of every cached state, least recently used first
+    :type entries: OrderedDict[Hashable, float]
+    """
+
+    max_entries: int = DEFAULT_TABLE_ENTRIES
+    entries: OrderedDict[Hashable, float] = Field(default_factory=OrderedDict)
+
+
+class ExpectimaxPlanner(TurnPlanner):
+    """
+    Plays turns by a depth-limited expectimax over the player's own next turns. Drawing a pebble takes the first
+    color of the bank and the row is refilled from the front of the deck, so a turn leads to a known wallet, bank
+    and row, except for the cards that replace the ones bought: those are chance outcomes, each a row of refills
+    drawn once for the planner, and a state is worth the average over them. Opponents are not modeled; their turns
+    are assumed to leave the bank and the row alone. The current turn considers the actions of turn_actions, later
+    turns the cheaper ones of next_actions.
+    The search deepens one turn at a time until the budget runs out; a depth the budget cut short is dropped, so the
+    action chosen is the best one of the deepest completed depth. Values are kept in a transposition table, which
+    stays valid from turn to turn since the chance outcomes do not change.
+
+    :param equations: equations of the game
+    :type equations: Equations
+    :param policy: name of the policy valuing the cards bought
+    :type policy: str
+    :param turns: number of the player's turns to look ahead at most, the current one included
+    :type turns: int
+    :param seconds: deadline of a turn's search when no budget is given
+    :type seconds: float
+    :param max_actions: number of actions of the current turn considered
+    :type max_actions: int
+    :param chance_samples: number of chance outcomes averaged over after a purchase
+    :type chance_samples: int
+    :param rng: random number generator for the chance outcomes
+    :type rng: random.Random
+    :param refills: chance outcomes: cards replacing the ones bought, in refill order
+    :type refills: List[Row]
+    :param table: values of the states searched so far
+    :type table: TranspositionTable
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    equations: Equations
+    policy: str
+    turns: int = DEFAULT_TURNS
+    seconds: float = DEFAULT_SECONDS
+    max_actions: int = 8
+    chance_samples: int = 3
+    rng: random.Random = Field(default_factory=random.Random)
+    refills: List[Row] = Field(default_factory=list)
+    table: TranspositionTable = Field(default_factory=TranspositionTable)
+
+    def choose(
+        self, turn_state: TurnState, budget: Optional[SearchBudget] = None
+    ) -> Optional[Tuple[Exchange, PurchaseSequence]]:
+        """
+        Deepens the search one turn at a time, up to turns, and picks the action of the highest expected value
+        found by the deepest completed depth, the best ranked one among equals. One node of the budget is one
+        state searched.
+
+        :param turn_state: state of the turn to play
+        :type turn_state: TurnState
+        :param budget: limit on the states searched or time, None for the deadline of this planner
+        :type budget: Optional[SearchBudget]
+        :return: exchange and purchase, None if the player can neither trade nor draw
+        :rtype: Optional[Tuple[Exchange, PurchaseSequence]]
+        """
+        value = get_policy(self.policy).card_value
+        actions = turn_actions(turn_state, self.equations, value, self.max_actions)
+        if not actions:
+            return None
+        if not self.refills:
+            self.refills = [_random_row(self.rng) for _ in range(self.chance_samples)]
+        budget = (budget or SearchBudget(seconds=self.seconds)).start()
+        wallet, bank = turn_state.active_player_wallet.counts, turn_state.bank.counts
+        row = tuple(card.key for card in turn_state.cards.cards)
+
+        picked = actions[0]
+        for turns in range(1, self.turns + 1):
+            values = [self.action_value(wallet, bank, row, action, turns, value, budget) for action in actions]
+            if budget.exhausted:
+                break
+            picked = actions[values.index(max(values))]
+            budget.depth_completed = turns
+        return materialize(turn_state, self.equations, picked)
+
+    def reset(self) -> None:
+        self.table.clear()
+        self.refills = []
+
+    def state_value(
+        self, wallet: Counts, bank: Counts, row: Row, turns: int, value: CardValue, budget: SearchBudget
+    ) -> float:
+        """
+        Returns the expected value of the cards the player buys in its next turns from a state, playing the best
+        action of every turn, looked up in the table if it was searched before.
+
+        :param wallet: count vector of the wallet
+        :type wallet: Tuple[int, ...]
+        :param bank: count vector of the bank
+        :type bank: Tuple[int, ...]
+        :param row: visible cards
+        :type row: Row
+        :param turns: number of turns to look ahead
+        :type turns: int
+        :param value: what a card adds to a purchase
+        :type value: CardValue
+        :param budget: started budget; once it has run out, the values returned are meaningless and are not stored
+        :type budget: SearchBudget
+        :return: expected value of the next turns
+        :rtype: float
+        """
+        if turns == 0 or not row:
+            return 0.0
+        key = (wallet, bank, row, turns)
+        cached = self.table.get(key)
+        if cached is not None:
+            return cached
+        if not budget.spend():
+            return 0.0
+        trades = self.equations.compile().trades
+        best = 0.0
+        for action in next_actions(trades, wallet, bank, row, len(row) < VISIBLE_CARDS, value):
+            best = max(best, self.action_value(wallet, bank, row, action, turns, value, budget))
+        if not budget.exhausted:
+            self.table.put(key, best)
+        return best
+
+    def action_value(
+        self,
+        wallet: Counts,
+        bank: Counts,
+        row: Row,
+        action: TurnAction,
+        turns: int,
+        value: CardValue,
+        budget: SearchBudget,
+    ) -> float:
+        """
+        Returns the expected value of playing an action and then the best actions of the turns after it.
+        The exchange removes the last visible card if the deck is empty, i.e. if the row is no longer full;
+        otherwise every card bought is replaced by one of a chance outcome.
+
+        :param wallet: count vector of the wallet
+        :type wallet: Tuple[int, ...]
+        :param bank: count vector of the bank
+        :type bank: Tuple[int, ...]
+        :param row: visible cards
+        :type row: Row
+        :param action: action to play
+        :type action: TurnAction
+        :param turns: number of turns to look ahead, this one included
+        :type turns: int
+        :param value: what a card adds to a purchase
+        :type value: CardValue
+        :param budget: started budget
+        :type budget: SearchBudget
+        :return: expected value of the action and the turns after it
+        :rtype: float
+        """
+        deck_empty = len(row) < VISIBLE_CARDS
+        if action.path is None:
+            wallet, bank = draw_counts(wallet, bank)
+        else:
+            wallet, bank = trade_counts(self.equations.compile().trades, wallet, bank, action.path)
+            if deck_empty:
+                row = row[:-1]
+        gained, wallet, bank, kept = _buy(wallet, bank, row, action.cards, value)
+        bought = len(row) - len(kept)
+        if turns == 1:
+            return gained
+        if deck_empty or not bought:
+            return gained + self.state_value(wallet, bank, kept, turns - 1, value, budget)
+        expected = sum(
+            self.state_value(wallet, bank, kept + refill[:bought], turns - 1, value, budget) for refill in self.refills
+        )
+        return gained + expected / len(self.refills)
+
+
+def _buy(
+    wallet: Counts, bank: Counts, row: Row, cards: Sequence[SimCard], value: CardValue
+) -> Tuple[int, Counts, Counts, Row]:
+    """
+    Buys the given cards that are visible and affordable, in order, the way Simulator.purchase does.
+
+    :return: value of the cards bought, the wallet and the bank after them, and the cards left in the row
+    """
+    wallet, bank, kept = list(wallet), list(bank), list(row)
+    gained = 0
+    for card in cards:
+        cost, happy_face = card
+        if card not in kept or not can_pay(cost, wallet):
+            continue
+        kept.remove(card)
+        for color, amount in enumerate(cost):
+            wallet[color] -= amount
+            bank[color] += amount
+        gained += value(sum(wallet), happy_face)
+    return gained, tuple(wallet), tuple(bank), tuple(kept)
+
+
+def _random_row(rng: random.Random) -> Row:
+    """
+    Draws a row of random cards, as many as a purchase can replace, each of PEBBLE_COUNT random pebbles.
+    """
+    row = []
+    for _ in range(VISIBLE_CARDS):
+        colors = [0] * len(STARTING_BANK)
+        for _ in range(PEBBLE_COUNT):
+            colors[rng.randrange(len(colors))] += 1
+        row.append((tuple(colors), rng.random() < 0.5))
+    return tuple(row)
+
+
+@register_policy
+class PurchaseExpectimax(PurchasePoints):
+    """
+    Maximizes the points expected over the player's next turns, planned by expectimax with iterative deepening.
+    The time budget is the deadline of a turn's search, and the node budget the number of states it may search.
+    """
+
+    name: str = "purchase-expectimax"
+    description: str = "Plan the next three turns by expectimax within a deadline, maximizing the expected points."
+    budget: PolicyBudget = PolicyBudget(seconds=DEFAULT_SECONDS)
+
+    def make_planner(self, equations: Equations) -> ExpectimaxPlanner:
+        return ExpectimaxPlanner(equations=equations, policy=self.name)
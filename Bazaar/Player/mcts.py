@@ -0,0 +1,198 @@
+import math
+import random
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+from pydantic import ConfigDict, Field
+
+from Bazaar.Common.equations import Equations
+from Bazaar.Common.turn_state import TurnState
+from Bazaar.Player.budget import SearchBudget
+from Bazaar.Player.exchanges import Exchange
+from Bazaar.Player.policies import PolicyBudget, PurchasePoints, TurnPlanner, get_policy, register_policy
+from Bazaar.Player.purchases import PurchaseSequence
+from Bazaar.Player.simulator import CardValue, Simulator
+from Bazaar.Player.turns import TurnAction, materialize, next_actions, turn_actions
+
+DEFAULT_PLAYOUTS = 200
+
+
+class MctsNode:
+    """
+    Node of the search tree: the statistics of one action, and the nodes of the actions of the next turn of the
+    same player after it. Actions differ between sampled games, so a child also counts the playouts it was
+    available in, for its exploration term.
+
+    :param children: nodes of the next actions, by action key
+    :type children: Dict[Hashable, MctsNode]
+    :param visits: number of playouts through this node
+    :type visits: int
+    :param total: sum of the outcomes of those playouts
+    :type total: float
+    :param available: number of playouts in which this node's action could be chosen
+    :type available: int
+    """
+
+    __slots__ = ("children", "visits", "total", "available")
+
+    def __init__(self):
+        self.children: Dict[Hashable, MctsNode] = {}
+        self.visits = 0
+        self.total = 0.0
+        self.available = 0
+
+    def select(self, actions: Sequence[TurnAction], exploration: float) -> Tuple[TurnAction, "MctsNode"]:
+        """
+        Picks the action to follow among the ones a playout allows: the first one never tried, otherwise the one of
+        highest upper confidence bound.
+
+        :param actions: actions available in this playout, best first
+        :type actions: Sequence[TurnAction]
+        :param exploration: weight of the exploration term
+        :type exploration: float
+        :return: picked action and its node
+        :rtype: Tuple[TurnAction, MctsNode]
+        """
+        picked, picked_node, picked_bound = None, None, -1.0
+        for action in actions:
+            node = self.children.get(action.key)
+            if node is None:
+                node = self.children[action.key] = MctsNode()
+            node.available += 1
+            if picked_bound == math.inf:
+                continue
+            if node.visits == 0:
+                bound = math.inf
+            else:
+                bound = node.total / node.visits + exploration * math.sqrt(math.log(node.available) / node.visits)
+            if bound > picked_bound:
+                picked, picked_node, picked_bound = action, node, bound
+        return picked, picked_node
+
+
+class MonteCarloPlanner(TurnPlanner):
+    """
+    Plays turns by Monte Carlo tree search over whole turns. The root holds the exchanges of the turn (and the draw),
+    each followed by the best purchase after it or by no purchase; below every root action are the next turns of
+    the same player, generated on the simulator. Every playout samples what the player cannot see, i.e. the
+    opponents' wallets and the invisible deck, plays the picked actions with the opponents playing greedy
+    moves in between, then lets every player move greedily for horizon more rounds and scores the outcome.
+    The child of the chosen action becomes the root of the next turn, so its statistics carry over.
+
+    :param equations: equations of the game
+    :type equations: Equations
+    :param policy: name of the policy valuing the cards bought
+    :type policy: str
+    :param playouts: number of playouts per turn when no budget is given
+    :type playouts: int
+    :param max_actions: number of actions kept at the root, half of them buying and half holding pebbles
+    :type max_actions: int
+    :param horizon: number of rounds every player plays greedily at the end of a playout
+    :type horizon: int
+    :param exploration: weight of the exploration term of the upper confidence bound
+    :type exploration: float
+    :param rng: random number generator for the sampled games
+    :type rng: random.Random
+    :param root: node of the turn being planned, None before the first turn
+    :type root: Optional[MctsNode]
+    :param last_key: key of the action chosen last turn
+    :type last_key: Optional[Hashable]
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    equations: Equations
+    policy: str
+    playouts: int = DEFAULT_PLAYOUTS
+    max_actions: int = 8
+    horizon: int = 2
+    exploration: float = 0.7
+    rng: random.Random = Field(default_factory=random.Random)
+    root: Optional[MctsNode] = None
+    last_key: Optional[Hashable] = None
+
+    def choose(
+        self, turn_state: TurnState, budget: Optional[SearchBudget] = None
+    ) -> Optional[Tuple[Exchange, PurchaseSequence]]:
+        """
+        Searches for the turn to play until the budget runs out, one playout per node of the budget,
+        and picks the action of the most playouts, the best ranked one among equals.
+
+        :param turn_state: state of the turn to play
+        :type turn_state: TurnState
+        :param budget: limit on the playouts or time, None for the playouts of this planner
+        :type budget: Optional[SearchBudget]
+        :return: exchange and purchase, None if the player can neither trade nor draw
+        :rtype: Optional[Tuple[Exchange, PurchaseSequence]]
+        """
+        value = get_policy(self.policy).card_value
+        actions = turn_actions(turn_state, self.equations, value, self.max_actions)
+        if not actions:
+            return None
+        root = self.root.children.get(self.last_key) if self.root is not None else None
+        root = root if root is not None else MctsNode()
+        budget = (budget or SearchBudget(max_nodes=self.playouts)).start()
+        trades = self.equations.compile().trades
+        visible = [card.key for card in turn_state.cards.cards]
+        scores = [turn_state.active_player_score] + list(turn_state.player_scores)
+        moves = {}
+        while budget.spend():
+            game = Simulator.sample(
+                trades, turn_state.bank.counts, turn_state.active_player_wallet.counts, scores, visible, self.rng, moves
+            )
+            self.playout(root, actions, game, value)
+
+        picked = max(actions, key=lambda action: root.children[action.key].visits if action.key in root.children else 0)
+        self.root, self.last_key = root, picked.key
+        return materialize(turn_state, self.equations, picked)
+
+    def reset(self) -> None:
+        self.root = None
+        self.last_key = None
+
+    def playout(self, root: MctsNode, actions: List[TurnAction], game: Simulator, value: CardValue) -> None:
+        """
+        Plays one sampled game from the root: the picked action of this turn, the opponents' turns, the picked
+        action of the next turn, then the greedy rounds, and adds the outcome to every node on the way.
+
+        :param root: root of the tree
+        :type root: MctsNode
+        :param actions: actions of this turn
+        :type actions: List[TurnAction]
+        :param game: sampled game, with the player in seat 0 to move
+        :type game: Simulator
+        :param value: what a card adds to a purchase
+        :type value: CardValue
+        """
+        visited = [root]
+        node = root
+        for _ in range(2):
+            action, node = node.select(actions, self.exploration)
+            visited.append(node)
+            game.play((action.path, action.cards))
+            game.rollout(value, len(game.wallets) - 1)
+            if game.is_over() or game.turn != 0:
+                break
+            actions = next_actions(game.trades, game.wallets[0], game.bank, game.visible, not game.deck, value)
+            if not actions:
+                break
+        if not game.is_over():
+            game.rollout(value, self.horizon * len(game.wallets))
+        outcome = game.outcome(0)
+        for node in visited:
+            node.visits += 1
+            node.total += outcome
+
+
+@register_policy
+class PurchaseMcts(PurchasePoints):
+    """
+    Maximizes the points received over the coming turns, planned with Monte Carlo tree search.
+    The node budget is the number of playouts per turn.
+    """
+
+    name: str = "purchase-mcts"
+    description: str = "Plan turns ahead by Monte Carlo tree search, maximizing the points received."
+    budget: PolicyBudget = PolicyBudget(max_nodes=DEFAULT_PLAYOUTS)
+
+    def make_planner(self, equations: Equations) -> MonteCarloPlanner:
+        return MonteCarloPlanner(equations=equations, policy=self.name)
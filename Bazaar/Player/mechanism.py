@@ -1,16 +1,20 @@
+from concurrent.futures import Executor
 from copy import copy
-from typing import Optional, List, Callable
+from typing import Hashable, Optional, List, Callable, Tuple
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 
 from Bazaar.Common.cards import Cards
 from Bazaar.Common.equations import Equations, Equation
 from Bazaar.Common.turn_state import TurnState
 
+from Bazaar.Player.budget import SearchBudget
 from Bazaar.Player.exchanges import Exchange
 import re
 
-from Bazaar.Player.purchases import PurchaseSequences, PurchaseSequence
+from Bazaar.Player import expectimax, mcts  # register the purchase-expectimax and purchase-mcts policies
+from Bazaar.Player.policies import POLICIES, PolicyBudget, TurnPlanner, get_policy
+from Bazaar.Player.purchases import PurchaseCache, PurchaseSearchStats, PurchaseSequences, PurchaseSequence
 from Bazaar.Player.strategy import Strategy
 from Bazaar.Player.decorators import *
 
@@ -29,8 +33,68 @@ REQUEST_PEBBLE_OR_TRADES_EXN = "request-pebble-or-trades"
 REQUEST_CARDS_EXN = "request-cards"
 WIN_EXN = "win"
 
+
+class TurnPlan(BaseModel):
+    """
+    Purchase chosen together with the exchange of a turn, kept until the player is asked for cards.
+    The purchase still holds if the turn state the player gets then is the one the exchange was predicted to lead to.
+
+    :param wallet: count vector of the predicted wallet after the exchange
+    :type wallet: Tuple[int, ...]
+    :param bank: count vector of the predicted bank after the exchange
+    :type bank: Tuple[int, ...]
+    :param cards: Card.key of every visible card the purchase was chosen from, in order
+    :type cards: Tuple[Hashable, ...]
+    :param purchase: best purchase for the predicted state
+    :type purchase: PurchaseSequence
+    """
+
+    wallet: Tuple[int, ...]
+    bank: Tuple[int, ...]
+    cards: Tuple[Hashable, ...]
+    purchase: PurchaseSequence
+
+    @classmethod
+    def predict(cls, exchange: Exchange, cards: Cards, purchase: PurchaseSequence) -> "TurnPlan":
+        """
+        Builds the plan of a turn from the chosen exchange and the purchase found for it.
+
+        :param exchange: chosen exchange, holding the wallet and bank after it
+        :type exchange: Exchange
+        :param cards: visible cards the purchase was chosen from
+        :type cards: Cards
+        :param purchase: best purchase after the exchange
+        :type purchase: PurchaseSequence
+        :return: plan of the turn
+        :rtype: TurnPlan
+        """
+        return cls(
+            wallet=exchange.wallet.counts,
+            bank=exchange.bank.counts,
+            cards=tuple(card.key for card in cards.cards),
+            purchase=purchase,
+        )
+
+    def matches(self, turn_state: TurnState) -> bool:
+        """
+        Checks whether a turn state is the one this plan was made for.
+
+        :param turn_state: turn state the player is asked to buy cards in
+        :type turn_state: TurnState
+        :return: True if the wallet, the bank and the visible cards are the predicted ones
+        :rtype: bool
+        """
+        return (
+            turn_state.active_player_wallet.counts == self.wallet
+            and turn_state.bank.counts == self.bank
+            and tuple(card.key for card in turn_state.cards.cards) == self.cards
+        )
+
+
 class Mechanism(BaseModel):
 
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     name: str
     policy: str
     equations: Equations = None
@@ -39,6 +103,14 @@ class Mechanism(BaseModel):
     count: Optional[int] = _DEFAULT_COUNT
     did_win: bool = False
     game_over: bool = False
+    search_seconds: Optional[float] = None
+    search_nodes: Optional[int] = None
+    last_search: Optional[SearchBudget] = None
+    executor: Optional[Executor] = None
+    search_stats: PurchaseSearchStats = Field(default_factory=PurchaseSearchStats)
+    plan: Optional[TurnPlan] = None
+    strategy: Optional[Strategy] = None
+    planner: Optional[TurnPlanner] = None
 
     def name(self) -> str:
         """
@@ -50,12 +122,17 @@ class Mechanism(BaseModel):
     def setup(self, equations: Equations) -> None:
         """
         The player is handed the set of equations, which is visible to all.
+        The strategy used for every turn of the game is built here, so its caches stay warm from turn to turn,
+        and so is the planner of a policy that plans whole turns itself.
 
         :param equations: the equations handed to the player.
         :type equations: Equations
         :return: None
         """
         self.equations = copy(equations)
+        self.equations.compile()
+        self.strategy = self.__new_strategy()
+        self.planner = get_policy(self.policy).make_planner(self.equations)
 
     @request_pebble_or_trades_decorator
     @use_non_existent_equation_decorator
@@ -67,14 +144,77 @@ class Mechanism(BaseModel):
         """
         After receiving the turn state, a player requests one of:
         requests a pebble, or a possibly empty sequence of exchanges of pebbles.
+        The purchase found for the chosen exchange is kept in plan, for request_cards.
+        If the policy has a planner, the planner picks the exchange (or the draw) and the purchase instead of the
+        strategy, within the same budget.
 
         :param turn_state: the turn state of the player
         :type turn_state: TurnState
         :return: None if the player requests a pebble, sequence of exchanges otherwise.
         :rtype: Optional[Exchange]
         """
-        strategy = Strategy(equations=copy(self.equations), turn_state=turn_state, policy=self.policy)
-        return strategy.get_trade_purchase()[0].pebble_exchanges
+        self.last_search = self.__search_budget()
+        self.plan = None
+        if self.planner is not None:
+            exchange, purchase = self.planner.choose(turn_state, self.last_search)
+            self.plan = TurnPlan.predict(exchange, turn_state.cards, purchase)
+            return exchange.pebble_exchanges
+        strategy = self.__strategy().start_turn(turn_state, self.last_search, self.executor)
+        exchange, purchase = strategy.get_trade_purchase()
+        if exchange.pebble_exchanges and purchase is not None:
+            self.plan = TurnPlan.predict(exchange, turn_state.cards, purchase)
+        return exchange.pebble_exchanges
+
+    def __strategy(self) -> Strategy:
+        """
+        Returns the strategy of this player, building it if setup has not.
+
+        :return: strategy kept for the game
+        :rtype: Strategy
+        """
+        if self.strategy is None:
+            self.strategy = self.__new_strategy()
+        return self.strategy
+
+    def __new_strategy(self) -> Strategy:
+        """
+        Builds a strategy for the equations of this player, with an empty purchase cache of its own, as large as
+        compute_budget allows. Exchange searches go to the process-wide cache, which every player of the same
+        equations shares.
+
+        :return: new strategy
+        :rtype: Strategy
+        """
+        return Strategy(
+            equations=self.equations,
+            policy=self.policy,
+            purchase_cache=PurchaseCache(max_entries=self.compute_budget().max_cache_entries),
+            search_stats=self.search_stats,
+        )
+
+    def compute_budget(self) -> PolicyBudget:
+        """
+        Returns the compute this player needs per turn: the budget its policy declares, with search_seconds and
+        search_nodes in place of the policy's limits when either is set. Referees and servers can query it to
+        schedule house players.
+
+        :return: budget of this player
+        :rtype: PolicyBudget
+        """
+        budget = get_policy(self.policy).budget
+        if self.search_seconds is None and self.search_nodes is None:
+            return budget
+        return budget.model_copy(update={"seconds": self.search_seconds, "max_nodes": self.search_nodes})
+
+    def __search_budget(self) -> Optional[SearchBudget]:
+        """
+        Returns a fresh budget for choosing exchanges, None if this player searches exhaustively.
+        The budget is kept in last_search, so its report() shows how much of it the last turn used.
+
+        :return: budget limited by the seconds and nodes of compute_budget
+        :rtype: Optional[SearchBudget]
+        """
+        return self.compute_budget().search_budget()
 
     @request_cards_decorator
     @buy_unavailable_card_decorator
@@ -82,26 +222,36 @@ class Mechanism(BaseModel):
     def request_cards(self, turn_state: TurnState) -> PurchaseSequence:
         """
         After receiving the turn state, a player requests a possible empty sequence of card purchases.
+        If the turn state is the one the exchange of this turn was predicted to lead to, the purchase chosen together
+        with that exchange is returned without searching again.
 
         :param turn_state: the turn state of the player
         :type turn_state: TurnState
         :return: sequence of (possibly empty) card purchases
         :rtype: PurchaseSequence
         """
-        strategy = Strategy(equations=copy(self.equations), turn_state=turn_state, policy=self.policy)
+        plan, self.plan = self.plan, None
+        if plan is not None and plan.matches(turn_state):
+            return plan.purchase
+        strategy = self.__strategy().start_turn(turn_state)
         purchases = strategy.get_purchase(turn_state)
         return purchases
 
     @win_decorator
     def win(self, did_win: bool) -> None:
         """
-        The player is informed whether it won or not.
+        The player is informed whether it won or not. The game is over, so the strategy drops its caches
+        and the planner its tree.
 
         :param did_win: True if the player is won, False otherwise.
         :type did_win: bool
         """
         self.game_over = True
         self.did_win = did_win
+        if self.strategy is not None:
+            self.strategy.reset()
+        if self.planner is not None:
+            self.planner.reset()
 
     @classmethod
     def deserialize(cls, data: List[str]) -> "Mechanism":
@@ -128,7 +278,7 @@ class Mechanism(BaseModel):
             )
 
         policy = data[_POLICY_INDEX]
-        if not policy in ("purchase-points", "purchase-size"):
+        if not policy in POLICIES:
             raise ValueError("Actor policy provided for deserialization is invalid.")
 
         exception_raised = None
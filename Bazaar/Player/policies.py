@@ -0,0 +1,217 @@
+from typing import Dict, List, Optional, Tuple, Type
+
+from pydantic import BaseModel, Field
+
+from Bazaar.Common.data import MAX_CARD_REWARD
+from Bazaar.Common.rule_book import RuleBook
+from Bazaar.Common.trade_closure import DEFAULT_CACHE_ENTRIES
+from Bazaar.Player.budget import SearchBudget
+
+
+class PolicyBudget(BaseModel):
+    """
+    Compute a policy declares it needs per turn, so house players can be scheduled before a game starts.
+
+    :param seconds: wall-clock time one exchange search may take, None for no limit
+    :type seconds: Optional[float]
+    :param max_nodes: number of exchanges one search may evaluate, None for no limit
+    :type max_nodes: Optional[int]
+    :param max_cache_entries: number of purchases the player keeps cached across turns
+    :type max_cache_entries: int
+    """
+
+    seconds: Optional[float] = None
+    max_nodes: Optional[int] = None
+    max_cache_entries: int = DEFAULT_CACHE_ENTRIES
+
+    def search_budget(self) -> Optional[SearchBudget]:
+        """
+        Returns a fresh budget for one exchange search, None if the search is exhaustive.
+
+        :return: budget limited by seconds and max_nodes
+        :rtype: Optional[SearchBudget]
+        """
+        if self.seconds is None and self.max_nodes is None:
+            return None
+        return SearchBudget(seconds=self.seconds, max_nodes=self.max_nodes)
+
+    def report(self) -> Dict[str, object]:
+        """
+        Returns the limits of this budget.
+
+        :return: seconds, nodes and cache entries
+        :rtype: Dict[str, object]
+        """
+        return self.model_dump()
+
+
+class TurnPlanner(BaseModel):
+    """
+    Plays whole turns, the exchange and the purchase after it, for policies that look further ahead than
+    Strategy. A planner is made by PurchasePolicy.make_planner and kept by its player for the whole game.
+    """
+
+    def choose(
+        self, turn_state: "TurnState", budget: Optional[SearchBudget] = None
+    ) -> Optional[Tuple["Exchange", "PurchaseSequence"]]:
+        """
+        Picks the exchange and the purchase of a turn. An exchange without trades draws a pebble; it then holds
+        the wallet and the bank after the draw.
+
+        :param turn_state: state of the turn to play
+        :type turn_state: TurnState
+        :param budget: limit on the work spent choosing, None for the planner's own default
+        :type budget: Optional[SearchBudget]
+        :return: exchange and purchase, None if the player can neither trade nor draw
+        :rtype: Optional[Tuple[Exchange, PurchaseSequence]]
+        """
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """
+        Forgets what was planned, e.g. when the game is over.
+        """
+        raise NotImplementedError
+
+
+class PurchasePolicy(BaseModel):
+    """
+    How a player values the cards it buys in one turn. A purchase is worth the sum of card_value over its cards,
+    and the best purchase is the one worth the most. card_value may only depend on the number of pebbles left
+    in the wallet after buying the card and on its face, and must lie between 0 and most_per_card; find_best_purchase
+    relies on both to memoize and to bound its search.
+    New policies subclass this class and are made available by name with the register_policy decorator;
+    a policy that plans whole turns itself also overrides make_planner.
+
+    :param name: name of the policy in actor specifications and on the command line
+    :type name: str
+    :param description: one-line description shown when a player picks a policy
+    :type description: str
+    :param most_per_card: the most card_value returns
+    :type most_per_card: int
+    :param budget: compute a player of this policy needs per turn
+    :type budget: PolicyBudget
+    """
+
+    name: str
+    description: str
+    most_per_card: int
+    budget: PolicyBudget = Field(default_factory=PolicyBudget)
+
+    def card_value(self, remaining: int, happy_face: bool) -> int:
+        """
+        Returns what buying one card adds to the value of a purchase.
+
+        :param remaining: number of pebbles left in the wallet after buying the card
+        :type remaining: int
+        :param happy_face: True if the card shows a happy face
+        :type happy_face: bool
+        :return: value of the card
+        :rtype: int
+        """
+        raise NotImplementedError
+
+    def value(self, purchase: "PurchaseSequence") -> int:
+        """
+        Returns the value of a whole purchase: card_value summed over its cards, walking back from the wallet
+        left after the last one.
+
+        :param purchase: purchase to value
+        :type purchase: PurchaseSequence
+        :return: value of the purchase
+        :rtype: int
+        """
+        remaining = len(purchase.wallet.pebbles)
+        total = 0
+        for card in reversed(purchase.sequence.cards):
+            total += self.card_value(remaining, card.happy_face)
+            remaining += len(card.pebbles.pebbles)
+        return total
+
+    def make_planner(self, equations: "Equations") -> Optional[TurnPlanner]:
+        """
+        Returns the planner that plays the turns of a player of this policy, None if Strategy plays them.
+
+        :param equations: equations of the game
+        :type equations: Equations
+        :return: planner for the game, or None
+        :rtype: Optional[TurnPlanner]
+        """
+        return None
+
+
+POLICIES: Dict[str, PurchasePolicy] = {}
+
+
+def register_policy(policy_class: Type[PurchasePolicy]) -> Type[PurchasePolicy]:
+    """
+    Class decorator that makes a policy available by its name. The class is instantiated with its defaults,
+    and a later registration under the same name replaces the earlier one.
+
+    :param policy_class: policy to register
+    :type policy_class: Type[PurchasePolicy]
+    :return: the class, unchanged
+    :rtype: Type[PurchasePolicy]
+    """
+    policy = policy_class()
+    POLICIES[policy.name] = policy
+    return policy_class
+
+
+def get_policy(name: str) -> PurchasePolicy:
+    """
+    Looks up a registered policy.
+
+    :param name: name of the policy
+    :type name: str
+    :return: the policy
+    :rtype: PurchasePolicy
+    :raises ValueError: if no policy of that name is registered
+    """
+    if name not in POLICIES:
+        raise ValueError(f"Unknown policy: {name}")
+    return POLICIES[name]
+
+
+def policy_names() -> List[str]:
+    """
+    Returns the names of the registered policies, in registration order.
+
+    :return: policy names
+    :rtype: List[str]
+    """
+    return list(POLICIES)
+
+
+@register_policy
+class PurchasePoints(PurchasePolicy):
+    """
+    Maximizes the points received in one turn.
+    """
+
+    name: str = "purchase-points"
+    description: str = "Maximize the number of points received in one turn."
+    most_per_card: int = MAX_CARD_REWARD
+
+    def card_value(self, remaining: int, happy_face: bool) -> int:
+        return RuleBook.card_reward(remaining, happy_face)
+
+    def value(self, purchase: "PurchaseSequence") -> int:
+        return purchase.points
+
+
+@register_policy
+class PurchaseSize(PurchasePolicy):
+    """
+    Maximizes the number of cards bought in one turn.
+    """
+
+    name: str = "purchase-size"
+    description: str = "Maximize the number of cards bought in one turn."
+    most_per_card: int = 1
+
+    def card_value(self, remaining: int, happy_face: bool) -> int:
+        return 1
+
+    def value(self, purchase: "PurchaseSequence") -> int:
+        return len(purchase.sequence.cards)
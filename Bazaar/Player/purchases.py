@@ -1,11 +1,69 @@
 from copy import copy
-from typing import List, Tuple, Callable
+from typing import Dict, Hashable, List, Optional, OrderedDict, Set, Tuple, Callable
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
+from Bazaar.Common.affordability import AffordabilityIndex
 from Bazaar.Common.cards import Cards, Card
+from Bazaar.Common.data import MAX_CARD_REWARD
 from Bazaar.Common.pebble import PebbleCollection
 from Bazaar.Common.rule_book import RuleBook
+from Bazaar.Common.search_state import SearchState
+from Bazaar.Common.trade_closure import ReachableCache
+from Bazaar.Player.policies import POLICIES
+
+
+class PurchaseSearchStats(BaseModel):
+    """
+    Counts the work of purchase searches and how much of it the upper bounds saved.
+
+    :param searches: number of purchase searches run
+    :type searches: int
+    :param states: number of (cards left, wallet) states whose best value was computed
+    :type states: int
+    :param branches_pruned: purchases not searched because their upper bound could not beat the best value found
+    :type branches_pruned: int
+    :param exchanges_pruned: exchanges not searched because their upper bound could not reach the best candidate
+    :type exchanges_pruned: int
+    """
+
+    searches: int = 0
+    states: int = 0
+    branches_pruned: int = 0
+    exchanges_pruned: int = 0
+
+    def report(self) -> Dict[str, int]:
+        """
+        Returns the counters of these statistics.
+
+        :return: searches, states, pruned branches and pruned exchanges
+        :rtype: Dict[str, int]
+        """
+        return self.model_dump()
+
+    def merge(self, other: "PurchaseSearchStats") -> None:
+        """
+        Adds the counters of other statistics to these, e.g. the ones counted in a worker process.
+
+        :param other: statistics to add
+        :type other: PurchaseSearchStats
+        """
+        for name, count in other.report().items():
+            setattr(self, name, getattr(self, name) + count)
+
+
+class PurchaseCache(ReachableCache):
+    """
+    Bounded least-recently-used cache of the purchases find_best_purchase picks.
+    The best purchase only depends on the policy, the visible cards in order and the count vector of the wallet,
+    so that is the key, with the wallet as its packed-integer key (PebbleCollection.pack), and the value is the
+    positions of the cards to buy, in buying order (empty if none can be bought). The PurchaseSequence itself is rebuilt from them for the wallet and bank actually given.
+
+    :param entries: positions of the cards of every cached purchase, least recently used first
+    :type entries: OrderedDict[Hashable, Tuple[int, ...]]
+    """
+
+    entries: OrderedDict[Hashable, Tuple[int, ...]] = Field(default_factory=OrderedDict)
 
 
 class PurchaseSequence(BaseModel):
@@ -21,6 +79,22 @@ class PurchaseSequence(BaseModel):
     wallet: PebbleCollection = PebbleCollection()
     bank: PebbleCollection = PebbleCollection()
 
+    @property
+    def key(self) -> Tuple:
+        """
+        Hashable key of this sequence: the canonical keys of the purchased cards in order, the points,
+        and the count vectors of the wallet and bank. Two sequences are equal exactly when their keys are equal.
+
+        :return: key of this purchase sequence
+        :rtype: Tuple
+        """
+        return (
+            tuple(card.key for card in self.sequence.cards),
+            self.points,
+            self.wallet.counts,
+            self.bank.counts,
+        )
+
     # TODO: purpose of this? since we already filter in
     def is_purchasable(self, wallet: PebbleCollection) -> bool:
         """
@@ -257,7 +331,7 @@ def find_all_possible_purchase(
         sequences=[], points=0, wallet=wallet, bank=bank
     )
     initial_candidate = []
-    search_all_possible(cards, initial_purchase, initial_candidate, policy)
+    search_all_possible(cards, initial_purchase, initial_candidate, policy, set())
     return initial_candidate
 
 
@@ -266,6 +340,7 @@ def search_all_possible(
     purchase: PurchaseSequence,
     candidates: list[PurchaseSequence],
     policy: str = "purchase-points",
+    seen: Optional[Set[Tuple]] = None,
 ):
     """
 
@@ -273,8 +348,11 @@ def search_all_possible(
     :param purchase:
     :param candidates:
     :param policy:
+    :param seen: keys of the sequences in candidates, shared across the recursion (see add_if_better)
     :return:
     """
+    if seen is None:
+        seen = {candidate.key for candidate in candidates}
     filtered_cards = cards.find_matching_cards(purchase.wallet)
     if not len(filtered_cards.cards) == 0:
         for card_index, card in enumerate(filtered_cards.cards):
@@ -283,21 +361,271 @@ def search_all_possible(
             new_purchase = purchase.purchase_card(card)
             if not new_purchase:
                 continue
-            add_if_better(candidates, new_purchase, policy)
-            search_all_possible(cards_copy, new_purchase, candidates, policy)
+            add_if_better(candidates, new_purchase, policy, seen)
+            search_all_possible(cards_copy, new_purchase, candidates, policy, seen)
 
-def add_if_better(candidates: list[PurchaseSequence], new: PurchaseSequence, policy: str):
-    if policy == "purchase-points":
-        if not candidates or new.points > candidates[0].points:
-            candidates.clear()
-            candidates.append(new)
-        elif new.points == candidates[0].points:
-            if new not in candidates:
-                candidates.append(new)
-    if policy == "purchase-size":
-        if not candidates or len(new.sequence.cards) > len(candidates[0].sequence.cards):
-            candidates.clear()
+def add_if_better(
+    candidates: list[PurchaseSequence],
+    new: PurchaseSequence,
+    policy: str,
+    seen: Optional[Set[Tuple]] = None,
+):
+    """
+    Adds the new sequence to the candidates if it beats them under the policy, or joins them if it ties
+    and is not already among them. Duplicates are detected through the keys in seen, which is kept
+    in step with candidates; it is rebuilt from candidates when not given.
+
+    :param candidates: best sequences found so far
+    :param new: sequence to consider
+    :param policy: name of a registered policy; the candidates are left alone for any other name
+    :param seen: keys of the sequences in candidates
+    """
+    if seen is None:
+        seen = {candidate.key for candidate in candidates}
+    valuation = POLICIES.get(policy)
+    if valuation is None:
+        return
+    key = new.key
+    value = valuation.value(new)
+    if not candidates or value > valuation.value(candidates[0]):
+        candidates.clear()
+        seen.clear()
+        candidates.append(new)
+        seen.add(key)
+    elif value == valuation.value(candidates[0]):
+        if key not in seen:
             candidates.append(new)
-        elif len(new.sequence.cards) == len(candidates[0].sequence.cards):
-            if new not in candidates:
-                candidates.append(new)
+            seen.add(key)
+
+def most_per_card(policy: str) -> int:
+    """
+    Returns the most a single card can add to the value of a purchase under the given policy.
+
+    :param policy: name of a registered policy
+    :type policy: str
+    :return: most_per_card of the policy, the largest card reward if no policy of that name is registered
+    :rtype: int
+    """
+    valuation = POLICIES.get(policy)
+    return MAX_CARD_REWARD if valuation is None else valuation.most_per_card
+
+
+def purchase_upper_bound(cards: Cards, wallet: PebbleCollection, policy: str = "purchase-points") -> int:
+    """
+    Returns a value no purchase of the given cards with the given wallet can exceed under the policy.
+    See _bound_from_costs.
+
+    :param cards: visible cards
+    :type cards: Cards
+    :param wallet: player's wallet
+    :type wallet: PebbleCollection
+    :param policy: name of a registered policy
+    :type policy: str
+    :return: upper bound on the points (or the number of cards) of the best purchase
+    :rtype: int
+    """
+    row = cards.affordability
+    costs = [row.requirements[position] for position in row.positions(row.affordable(wallet.counts))]
+    return _bound_from_costs(costs, sum(wallet.counts), most_per_card(policy))
+
+
+def _bound_from_costs(costs: List[Tuple[int, ...]], wallet_size: int, most: int) -> int:
+    """
+    Admissible bound on the value of a purchase, given the costs of the cards the wallet can afford on their own:
+    no more of them can be bought than there are, nor more than the wallet size over the cost of the cheapest one,
+    and none of them adds more than most.
+    """
+    if not costs:
+        return 0
+    cheapest = min(sum(cost) for cost in costs)
+    if cheapest == 0:
+        return len(costs) * most
+    return min(len(costs), wallet_size // cheapest) * most
+
+
+def find_best_purchase(
+    cards: Cards,
+    wallet: PebbleCollection,
+    bank: PebbleCollection,
+    policy: str = "purchase-points",
+    stats: Optional[PurchaseSearchStats] = None,
+    cache: Optional[PurchaseCache] = None,
+) -> Optional[PurchaseSequence]:
+    """
+    Finds the purchase Strategy.best_purchase picks among the candidates of find_all_possible_purchase,
+    without building a PurchaseSequence for every sequence of cards.
+
+    The search follows the tree search_all_possible walks. That search pops each card it buys from the list
+    it is iterating, so at every level it buys the 1st, 3rd, 5th, ... affordable card, and the cards left after
+    buying the (2k+1)-th one are the affordable ones minus the 1st, 3rd, ..., (2k+1)-th. A state is therefore the
+    bitmask of the cards left together with the remaining wallet. The best value any continuation of a state can
+    add is computed by dynamic programming and memoized per state, and only the sequences that reach the best
+    value are walked, in the order search_all_possible finds them and without sequences equal to earlier ones.
+    They are then broken the way Strategy.tie_break_card_purchase breaks candidates without an exchange:
+    the first sequence that no later one is less than, as a list of cards.
+    While the best value of a state is computed, purchases whose upper bound (see _bound_from_costs) cannot beat
+    the value found so far are not searched; this never changes the value.
+    Both walks make and unmake their purchases on one SearchState, whose wallet key and trail stand in for
+    the wallet and the path of a state, so no collection or path is built per state.
+    If a cache is given, a purchase already picked for the same cards and wallet is rebuilt without searching.
+
+    :param cards: visible cards
+    :type cards: Cards
+    :param wallet: player's wallet
+    :type wallet: PebbleCollection
+    :param bank: game bank
+    :type bank: PebbleCollection
+    :param policy: name of a registered policy
+    :type policy: str
+    :param stats: statistics to count the work in, if any
+    :type stats: Optional[PurchaseSearchStats]
+    :param cache: cache of picked purchases to look the purchase up in and to add it to, if any
+    :type cache: Optional[PurchaseCache]
+    :return: the best purchase, None if no card can be bought
+    :rtype: Optional[PurchaseSequence]
+    """
+    if policy not in POLICIES:
+        return None
+    visible = cards.cards
+    row = cards.affordability
+    if cache is not None:
+        cache_key = (policy, tuple(row.keys), wallet.pack())
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return purchase_along(visible, cached, wallet, bank) if cached else None
+    picked = _search_best_purchase(visible, row, wallet, bank, policy, stats)
+    if cache is not None:
+        cache.put(cache_key, picked)
+    return purchase_along(visible, picked, wallet, bank) if picked else None
+
+
+def _search_best_purchase(
+    visible: List[Card],
+    row: AffordabilityIndex,
+    wallet: PebbleCollection,
+    bank: PebbleCollection,
+    policy: str,
+    stats: Optional[PurchaseSearchStats],
+) -> Tuple[int, ...]:
+    """
+    Runs the search described in find_best_purchase.
+
+    :param visible: visible cards
+    :type visible: List[Card]
+    :param row: affordability index of the visible cards
+    :type row: AffordabilityIndex
+    :param wallet: player's wallet
+    :type wallet: PebbleCollection
+    :param bank: game bank
+    :type bank: PebbleCollection
+    :param policy: name of a registered policy
+    :type policy: str
+    :param stats: statistics to count the work in, if any
+    :type stats: Optional[PurchaseSearchStats]
+    :return: positions of the cards of the best purchase, in buying order, empty if no card can be bought
+    :rtype: Tuple[int, ...]
+    """
+    if stats is None:
+        stats = PurchaseSearchStats()
+    stats.searches += 1
+    valuation = POLICIES[policy]
+    most = valuation.most_per_card
+    costs = row.requirements
+    state = SearchState.start(wallet.counts, bank.counts)
+    values = {}
+
+    def gain(index: int) -> int:
+        remaining = sum(state.wallet) - sum(costs[index])
+        return valuation.card_value(remaining, visible[index].happy_face)
+
+    def moves(left: int) -> List[Tuple[int, int]]:
+        matching = row.positions(row.affordable(state.wallet) & left)
+        next_moves = []
+        for position in range(0, len(matching), 2):
+            next_left = 0
+            for kept in matching[1:position:2] + matching[position + 1:]:
+                next_left |= 1 << kept
+            next_moves.append((matching[position], next_left))
+        return next_moves
+
+    def bound(left: int) -> int:
+        affordable = row.positions(row.affordable(state.wallet) & left)
+        return _bound_from_costs([costs[position] for position in affordable], sum(state.wallet), most)
+
+    def best(left: int) -> int:
+        memo = (left, state.key)
+        value = values.get(memo)
+        if value is None:
+            value = 0
+            for index, next_left in moves(left):
+                points = gain(index)
+                state.apply_purchase(index, costs[index])
+                if points + bound(next_left) <= value:
+                    stats.branches_pruned += 1
+                else:
+                    value = max(value, points + best(next_left))
+                state.undo_purchase()
+            values[memo] = value
+            stats.states += 1
+        return value
+
+    everything = (1 << len(visible)) - 1
+    optimum = best(everything)
+    if optimum == 0:
+        return ()
+
+    candidates = []
+    seen = set()
+
+    def walk(left: int, points: int) -> None:
+        for index, next_left in moves(left):
+            next_points = points + gain(index)
+            state.apply_purchase(index, costs[index])
+            if next_points + bound(next_left) >= optimum and next_points + best(next_left) >= optimum:
+                if next_points == optimum:
+                    path = state.path()
+                    key = tuple(visible[position].key for position in path)
+                    if key not in seen:
+                        seen.add(key)
+                        candidates.append(path)
+                walk(next_left, next_points)
+            state.undo_purchase()
+
+    walk(everything, 0)
+    picked = candidates[0]
+    picked_cards = [visible[index] for index in picked]
+    for path in candidates[1:]:
+        path_cards = [visible[index] for index in path]
+        if path_cards < picked_cards:
+            picked, picked_cards = path, path_cards
+    return picked
+
+
+def purchase_along(visible: List[Card], path: Tuple[int, ...], wallet: PebbleCollection, bank: PebbleCollection):
+    """
+    Builds the PurchaseSequence that buying the cards at the given positions in order leads to, the same one
+    chaining purchase_card would build, but without a wallet and a bank for every card in between: the pebbles
+    leave the wallet first-come first-served and join the bank in buying order either way.
+
+    :param visible: visible cards
+    :type visible: List[Card]
+    :param path: positions of the cards to buy, in buying order
+    :type path: Tuple[int, ...]
+    :param wallet: player's wallet before the purchase
+    :type wallet: PebbleCollection
+    :param bank: game bank before the purchase
+    :type bank: PebbleCollection
+    :return: the purchase
+    :rtype: PurchaseSequence
+    """
+    bought = [visible[position] for position in path]
+    remaining = len(wallet.pebbles)
+    points = 0
+    for card in bought:
+        remaining -= len(card.pebbles.pebbles)
+        points += RuleBook.card_reward(remaining, card.happy_face)
+    spent = PebbleCollection.from_trusted(
+        tuple(pebble for card in bought for pebble in card.pebbles.pebbles),
+        tuple(map(sum, zip(*(card.pebbles.counts for card in bought)))),
+    )
+    return PurchaseSequence(sequence=Cards(cards=bought), points=points, wallet=wallet - spent, bank=bank + spent)
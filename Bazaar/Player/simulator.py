@@ -0,0 +1,405 @@
+import random
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from Bazaar.Common.data import CARD_COUNT, MAX_EXCHANGE_DEPTH, PEBBLE_COUNT, WIN_SCORE
+from Bazaar.Common.equations import DirectedTrade
+from Bazaar.Common.pebble import init_bank
+from Bazaar.Common.rule_book import RuleBook
+
+Counts = Tuple[int, ...]
+# A card as the simulator sees it: Card.key, the count vector of its cost and its happy face
+SimCard = Tuple[Counts, bool]
+# What a card adds to a purchase, given the pebbles left after buying it and its face (PurchasePolicy.card_value)
+CardValue = Callable[[int, bool], int]
+# A turn: the trade path of the exchange (None to draw a pebble) and the cards to buy, in order
+Move = Tuple[Optional[Tuple[int, ...]], Tuple[SimCard, ...]]
+
+STARTING_BANK = init_bank().counts
+VISIBLE_CARDS = 4
+
+
+def can_pay(cost: Sequence[int], wallet: Sequence[int]) -> bool:
+    """
+    Checks whether a wallet holds at least the given count vector.
+
+    :param cost: count vector to pay
+    :type cost: Sequence[int]
+    :param wallet: count vector of the wallet
+    :type wallet: Sequence[int]
+    :return: True if every color of the wallet covers the cost
+    :rtype: bool
+    """
+    for needed, held in zip(cost, wallet):
+        if needed > held:
+            return False
+    return True
+
+
+class Simulator:
+    """
+    Pydantic-free copy of a Bazaar game on count vectors, fast enough to play whole turns thousands of times.
+    It follows the referee: an exchange removes the last card of the deck (or, once the deck is empty, the last
+    visible card), a drawn pebble is the first color the bank holds, bought cards are removed from the row and
+    replaced from the front of the deck, and the game is checked for its end after the exchange and after the
+    purchase of every turn. Seats are numbered in play order; turn is the seat of the active player.
+
+    :param trades: directed trades of the game, in CompiledEquations order
+    :type trades: Sequence[DirectedTrade]
+    :param bank: count vector of the bank
+    :type bank: List[int]
+    :param wallets: count vector of the wallet of every seat
+    :type wallets: List[List[int]]
+    :param scores: score of every seat
+    :type scores: List[int]
+    :param visible: visible cards, in row order
+    :type visible: List[SimCard]
+    :param deck: invisible cards, the next card to be revealed first
+    :type deck: List[SimCard]
+    :param turn: seat of the active player
+    :type turn: int
+    :param moves: greedy moves found so far, by the state they were found for; games copied or sampled from one
+    another may share it, since a greedy move only depends on that state
+    :type moves: Dict[Hashable, Move]
+    """
+
+    __slots__ = ("trades", "bank", "wallets", "scores", "visible", "deck", "turn", "moves")
+
+    def __init__(
+        self,
+        trades: Sequence[DirectedTrade],
+        bank: List[int],
+        wallets: List[List[int]],
+        scores: List[int],
+        visible: List[SimCard],
+        deck: List[SimCard],
+        turn: int = 0,
+        moves: Optional[Dict[Hashable, Move]] = None,
+    ):
+        self.trades = trades
+        self.bank = bank
+        self.wallets = wallets
+        self.scores = scores
+        self.visible = visible
+        self.deck = deck
+        self.turn = turn
+        self.moves = moves if moves is not None else {}
+
+    @classmethod
+    def sample(
+        cls,
+        trades: Sequence[DirectedTrade],
+        bank: Counts,
+        wallet: Counts,
+        scores: Sequence[int],
+        visible: Sequence[SimCard],
+        rng: random.Random,
+        moves: Optional[Dict[Hashable, Move]] = None,
+    ) -> "Simulator":
+        """
+        Builds a game consistent with what the active player sees, drawing what it does not see at random.
+        The pebbles in neither the bank nor the active wallet are dealt to the other players one by one, and
+        the deck is made of random cards: none if the row is no longer full, otherwise up to all the cards
+        not dealt to the row.
+
+        :param trades: directed trades of the game
+        :type trades: Sequence[DirectedTrade]
+        :param bank: count vector of the bank
+        :type bank: Tuple[int, ...]
+        :param wallet: count vector of the active player's wallet
+        :type wallet: Tuple[int, ...]
+        :param scores: score of every player, the active one first, then in play order
+        :type scores: Sequence[int]
+        :param visible: visible cards, in row order
+        :type visible: Sequence[SimCard]
+        :param rng: random number generator for the hidden parts
+        :type rng: random.Random
+        :param moves: greedy moves already found, shared with the games sampled before
+        :type moves: Optional[Dict[Hashable, Move]]
+        :return: game with the active player in seat 0
+        :rtype: Simulator
+        """
+        wallets = [list(wallet)] + [[0] * len(wallet) for _ in scores[1:]]
+        if len(wallets) > 1:
+            for color, total in enumerate(STARTING_BANK):
+                for _ in range(max(0, total - bank[color] - wallet[color])):
+                    wallets[rng.randrange(1, len(wallets))][color] += 1
+        deck = []
+        if len(visible) == VISIBLE_CARDS:
+            for _ in range(rng.randint(0, CARD_COUNT - VISIBLE_CARDS)):
+                colors = [0] * len(wallet)
+                for _ in range(PEBBLE_COUNT):
+                    colors[rng.randrange(len(colors))] += 1
+                deck.append((tuple(colors), rng.random() < 0.5))
+        return cls(trades, list(bank), wallets, list(scores), list(visible), deck, 0, moves)
+
+    def copy(self) -> "Simulator":
+        """
+        Returns a copy of this game that can be played without changing it.
+
+        :return: copy of this game
+        :rtype: Simulator
+        """
+        return Simulator(
+            self.trades,
+            list(self.bank),
+            [list(wallet) for wallet in self.wallets],
+            list(self.scores),
+            list(self.visible),
+            list(self.deck),
+            self.turn,
+            self.moves,
+        )
+
+    def allowed_trades(self, wallet: Sequence[int], bank: Sequence[int]) -> List[int]:
+        """
+        Returns the indices of the trades a wallet and a bank allow.
+
+        :param wallet: count vector of the wallet
+        :type wallet: Sequence[int]
+        :param bank: count vector of the bank
+        :type bank: Sequence[int]
+        :return: indices of the allowed trades, in table order
+        :rtype: List[int]
+        """
+        return [index for index, trade in enumerate(self.trades) if trade.allowed(wallet, bank)]
+
+    def exchange(self, path: Sequence[int]) -> None:
+        """
+        Makes the trades at the given indices for the active player and removes a card, as the referee does.
+
+        :param path: indices of the trades, in order
+        :type path: Sequence[int]
+        """
+        wallet, bank = self.wallets[self.turn], self.bank
+        for index in path:
+            trade = self.trades[index]
+            for color, amount in enumerate(trade.delta):
+                wallet[color] += amount
+                bank[color] -= amount
+        if self.deck:
+            self.deck.pop()
+        elif self.visible:
+            self.visible.pop()
+
+    def draw(self) -> bool:
+        """
+        Gives the active player the first color the bank holds.
+
+        :return: True if a pebble was drawn, False if the bank is empty
+        :rtype: bool
+        """
+        for color, count in enumerate(self.bank):
+            if count:
+                self.bank[color] -= 1
+                self.wallets[self.turn][color] += 1
+                return True
+        return False
+
+    def purchase(self, cards: Sequence[SimCard]) -> int:
+        """
+        Buys the given cards for the active player, in order, and refills the row. A card that is no longer
+        visible, or that the wallet cannot pay for by then, is skipped.
+
+        :param cards: cards to buy
+        :type cards: Sequence[SimCard]
+        :return: points the purchase earned
+        :rtype: int
+        """
+        wallet, bank = self.wallets[self.turn], self.bank
+        points = 0
+        bought = 0
+        for card in cards:
+            cost, happy_face = card
+            if card not in self.visible or not can_pay(cost, wallet):
+                continue
+            self.visible.remove(card)
+            for color, amount in enumerate(cost):
+                wallet[color] -= amount
+                bank[color] += amount
+            points += RuleBook.card_reward(sum(wallet), happy_face)
+            bought += 1
+        for _ in range(min(bought, len(self.deck))):
+            self.visible.append(self.deck.pop(0))
+        self.scores[self.turn] += points
+        return points
+
+    def play(self, move: Move) -> None:
+        """
+        Plays a whole turn of the active player: the exchange (or the draw), then, unless that ended the game,
+        the purchase, after which the next seat is active.
+
+        :param move: trade path, None to draw a pebble, and cards to buy
+        :type move: Move
+        """
+        path, cards = move
+        if path is None:
+            self.draw()
+        else:
+            self.exchange(path)
+        if self.is_over():
+            return
+        self.purchase(cards)
+        self.turn = (self.turn + 1) % len(self.wallets)
+
+    def is_over(self) -> bool:
+        """
+        Checks the end of the game the way RuleBook.is_game_over does: the player who played last reached
+        the winning score, the row is empty, or the bank is empty and some player cannot buy any card of the deck.
+
+        :return: True if the game is over
+        :rtype: bool
+        """
+        if self.scores[(self.turn - 1) % len(self.scores)] >= WIN_SCORE:
+            return True
+        if not self.visible:
+            return True
+        if not any(self.bank):
+            for wallet in self.wallets:
+                if not any(can_pay(cost, wallet) for cost, _ in self.deck):
+                    return True
+        return False
+
+    @staticmethod
+    def best_purchase(wallet: Sequence[int], visible: Sequence[SimCard], value: CardValue) -> Tuple[Tuple[SimCard, ...], int]:
+        """
+        Greedy purchase: repeatedly buys the affordable card that adds the most, the first one among equals.
+
+        :param wallet: count vector of the wallet
+        :type wallet: Sequence[int]
+        :param visible: visible cards
+        :type visible: Sequence[SimCard]
+        :param value: what a card adds to the purchase
+        :type value: CardValue
+        :return: cards bought, in order, and the value of the purchase
+        :rtype: Tuple[Tuple[SimCard, ...], int]
+        """
+        wallet = list(wallet)
+        left = sum(wallet)
+        bought = []
+        total = 0
+        while True:
+            best, best_gain = None, -1
+            for position, (cost, happy_face) in enumerate(visible):
+                if position in bought or not can_pay(cost, wallet):
+                    continue
+                gain = value(left - sum(cost), happy_face)
+                if gain > best_gain:
+                    best, best_gain = position, gain
+            if best is None:
+                return tuple(visible[position] for position in bought), total
+            bought.append(best)
+            total += best_gain
+            for color, amount in enumerate(visible[best][0]):
+                wallet[color] -= amount
+            left = sum(wallet)
+
+    def greedy_move(self, value: CardValue) -> Move:
+        """
+        Move of a greedy player in the active seat, on the model of Strategy: it trades whenever it can, keeps
+        adding the trade that most improves the purchase that follows (up to MAX_EXCHANGE_DEPTH trades and
+        as long as one does), then buys greedily. It draws a pebble only if no trade is possible.
+
+        :param value: what a card adds to a purchase of the player
+        :type value: CardValue
+        :return: move of the player
+        :rtype: Move
+        """
+        key = (tuple(self.wallets[self.turn]), tuple(self.bank), tuple(self.visible), not self.deck, value)
+        move = self.moves.get(key)
+        if move is None:
+            move = self.moves[key] = self.__greedy_move(value)
+        return move
+
+    def __greedy_move(self, value: CardValue) -> Move:
+        """
+        Finds the greedy move of the active seat, without looking it up in moves.
+        """
+        wallet, bank = self.wallets[self.turn], self.bank
+        visible = self.visible[:-1] if not self.deck and self.visible else self.visible
+        path, traded, _ = greedy_exchange(self.trades, wallet, bank, visible, value)
+        if path:
+            return path, self.best_purchase(traded, visible, value)[0]
+        drawn = list(wallet)
+        for color, count in enumerate(bank):
+            if count:
+                drawn[color] += 1
+                break
+        return None, self.best_purchase(drawn, self.visible, value)[0]
+
+    def rollout(self, value: CardValue, turns: int) -> None:
+        """
+        Lets every player play greedy moves for the given number of turns or until the game is over.
+
+        :param value: what a card adds to a purchase of any player
+        :type value: CardValue
+        :param turns: number of turns to play
+        :type turns: int
+        """
+        for _ in range(turns):
+            if self.is_over():
+                return
+            self.play(self.greedy_move(value))
+
+    def outcome(self, seat: int) -> float:
+        """
+        Value of the game for a seat, between 0 and 1: 1 for a win (ties win, as in RuleBook.get_highest_score)
+        and 0 for a loss if the game is over, otherwise 0.5 plus half the lead over the best other player,
+        relative to the winning score.
+
+        :param seat: seat to value the game for
+        :type seat: int
+        :return: value of the game
+        :rtype: float
+        """
+        others = [score for other, score in enumerate(self.scores) if other != seat]
+        best_other = max(others) if others else 0
+        if self.is_over():
+            return 1.0 if self.scores[seat] >= best_other else 0.0
+        lead = (self.scores[seat] - best_other) / (2 * WIN_SCORE)
+        return min(1.0, max(0.0, 0.5 + lead))
+
+
+def greedy_exchange(
+    trades: Sequence[DirectedTrade],
+    wallet: Sequence[int],
+    bank: Sequence[int],
+    visible: Sequence[SimCard],
+    value: CardValue,
+) -> Tuple[Tuple[int, ...], List[int], List[int]]:
+    """
+    Exchange of the greedy player model: the first trade that most improves the greedy purchase of the visible
+    cards, then more such trades while one strictly improves it, up to MAX_EXCHANGE_DEPTH trades.
+
+    :param trades: directed trades of the game
+    :type trades: Sequence[DirectedTrade]
+    :param wallet: count vector of the wallet
+    :type wallet: Sequence[int]
+    :param bank: count vector of the bank
+    :type bank: Sequence[int]
+    :param visible: cards the purchase after the exchange may buy
+    :type visible: Sequence[SimCard]
+    :param value: what a card adds to a purchase
+    :type value: CardValue
+    :return: indices of the trades (empty if none is allowed), and the wallet and the bank after them
+    :rtype: Tuple[Tuple[int, ...], List[int], List[int]]
+    """
+    wallet, bank = list(wallet), list(bank)
+    path = []
+    current = -1
+    for _ in range(MAX_EXCHANGE_DEPTH):
+        best, best_value = None, current
+        for index, trade in enumerate(trades):
+            if not trade.allowed(wallet, bank):
+                continue
+            traded = [held + amount for held, amount in zip(wallet, trade.delta)]
+            traded_value = Simulator.best_purchase(traded, visible, value)[1]
+            if traded_value > best_value:
+                best, best_value = index, traded_value
+        if best is None:
+            break
+        path.append(best)
+        current = best_value
+        for color, amount in enumerate(trades[best].delta):
+            wallet[color] += amount
+            bank[color] -= amount
+    return tuple(path), wallet, bank
@@ -1,12 +1,15 @@
-from typing import List, Set, Optional
+from concurrent.futures import Executor
+from typing import Dict, List, Set, Optional
 from xml.etree.ElementInclude import include
 
-from pydantic import BaseModel, conint
+from pydantic import BaseModel, ConfigDict, Field, conint
 import queue
 from copy import copy
 
 from Bazaar.Common.turn_state import TurnState
+from Bazaar.Player.budget import SearchBudget
 from Bazaar.Player.exchanges import *
+from Bazaar.Player.policies import get_policy
 from Bazaar.Player.purchases import *
 
 
@@ -16,150 +19,144 @@ class Strategy(BaseModel):
     Currently,  there are two greedy strategies, one pick for card purchase that maximize the number of points, the
     other pick for maximize number of cards
 
+    A strategy can be kept for a whole game and pointed at each new turn with start_turn, so its caches stay warm
+    across turns; reset drops them when the game is over.
+
     equations: equations for exchange
+    turn_state: state of the turn being played, None between games
     cards: cards for purchase
+    exchange_cache: cache of exchange searches, shared by every Strategy given the same cache
+    (the process-wide cache if not given)
+    purchase_cache: cache of the purchases picked for a row of cards and a wallet, None to search every time
+    budget: limit on the time or nodes spent choosing exchanges, None for an exhaustive search
+    executor: process pool to evaluate exchanges on, sharded by first trade; only used without a budget
+    search_stats: counters of the purchase searches and of the exchanges pruned by their upper bound
     """
 
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     equations: Equations
-    turn_state: TurnState
+    turn_state: Optional[TurnState] = None
     policy: str
     points_received: int = 0
     num_cards_bought: int = 0
+    exchange_cache: Optional[ReachableCache] = None
+    purchase_cache: Optional[PurchaseCache] = None
+    budget: Optional[SearchBudget] = None
+    executor: Optional[Executor] = None
+    search_stats: PurchaseSearchStats = Field(default_factory=PurchaseSearchStats)
+
+    def start_turn(
+        self,
+        turn_state: TurnState,
+        budget: Optional[SearchBudget] = None,
+        executor: Optional[Executor] = None,
+    ) -> "Strategy":
+        """
+        Points this strategy at a new turn, keeping its equations and caches.
+
+        :param turn_state: state of the turn to play
+        :type turn_state: TurnState
+        :param budget: limit on choosing exchanges this turn, None for an exhaustive search
+        :type budget: Optional[SearchBudget]
+        :param executor: process pool to evaluate exchanges on this turn, if any
+        :type executor: Optional[Executor]
+        :return: this strategy
+        :rtype: Strategy
+        """
+        self.turn_state = turn_state
+        self.budget = budget
+        self.executor = executor
+        self.points_received = 0
+        self.num_cards_bought = 0
+        return self
+
+    def reset(self) -> None:
+        """
+        Forgets the last turn and empties the purchase cache, e.g. when the game is over.
+        The exchange cache is left alone, since it may be shared with other strategies.
+        """
+        self.turn_state = None
+        self.budget = None
+        self.executor = None
+        if self.purchase_cache is not None:
+            self.purchase_cache.clear()
+
+    def cache_report(self) -> Dict[str, Dict[str, int]]:
+        """
+        Returns the size and counters of the caches this strategy uses. Next to the stats of a cache, bytes estimates
+        the memory its entries take (see ReachableCache.size_bytes); the number of entries is bounded by max_entries,
+        which Mechanism sets to the max_cache_entries of its PolicyBudget for the purchase cache.
+
+        :return: stats and estimated bytes of the exchange cache and of the purchase cache (empty if there is none),
+            by cache
+        :rtype: Dict[str, Dict[str, int]]
+        """
+        exchange_cache = self.exchange_cache
+        if exchange_cache is None:
+            exchange_cache = self.equations.compile().closure.cache
+        caches = {"exchanges": exchange_cache, "purchases": self.purchase_cache}
+        return {
+            name: cache.stats() | {"bytes": cache.size_bytes()} if cache is not None else {}
+            for name, cache in caches.items()
+        }
 
     def tie_break_card_purchase(
         self, candidates: List[Tuple[Exchange, PurchaseSequence]]
     ):
         """
-        Perform a tie-breaking process on a given candidates based on purchase sequences. Return anytime if there is
-        only one candidates left
+        Perform a tie-breaking process on a given candidates based on purchase sequences.
         First, it performs tie breaking of highest number of points.
         Second, it performs tie breaking of  largest number of remaining pebbles in the player’s wallet.
         Then it  performs tie breaking of smallest wallet in exchange
         Finally, it performs tie breaking of smallest sequence of cards
+        The key of every candidate is computed once, and the candidates with the smallest key are kept.
         :param candidates: list of best so-far candidate
         :type candidates:List[Tuple[Exchange, PurchaseSequence]]
         :return: candidates that pass tie-breaks
         :rType: List[Tuple[Exchange, PurchaseSequence]]
         """
-        while len(candidates) > 1:
-            candidates = self.__filter_card_by_highest_score(candidates)
-            if len(candidates) == 1:
-                break
-            candidates = self.__filter_card_sequences_by_remaining_pebbles(candidates)
-            if len(candidates) == 1:
-                break
-            candidates = self.__filter_card_sequences_by_wallet(candidates)
-            if len(candidates) == 1:
-                break
-            candidates = self.__filter_card_sequences_by_lengths(candidates)
-
-        return candidates
-
-    def __filter_card_by_highest_score(
-        self, candidates: List[Tuple[Exchange, PurchaseSequence]]
-    ) -> List[Tuple[Exchange, PurchaseSequence]]:
-        """
-        Filters the candidates based on the highest score .eliminates any candidates that do not have the highest scores.
-
-        :param candidates: list of best so-far candidates
-        :type candidates: List[Tuple[Exchange, PurchaseSequence]]
-        :return: Filtered list of candidates with the highest score
-        :rtype: List[Tuple[Exchange, PurchaseSequence]]
-        """
-        highest_score = 0
-        filtered_candidates = []
-
-        for exchange, sequence in candidates:
-            current_score = sequence.get_purchase_sequence_score(exchange.wallet)
-            if current_score == highest_score:
-                filtered_candidates.append((exchange, sequence))
-            elif current_score > highest_score:
-                highest_score = current_score
-                filtered_candidates = [(exchange, sequence)]
-        return filtered_candidates
-
-    def __filter_card_sequences_by_remaining_pebbles(
-        self, candidates: List[Tuple[Exchange, PurchaseSequence]]
-    ) -> List[Tuple[Exchange, PurchaseSequence]]:
-        """
-        Filters the candidates based on the wallet the player will be left with after purchasing it.
-
-        :param candidates: list of best so-far candidate
-        :type candidates: List[Tuple[Exchange, PurchaseSequence]]
-        :param wallet: current player's wallet
-        :type wallet: PebbleCollection
-        :return: Filtered list of candidates that leave the player with the most pebbles
-        :rtype: List[Tuple[Exchange, PurchaseSequence]]
+        if len(candidates) <= 1:
+            return candidates
+        keys = [self.card_purchase_key(exchange, sequence) for exchange, sequence in candidates]
+        best = min(keys)
+        return [candidate for candidate, key in zip(candidates, keys) if key == best]
+
+    @staticmethod
+    def card_purchase_key(exchange: Exchange, sequence: PurchaseSequence) -> Tuple:
         """
-        best_wallet_remaining = 0
-        filtered_candidates = []
-        for exchange, sequence in candidates:
-            remaining_wallet = sequence.get_purchase_sequence_remaining_pebbles(
-                exchange.wallet
-            )
-            if len(remaining_wallet.pebbles) == best_wallet_remaining:
-                filtered_candidates.append((exchange, sequence))
-            elif len(remaining_wallet.pebbles) > best_wallet_remaining:
-                best_wallet_remaining = len(remaining_wallet.pebbles)
-                filtered_candidates = [(exchange, sequence)]
-        return filtered_candidates
-
-    def __filter_card_sequences_by_wallet(
-        self, candidates: List[Tuple[Exchange, PurchaseSequence]]
-    ) -> List[Tuple[Exchange, PurchaseSequence]]:
-        """
-        Filters the candidates based on the smallest wallet.
+        Returns the tie-break key of a purchase after an exchange; smaller keys are preferred.
+        The key holds the negated score, the negated number of remaining pebbles, the wallet after the exchange
+        and the list of cards bought. Wallets are totally ordered, so min over keys keeps the candidates the filters
+        used to keep one after the other; lists of cards are compared last, the way the filters compared them.
 
-        :param candidates: list of best so-far candidates
-        :type candidates: List[Tuple[Exchange, PurchaseSequence]]
-        :return: Filtered list of candidates with the smallest wallet
-        :rtype: List[Tuple[Exchange, PurchaseSequence]]
-        """
-        first_exchange = candidates[0]
-        smallest_wallet = first_exchange[0].wallet
-        filtered_candidates = []
-
-        for exchange, sequence in candidates:
-            current_wallet = exchange.wallet
-            if current_wallet == smallest_wallet:
-                filtered_candidates.append((exchange, sequence))
-            elif current_wallet < smallest_wallet:
-                smallest_wallet = current_wallet
-                filtered_candidates = [(exchange, sequence)]
-        return filtered_candidates
-
-    def __filter_card_sequences_by_lengths(
-        self, candidates: List[Tuple[Exchange, PurchaseSequence]]
-    ) -> List[Tuple[Exchange, PurchaseSequence]]:
-        """
-        Filters the candidates based on the smallest card sequence.
+        The remaining pebbles are the size of the wallet after the exchange: that is what
+        get_purchase_sequence_remaining_pebbles reported for every best purchase, because is_purchasable consumes
+        the card list the subtraction then walks. The key keeps that value, so the same candidates win.
 
-        :param candidates: list of best so-far candidates
-        :type candidates: List[Tuple[Exchange, PurchaseSequence]]
-        :return: Filtered list of candidates with the smallest card sequence
-        :rtype: List[Tuple[Exchange, PurchaseSequence]]
+        :param exchange: exchange made before the purchase
+        :type exchange: Exchange
+        :param sequence: purchase made after the exchange
+        :type sequence: PurchaseSequence
+        :return: tie-break key
+        :rtype: Tuple
         """
-        smallest_sequence_length = min(
-            [sequence.sequence.cards for _, sequence in candidates]
+        return (
+            -sequence.get_purchase_sequence_score(exchange.wallet),
+            -len(exchange.wallet.pebbles),
+            exchange.wallet,
+            sequence.sequence.cards,
         )
 
-        filtered_candidates = [
-            (exchange, sequence)
-            for exchange, sequence in candidates
-            if sequence.sequence.cards == smallest_sequence_length
-        ]
-
-        return filtered_candidates
-
     def tie_break_exchange_and_purchase(
         self, candidates: Optional[List[Tuple[Exchange, PurchaseSequence]]]
     ):
         """
-        Perform a tie-breaking process on a given candidates based on purchase sequences. Return anytime if there is
-        only one candidates left
+        Perform a tie-breaking process on a given candidates based on purchase sequences.
         First, it picks the ones that need the smallest number of trades
         Then it performs tie breaking of based one card purchase
         Finally, it pick the one that uses the smallest pebble-exchanges.
+        The winner is picked by a single min over keys computed once per candidate.
         :param candidates: list of best so-far candidate
         :type candidates:List[Tuple[Exchange, PurchaseSequence]]
         :return: candidates that pass tie-breaks
@@ -167,75 +164,32 @@ class Strategy(BaseModel):
         """
         if len(candidates) == 0:
             return None
-        while len(candidates) > 1:
-            candidates = self.__filter_smallest_exchange_length(candidates)
-            if len(candidates) == 1:
-                break
-            candidates = self.tie_break_card_purchase(candidates)
-            if len(candidates) == 1:
-                break
-            candidates = self.filter_smallest_exchange_pebble(candidates)
-        return candidates[0]
-
-    def __filter_smallest_exchange_length(
-        self, candidates: List[Tuple[Exchange, PurchaseSequence]]
-    ) -> List[Tuple[Exchange, PurchaseSequence]]:
-        """
-        Filters the candidates by selecting the ones with the smallest number of pebble_exchanges,
-
-        :param candidates:  list of best so-far candidates
-        :type candidates: List[Tuple[Exchange, PurchaseSequence]]
-        :return: Filtered list of candidates with the smallest exchange sequence length
-        :rtype: List[Tuple[Exchange, PurchaseSequence]]
-        """
-        smallest_sequence_length = min(
-            len(exchange.pebble_exchanges) for exchange, purchase in candidates
+        fewest_trades = min(len(exchange.pebble_exchanges) for exchange, _ in candidates)
+        return min(
+            (candidate for candidate in candidates if len(candidate[0].pebble_exchanges) == fewest_trades),
+            key=self.exchange_purchase_key,
         )
-        filtered_candidates = [
-            candidate
-            for candidate in candidates
-            if len(candidate[0].pebble_exchanges) == smallest_sequence_length
-        ]
-        return filtered_candidates
 
-    def __filter_smallest_pebble_exchange(
-        self, candidates: List[Tuple[Exchange, PurchaseSequence]]
-    ) -> List[Tuple[Exchange, PurchaseSequence]]:
+    @classmethod
+    def exchange_purchase_key(cls, candidate: Tuple[Exchange, PurchaseSequence]) -> Tuple:
         """
-        Filters the candidates by selecting the ones with the smallest pebble_exchanges in exchange
-
-        :param candidates:  list of best so-far candidates
-        :type candidates: List[Tuple[Exchange, PurchaseSequence]]
-        :return: Filtered list of candidates with the smallest pebble exchanges
-        :rtype: List[Tuple[Exchange, PurchaseSequence]]
-        """
-
-        exchanges_with_smallest_pebbles = candidates[0]
-        filtered_candidates = []
-
-        for exchange, sequence in candidates:
-            if exchange.less_pebble_exchange(exchanges_with_smallest_pebbles):
-                exchanges_with_smallest_pebbles = exchange
-                filtered_candidates = [(exchange, sequence)]
-        return filtered_candidates
-
-    def __populate_exchange_n_purchase(
-        self, exchange: Exchange, purchase_sequences: list[PurchaseSequence]
-    ) -> list[tuple[Exchange, PurchaseSequence]]:
+        Returns the tie-break key of an exchange and the purchase after it; smaller keys are preferred.
+        The key is the number of trades, then the card_purchase_key of the purchase, then the trades themselves.
+        Exchanges of one turn end at distinct wallets, so the trades only matter to candidates of other origins.
+        The number of trades is cheap and usually decides, so tie_break_exchange_and_purchase only computes
+        the keys of the candidates with the fewest trades.
+
+        :param candidate: exchange and the purchase after it
+        :type candidate: Tuple[Exchange, PurchaseSequence]
+        :return: tie-break key
+        :rtype: Tuple
         """
-        Populates a list of tuples, each containing an exchange and a purchase sequence from the pass in purchase_sequnces.
-
-        :param exchange: The current exchange
-        :type exchange: Exchange
-        :param purchase_sequences: PurchaseSequences conatain a list of purchase sequences to pair with the exchange
-        :type purchase_sequences: list(PurchaseSequence)
-        :return: A list of tuples, each containing the exchange and a purchase sequence
-        :rtype: List[Tuple[Exchange, PurchaseSequence]]
-        """
-        exchange_n_purchase = []
-        for purchase_sequence in purchase_sequences:
-            exchange_n_purchase.append((exchange, purchase_sequence))
-        return exchange_n_purchase
+        exchange, sequence = candidate
+        return (
+            (len(exchange.pebble_exchanges),)
+            + cls.card_purchase_key(exchange, sequence)
+            + (exchange.pebble_exchanges,)
+        )
 
     def get_purchase(self, turn_state: TurnState) -> PurchaseSequence:
         """
@@ -255,17 +209,10 @@ class Strategy(BaseModel):
         :return: best purchase
         :rtype: PurchaseSequence
         """
-        candidates = find_all_possible_purchase(cards, player_wallet, bank, self.policy)
-        if not candidates:
+        best = find_best_purchase(cards, player_wallet, bank, self.policy, self.search_stats, self.purchase_cache)
+        if best is None:
             return PurchaseSequence(wallet=player_wallet, bank=bank)
-        if len(candidates) == 1:
-            return candidates[0]
-        if len(candidates) > 1:
-            exchange_purchase_set = self.__populate_exchange_n_purchase(
-                Exchange(), candidates
-            )
-            winner = self.tie_break_card_purchase(exchange_purchase_set)[0]
-            return winner[1]
+        return best
 
     def get_trade_purchase(self) -> Optional[tuple[Exchange, PurchaseSequence]]:
         """
@@ -284,31 +231,136 @@ class Strategy(BaseModel):
         """
         player_wallet = self.turn_state.active_player_wallet
         bank = self.turn_state.bank
-        all_exchanges = all_possible_exchanges(self.equations, player_wallet, bank)
+        all_exchanges = all_possible_exchanges(
+            self.equations, player_wallet, bank, self.exchange_cache
+        )
         if not all_exchanges.exchanges:
             if len(bank.pebbles) == 0:
                 return None
             return Exchange(bank=bank, player_wallet=player_wallet), PurchaseSequence(bank=bank, wallet=player_wallet)
-        candidates = []
-        for exchange in all_exchanges.exchanges:
-            best_purchase = self.best_purchase(
-                exchange.bank, self.turn_state.cards, exchange.wallet
-            )
-            if best_purchase:
-                self.add_if_better_exchange_purchase(candidates, (exchange, best_purchase))
+        candidates = self.__evaluate_exchanges(all_exchanges)
         if not candidates:
             return Exchange(bank=bank, player_wallet=player_wallet), PurchaseSequence(bank=bank, wallet=player_wallet)
         rules, cards = self.tie_break_exchange_and_purchase(candidates)
         self.points_received = cards.points
         return rules, cards
 
+    def __evaluate_exchanges(
+        self, all_exchanges: Exchanges
+    ) -> List[Tuple[Exchange, PurchaseSequence]]:
+        """
+        Pairs the exchanges with their best purchases by iterative deepening: all exchanges of one trade are evaluated,
+        then all of two trades, and so on. If the budget runs out within a depth, that depth is dropped and only
+        the exchanges of the completed depths compete, so a node budget always gives the same answer. Without a budget,
+        or when every depth fits in it, the candidates are exactly those of a full evaluation.
+
+        :param all_exchanges: every exchange possible this turn, as listed by all_possible_exchanges
+        :type all_exchanges: Exchanges
+        :return: best candidates among the exchanges of the completed depths
+        :rtype: List[Tuple[Exchange, PurchaseSequence]]
+        """
+        budget = self.budget.start() if self.budget else None
+        if self.executor is not None and budget is None:
+            purchases = self.__evaluate_in_parallel(all_exchanges)
+        else:
+            purchases = self.__evaluate_by_depth(all_exchanges, budget)
+
+        candidates = []
+        for index, exchange in enumerate(all_exchanges.exchanges):
+            if budget and len(exchange.pebble_exchanges) > budget.depth_completed:
+                continue
+            best_purchase = purchases[index]
+            if best_purchase:
+                self.add_if_better_exchange_purchase(candidates, (exchange, best_purchase))
+        return candidates
+
+    def __evaluate_by_depth(
+        self, all_exchanges: Exchanges, budget: Optional[SearchBudget]
+    ) -> Dict[int, Optional[PurchaseSequence]]:
+        """
+        Finds the best purchase after each exchange, one depth at a time, until the budget runs out.
+        Purchases only depend on the wallet an exchange ends at, and all_possible_exchanges lists each reachable
+        wallet once (with its kept trade sequence), so every purchase search here is for a distinct wallet.
+        An exchange whose upper bound is below the best value found so far can never be a candidate,
+        so it is skipped without a purchase search (its purchase is None) and counted in search_stats.
+
+        :param all_exchanges: every exchange possible this turn
+        :type all_exchanges: Exchanges
+        :param budget: started budget, None to evaluate every exchange
+        :type budget: Optional[SearchBudget]
+        :return: best purchase of every evaluated exchange, by its index in all_exchanges
+        :rtype: Dict[int, Optional[PurchaseSequence]]
+        """
+        purchases = {}
+        incumbent = 0
+        for depth in range(1, MAX_EXCHANGE_DEPTH + 1):
+            for index, exchange in enumerate(all_exchanges.exchanges):
+                if len(exchange.pebble_exchanges) != depth:
+                    continue
+                if budget and not budget.spend():
+                    break
+                if purchase_upper_bound(self.turn_state.cards, exchange.wallet, self.policy) < incumbent:
+                    self.search_stats.exchanges_pruned += 1
+                    purchases[index] = None
+                    continue
+                purchases[index] = self.best_purchase(
+                    exchange.bank, self.turn_state.cards, exchange.wallet
+                )
+                incumbent = max(incumbent, self.__purchase_value(purchases[index]))
+            if budget and budget.exhausted:
+                break
+            if budget:
+                budget.depth_completed = depth
+        return purchases
+
+    def __purchase_value(self, purchase: PurchaseSequence) -> int:
+        """
+        Returns the value add_if_better_exchange_purchase compares purchases by under the policy of this strategy.
+
+        :param purchase: purchase to value
+        :type purchase: PurchaseSequence
+        :return: value of the purchase under the registered policy of this strategy
+        :rtype: int
+        """
+        return get_policy(self.policy).value(purchase)
+
+    def __evaluate_in_parallel(self, all_exchanges: Exchanges) -> Dict[int, PurchaseSequence]:
+        """
+        Finds the best purchase after every exchange on the executor, with one task per first trade.
+        The purchases are the same the serial evaluation finds, and they are merged back by index,
+        so the candidates and the tie-breaks see exactly what they would see serially.
+        The search statistics every task counted are added to search_stats.
+
+        :param all_exchanges: every exchange possible this turn
+        :type all_exchanges: Exchanges
+        :return: best purchase of every exchange, by its index in all_exchanges
+        :rtype: Dict[int, PurchaseSequence]
+        """
+        shards = {}
+        for index, exchange in enumerate(all_exchanges.exchanges):
+            first_trade = exchange.pebble_exchanges[0]
+            shards.setdefault((first_trade.lhs.counts, first_trade.rhs.counts), []).append(
+                (index, exchange.wallet, exchange.bank)
+            )
+        futures = [
+            self.executor.submit(evaluate_shard, self.turn_state, self.policy, shard)
+            for shard in shards.values()
+        ]
+        purchases = {}
+        for future in futures:
+            shard_purchases, shard_stats = future.result()
+            purchases.update(shard_purchases)
+            self.search_stats.merge(shard_stats)
+        return purchases
+
     def add_if_better_exchange_purchase(
         self,
         candidates: List[Tuple[Exchange, PurchaseSequence]],
         new: Tuple[Exchange, PurchaseSequence],
     ):
         """
-        Return the new tuple as candidates if the points obtained after purchase are higher, append to existing candidates if equal.
+        Return the new tuple as candidates if its purchase is worth more under the policy, append to existing candidates if equal.
+        all_possible_exchanges lists every wallet once, so the candidates never hold the same exchange twice.
 
         :param candidates: existing candidates
         :type candidates: list[tuple[Exchange, PurchaseSequence]]
@@ -317,16 +369,32 @@ class Strategy(BaseModel):
         :return: new tuple or existing one with new candidate appended
         :rtype: Tuple[Exchange, PurchaseSequence]
         """
-        if self.policy == "purchase-points":
-            if not candidates or new[1].points > candidates[0][1].points:
-                candidates.clear()
-                candidates.append(new)
-            elif new[1].points == candidates[0][1].points:
-                candidates.append(new)
-        elif self.policy == "purchase-size":
-            if not candidates or len(new[1].sequence.cards) > len(candidates[0][1].sequence.cards):
-                candidates.clear()
-                candidates.append(new)
-            elif len(new[1].sequence.cards) == len(candidates[0][1].sequence.cards):
-                if new not in candidates:
-                    candidates.append(new)
+        value = self.__purchase_value(new[1])
+        if not candidates or value > self.__purchase_value(candidates[0][1]):
+            candidates.clear()
+            candidates.append(new)
+        elif value == self.__purchase_value(candidates[0][1]):
+            candidates.append(new)
+
+def evaluate_shard(
+    turn_state: TurnState, policy: str, shard: List[Tuple[int, PebbleCollection, PebbleCollection]]
+) -> Tuple[List[Tuple[int, PurchaseSequence]], PurchaseSearchStats]:
+    """
+    Finds the best purchase after each exchange of a shard, the way Strategy.best_purchase does.
+    Runs in a worker process of Strategy.executor.
+
+    :param turn_state: state of the turn being played
+    :type turn_state: TurnState
+    :param policy: purchase policy of the player
+    :type policy: str
+    :param shard: index, wallet and bank of every exchange in the shard
+    :type shard: List[Tuple[int, PebbleCollection, PebbleCollection]]
+    :return: index and best purchase of every exchange in the shard, and the statistics of their searches
+    :rtype: Tuple[List[Tuple[int, PurchaseSequence]], PurchaseSearchStats]
+    """
+    stats = PurchaseSearchStats()
+    purchases = []
+    for index, wallet, bank in shard:
+        best = find_best_purchase(turn_state.cards, wallet, bank, policy, stats)
+        purchases.append((index, best if best is not None else PurchaseSequence(wallet=wallet, bank=bank)))
+    return purchases, stats
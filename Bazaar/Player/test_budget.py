@@ -0,0 +1,105 @@
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+
+from Bazaar.Common.equations import Equation, Equations
+from Bazaar.Common.turn_state import TurnState
+from Bazaar.Player.budget import SearchBudget
+from Bazaar.Player.exchanges import all_possible_exchanges
+from Bazaar.Player.strategy import Strategy
+
+
+class TestSearchBudget(unittest.TestCase):
+
+    def setUp(self):
+        self.equations = Equations(
+            equations=[
+                Equation.deserialize([["red"], ["blue"]]),
+                Equation.deserialize([["blue", "blue"], ["green", "yellow"]]),
+            ]
+        )
+        self.turn_state = TurnState.deserialize(
+            data={
+                "active": {"score": 0, "wallet": ["red", "red", "green", "white", "white"]},
+                "bank": ["red", "white", "blue", "blue", "green", "yellow"],
+                "cards": [
+                    {"face?": True, "pebbles": ["green", "yellow", "green", "white", "white"]},
+                    {"face?": False, "pebbles": ["blue", "red", "green", "white", "white"]},
+                ],
+                "scores": [0, 0],
+            }
+        )
+
+    def strategy(self, budget=None, executor=None) -> Strategy:
+        return Strategy(
+            equations=self.equations,
+            turn_state=self.turn_state,
+            policy="purchase-points",
+            budget=budget,
+            executor=executor,
+        )
+
+    def test_spend_nodes(self):
+        """Test that a node budget allows exactly max_nodes nodes and stays exhausted."""
+        budget = SearchBudget(max_nodes=2).start()
+        self.assertTrue(budget.spend())
+        self.assertTrue(budget.spend())
+        self.assertFalse(budget.spend())
+        self.assertFalse(budget.spend())
+        self.assertEqual(budget.nodes, 2)
+        self.assertTrue(budget.report()["exhausted"])
+
+        budget.start()
+        self.assertFalse(budget.exhausted)
+        self.assertTrue(budget.spend())
+
+    def test_spend_time(self):
+        """Test that a time budget of zero seconds allows no node."""
+        budget = SearchBudget(seconds=0).start()
+        self.assertFalse(budget.spend())
+        self.assertEqual(budget.report()["nodes"], 0)
+
+    def test_large_budget_matches_exhaustive_search(self):
+        """Test that a budget that is never exhausted does not change the chosen exchange."""
+        budget = SearchBudget(max_nodes=1000)
+        exchange, purchase = self.strategy(budget).get_trade_purchase()
+        expected_exchange, expected_purchase = self.strategy().get_trade_purchase()
+        self.assertEqual(exchange.pebble_exchanges, expected_exchange.pebble_exchanges)
+        self.assertEqual(purchase.points, expected_purchase.points)
+        self.assertFalse(budget.exhausted)
+        self.assertEqual(budget.depth_completed, 4)
+
+    def test_exhausted_budget_keeps_completed_depths(self):
+        """Test that running out of nodes drops the unfinished depth and is deterministic."""
+        exchange, purchase = self.strategy().get_trade_purchase()
+        self.assertEqual(len(exchange.pebble_exchanges), 3)
+
+        budget = SearchBudget(max_nodes=1)
+        exchange, purchase = self.strategy(budget).get_trade_purchase()
+        self.assertTrue(budget.exhausted)
+        self.assertEqual(budget.depth_completed, 1)
+        self.assertEqual(len(exchange.pebble_exchanges), 1)
+        again, _ = self.strategy(SearchBudget(max_nodes=1)).get_trade_purchase()
+        self.assertEqual(again.pebble_exchanges, exchange.pebble_exchanges)
+
+        budget = SearchBudget(max_nodes=0)
+        exchange, purchase = self.strategy(budget).get_trade_purchase()
+        self.assertEqual(exchange.pebble_exchanges, [])
+        self.assertEqual(budget.depth_completed, 0)
+
+    def test_parallel_evaluation_matches_serial(self):
+        """Test that evaluating exchanges on a process pool chooses the same exchange and purchase."""
+        expected_exchange, expected_purchase = self.strategy().get_trade_purchase()
+        with ProcessPoolExecutor(max_workers=2) as executor:
+            strategy = self.strategy(executor=executor)
+            exchange, purchase = strategy.get_trade_purchase()
+        self.assertEqual(exchange.pebble_exchanges, expected_exchange.pebble_exchanges)
+        self.assertEqual(purchase.sequence, expected_purchase.sequence)
+        self.assertEqual(purchase.points, expected_purchase.points)
+
+        exchanges = all_possible_exchanges(self.equations, self.turn_state.active_player_wallet, self.turn_state.bank)
+        self.assertEqual(strategy.search_stats.searches, len(exchanges.exchanges))
+        self.assertGreater(strategy.search_stats.states, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,7 +4,7 @@ from collections import Counter
 
 from Bazaar.Common.equations import Equation, Equations
 from Bazaar.Player.exchanges import *
-from Bazaar.Common.pebble import Pebble, PebbleColor, PebbleCollection
+from Bazaar.Common.pebble import Pebble, PebbleColor, PebbleCollection, init_bank
 
 
 class TestExchange(unittest.TestCase):
@@ -241,6 +241,21 @@ class TestExchanges(unittest.TestCase):
         print(explored)
         self.assertEqual(len(explored.exchanges), 2)
 
+    def test_all_possible_exchanges_end_at_distinct_wallets(self):
+        """Test that each reachable wallet is listed once, so purchases are searched once per wallet."""
+        equations = Equations.deserialize(
+            [[["red"], ["blue"]], [["blue"], ["green"]], [["red"], ["green"]], [["green", "blue"], ["white"]]]
+        )
+        wallet = PebbleCollection.deserialize(["red", "red", "blue", "yellow"])
+        explored = all_possible_exchanges(equations, wallet, init_bank())
+        wallets = [exchange.wallet.counts for exchange in explored.exchanges]
+        self.assertEqual(len(wallets), len(set(wallets)))
+
+        # red -> green directly, rather than red -> blue -> green
+        one_green = PebbleCollection.deserialize(["red", "blue", "green", "yellow"]).counts
+        exchange = explored.exchanges[wallets.index(one_green)]
+        self.assertEqual(len(exchange.pebble_exchanges), 1)
+
 
 if __name__ == "__main__":
     unittest.main()
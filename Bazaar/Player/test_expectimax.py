@@ -0,0 +1,94 @@
+import random
+import unittest
+
+from Bazaar.Common.equations import Equation, Equations
+from Bazaar.Common.turn_state import TurnState
+from Bazaar.Player.budget import SearchBudget
+from Bazaar.Player.expectimax import DEFAULT_SECONDS, ExpectimaxPlanner
+from Bazaar.Player.mechanism import Mechanism
+from Bazaar.Player.policies import policy_names
+
+
+class TestExpectimaxPlanner(unittest.TestCase):
+
+    def setUp(self):
+        self.equations = Equations(
+            equations=[
+                Equation.deserialize([["red"], ["blue"]]),
+                Equation.deserialize([["blue", "blue"], ["green", "yellow"]]),
+            ]
+        )
+        self.turn_state = TurnState.deserialize(
+            data={
+                "active": {"score": 0, "wallet": ["red", "red", "green", "white", "white"]},
+                "bank": ["red", "white", "blue", "blue", "green", "yellow"],
+                "cards": [
+                    {"face?": True, "pebbles": ["green", "yellow", "green", "white", "white"]},
+                    {"face?": False, "pebbles": ["blue", "red", "green", "white", "white"]},
+                ],
+                "scores": [0, 0],
+            }
+        )
+        self.planner = ExpectimaxPlanner(equations=self.equations, policy="purchase-expectimax", rng=random.Random(0))
+
+    def test_iterative_deepening(self):
+        """Test that the search deepens up to turns within a large budget and keeps the first depth without one."""
+        budget = SearchBudget(max_nodes=100000)
+        self.assertIsNotNone(self.planner.choose(self.turn_state, budget))
+        self.assertEqual(budget.depth_completed, 3)
+        self.assertFalse(budget.exhausted)
+
+        for starved in (SearchBudget(max_nodes=1), SearchBudget(seconds=0)):
+            planner = ExpectimaxPlanner(equations=self.equations, policy="purchase-expectimax")
+            self.assertIsNotNone(planner.choose(self.turn_state, starved))
+            self.assertEqual(starved.depth_completed, 1)
+            self.assertTrue(starved.exhausted)
+
+    def test_transposition_table(self):
+        """Test that searched states are stored by wallet, bank, row and turns, and that the next turn reuses them."""
+        self.planner.choose(self.turn_state, SearchBudget(max_nodes=100000))
+        searched = self.planner.table.stats()["entries"]
+        self.assertGreater(searched, 0)
+        wallet, bank, row, turns = next(iter(self.planner.table.entries))
+        self.assertEqual((len(wallet), len(bank), len(row)), (5, 5, 2))
+        self.assertIn(turns, (1, 2))
+
+        budget = SearchBudget(max_nodes=100000)
+        self.planner.choose(self.turn_state, budget)
+        self.assertEqual(budget.nodes, 0)
+        self.assertEqual(self.planner.table.stats()["entries"], searched)
+        self.assertGreater(self.planner.table.hits, 0)
+
+        self.planner.reset()
+        self.assertEqual(self.planner.table.stats()["entries"], 0)
+        self.assertEqual(self.planner.refills, [])
+
+    def test_draws_are_predicted(self):
+        """Test that without trades the next state is the one the deterministic draw leads to."""
+        planner = ExpectimaxPlanner(equations=Equations(equations=[]), policy="purchase-expectimax", turns=2)
+        exchange, purchase = planner.choose(self.turn_state, SearchBudget(max_nodes=100))
+        self.assertEqual(exchange.pebble_exchanges, [])
+        self.assertEqual(exchange.wallet.counts, (3, 2, 0, 1, 0))
+        self.assertEqual(exchange.bank.counts, (0, 1, 2, 1, 1))
+        self.assertEqual(purchase.sequence.cards, [])
+        row = tuple(card.key for card in self.turn_state.cards.cards)
+        self.assertIn((purchase.wallet.counts, purchase.bank.counts, row, 1), planner.table.entries)
+
+    def test_mechanism_plays_with_the_planner(self):
+        """Test that a purchase-expectimax player plans its turns with the planner under its deadline."""
+        self.assertIn("purchase-expectimax", policy_names())
+        self.assertEqual(Mechanism(name="default", policy="purchase-expectimax").compute_budget().seconds, DEFAULT_SECONDS)
+
+        player = Mechanism(name="planner", policy="purchase-expectimax", search_nodes=50)
+        player.setup(self.equations)
+        self.assertIsInstance(player.planner, ExpectimaxPlanner)
+        self.assertIsInstance(player.request_pebble_or_trades(self.turn_state), list)
+        self.assertGreaterEqual(player.last_search.depth_completed, 1)
+        self.assertIsNotNone(player.plan)
+
+        player.win(False)
+        self.assertEqual(player.planner.table.stats()["entries"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import random
+import unittest
+
+from Bazaar.Common.equations import Equation, Equations
+from Bazaar.Common.pebble import PebbleCollection
+from Bazaar.Common.rule_book import RuleBook
+from Bazaar.Common.turn_state import TurnState
+from Bazaar.Player.budget import SearchBudget
+from Bazaar.Player.mcts import DEFAULT_PLAYOUTS, MonteCarloPlanner
+from Bazaar.Player.mechanism import Mechanism
+from Bazaar.Player.policies import policy_names
+
+
+class TestMonteCarloPlanner(unittest.TestCase):
+
+    def setUp(self):
+        self.equations = Equations(
+            equations=[
+                Equation.deserialize([["red"], ["blue"]]),
+                Equation.deserialize([["blue", "blue"], ["green", "yellow"]]),
+            ]
+        )
+        self.turn_state = TurnState.deserialize(
+            data={
+                "active": {"score": 0, "wallet": ["red", "red", "green", "white", "white"]},
+                "bank": ["red", "white", "blue", "blue", "green", "yellow"],
+                "cards": [
+                    {"face?": True, "pebbles": ["green", "yellow", "green", "white", "white"]},
+                    {"face?": False, "pebbles": ["blue", "red", "green", "white", "white"]},
+                ],
+                "scores": [0, 0],
+            }
+        )
+        self.planner = MonteCarloPlanner(equations=self.equations, policy="purchase-mcts", rng=random.Random(0))
+
+    def assert_legal(self, exchange, purchase):
+        if exchange.pebble_exchanges:
+            self.assertTrue(
+                RuleBook.validate_exchange_request(
+                    self.turn_state, exchange.pebble_exchanges, self.equations
+                )
+            )
+        after = TurnState(
+            bank=exchange.bank,
+            active_player_wallet=exchange.wallet,
+            active_player_score=0,
+            player_scores=[0, 0],
+            cards=self.turn_state.cards,
+        )
+        self.assertIsNotNone(RuleBook.valid_purchase_request(after, purchase.sequence))
+
+    def test_choose_plays_a_legal_turn(self):
+        """Test that the planner spends its budget on playouts and picks a legal exchange and purchase."""
+        budget = SearchBudget(max_nodes=30)
+        exchange, purchase = self.planner.choose(self.turn_state, budget)
+        self.assert_legal(exchange, purchase)
+        self.assertEqual(budget.nodes, 30)
+        self.assertEqual(sum(child.visits for child in self.planner.root.children.values()), 30)
+        self.assertIn(self.planner.last_key, self.planner.root.children)
+
+    def test_tree_is_reused_between_turns(self):
+        """Test that the node of the chosen action becomes the root of the next turn, until the planner is reset."""
+        self.planner.choose(self.turn_state, SearchBudget(max_nodes=20))
+        chosen = self.planner.root.children[self.planner.last_key]
+        visits = chosen.visits
+
+        self.planner.choose(self.turn_state, SearchBudget(max_nodes=10))
+        self.assertIs(self.planner.root, chosen)
+        self.assertEqual(chosen.visits, visits + 10)
+
+        self.planner.reset()
+        self.assertIsNone(self.planner.root)
+        self.assertIsNone(self.planner.last_key)
+
+    def test_draws_without_trades(self):
+        """Test that a planner without equations draws, and that the exchange holds the wallet after the draw."""
+        planner = MonteCarloPlanner(equations=Equations(equations=[]), policy="purchase-mcts", rng=random.Random(0))
+        exchange, purchase = planner.choose(self.turn_state, SearchBudget(max_nodes=5))
+        self.assertEqual(exchange.pebble_exchanges, [])
+        self.assertEqual(len(exchange.wallet.pebbles), len(self.turn_state.active_player_wallet.pebbles) + 1)
+        self.assertEqual(len(exchange.bank.pebbles), len(self.turn_state.bank.pebbles) - 1)
+        self.assert_legal(exchange, purchase)
+
+    def test_mechanism_plays_with_the_planner(self):
+        """Test that a purchase-mcts player plans its turns with the planner and keeps the purchase it planned."""
+        self.assertIn("purchase-mcts", policy_names())
+        player = Mechanism(name="planner", policy="purchase-mcts", search_nodes=20)
+        self.assertEqual(Mechanism(name="default", policy="purchase-mcts").compute_budget().max_nodes, DEFAULT_PLAYOUTS)
+
+        player.setup(self.equations)
+        self.assertIsInstance(player.planner, MonteCarloPlanner)
+        trades = player.request_pebble_or_trades(self.turn_state)
+        self.assertIsInstance(trades, list)
+        self.assertEqual(player.last_search.nodes, 20)
+        planned = player.plan.purchase
+        after = TurnState(
+            bank=PebbleCollection.from_counts(player.plan.bank),
+            active_player_wallet=PebbleCollection.from_counts(player.plan.wallet),
+            active_player_score=0,
+            player_scores=[0, 0],
+            cards=self.turn_state.cards,
+        )
+        self.assertIs(player.request_cards(after), planned)
+
+        player.win(True)
+        self.assertIsNone(player.planner.root)
+        self.assertIsNone(Mechanism(name="greedy", policy="purchase-points").planner)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import unittest
+
+from Bazaar.Common.cards import Cards
+from Bazaar.Common.equations import Equations
+from Bazaar.Common.pebble import PebbleCollection
+from Bazaar.Player.mechanism import Mechanism
+from Bazaar.Player.policies import (
+    POLICIES,
+    PolicyBudget,
+    PurchasePolicy,
+    get_policy,
+    policy_names,
+    register_policy,
+)
+from Bazaar.Player.purchases import find_best_purchase, purchase_upper_bound
+from Bazaar.Referee.referee import Referee
+
+
+class PurchaseFaces(PurchasePolicy):
+    """
+    Maximizes the number of happy-face cards bought, within a small budget.
+    """
+
+    name: str = "purchase-faces"
+    description: str = "Maximize the number of happy-face cards bought in one turn."
+    most_per_card: int = 1
+    budget: PolicyBudget = PolicyBudget(seconds=0.5, max_nodes=40, max_cache_entries=16)
+
+    def card_value(self, remaining: int, happy_face: bool) -> int:
+        return 1 if happy_face else 0
+
+
+class TestPolicies(unittest.TestCase):
+
+    def setUp(self):
+        register_policy(PurchaseFaces)
+        self.cards = Cards.deserialize(
+            [
+                {"face?": True, "pebbles": ["red", "red", "red", "red", "blue"]},
+                {"face?": False, "pebbles": ["red", "red", "red", "red", "red"]},
+            ]
+        )
+        self.wallet = PebbleCollection.deserialize(["red"] * 5 + ["blue"])
+
+    def tearDown(self):
+        POLICIES.pop(PurchaseFaces().name)
+
+    def test_builtin_policies(self):
+        """Test that the two original policies are registered first, in the order the client lists them."""
+        self.assertEqual(policy_names()[:2], ["purchase-points", "purchase-size"])
+        purchase = find_best_purchase(self.cards, self.wallet, PebbleCollection())
+        self.assertEqual(get_policy("purchase-size").value(purchase), 1)
+        self.assertEqual(get_policy("purchase-points").value(purchase), purchase.points)
+        self.assertEqual(PurchasePolicy.value(get_policy("purchase-points"), purchase), purchase.points)
+        self.assertIsNone(get_policy("purchase-points").budget.search_budget())
+        with self.assertRaises(ValueError):
+            get_policy("purchase-nothing")
+
+    def test_registered_policy_is_searched(self):
+        """Test that find_best_purchase and its upper bound value cards with a registered policy."""
+        best = find_best_purchase(self.cards, self.wallet, PebbleCollection(), "purchase-faces")
+        self.assertEqual([card.happy_face for card in best.sequence.cards], [True])
+        self.assertEqual(get_policy("purchase-faces").value(best), 1)
+        self.assertEqual(purchase_upper_bound(self.cards, self.wallet, "purchase-faces"), 1)
+        self.assertIsNone(find_best_purchase(self.cards, self.wallet, PebbleCollection(), "purchase-nothing"))
+
+    def test_registered_policy_is_selectable(self):
+        """Test that actors can name a registered policy and that its budget can be queried and overridden."""
+        player = Mechanism.deserialize(["faces", "purchase-faces"])
+        self.assertEqual(player.compute_budget(), PurchaseFaces().budget)
+        self.assertEqual(player.compute_budget().search_budget().max_nodes, 40)
+
+        player.setup(Equations(equations=[]))
+        self.assertEqual(player.strategy.purchase_cache.max_entries, 16)
+
+        tuned = Mechanism(name="tuned", policy="purchase-faces", search_nodes=10)
+        self.assertEqual(tuned.compute_budget().report(), {"seconds": None, "max_nodes": 10, "max_cache_entries": 16})
+        self.assertEqual(Referee.compute_budgets([player, tuned, object()]), [
+            player.compute_budget(), tuned.compute_budget(), None
+        ])
+
+        with self.assertRaises(ValueError):
+            Mechanism.deserialize(["nobody", "purchase-nothing"])
+
+
+if __name__ == "__main__":
+    unittest.main()
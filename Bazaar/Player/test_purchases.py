@@ -7,6 +7,10 @@ from purchases import (
     find_all_possible_purchase,
     search_all_possible,
     add_if_better,
+    find_best_purchase,
+    purchase_upper_bound,
+    PurchaseSearchStats,
+    PurchaseCache,
 )
 from Bazaar.Common.cards import Card, Cards
 
@@ -170,6 +174,72 @@ class TestPurchaseSequence(unittest.TestCase):
         self.assertTrue(purchase2 in candidates)
         self.assertTrue(purchase3 in candidates)
 
+    def test_find_best_purchase(self):
+        """
+        Test that find_best_purchase breaks ties between the candidates of find_all_possible_purchase
+        by the smallest sequence of cards, under both policies.
+        """
+        wallet = self.collectionRGWBY + self.collectionRGGBY
+        cards = Cards(
+            cards=[self.sad_cardRGWBY, self.happy_cardRGGBY, self.sad_cardRGGBY, self.happy_cardRGWBY]
+        )
+        for policy in ("purchase-points", "purchase-size"):
+            candidates = find_all_possible_purchase(cards, wallet, self.bank, policy)
+            self.assertEqual(len(candidates), 2)
+            best = find_best_purchase(cards, wallet, self.bank, policy)
+            self.assertEqual(best, candidates[1])
+            self.assertEqual(best.sequence.cards, [self.sad_cardRGGBY, self.happy_cardRGWBY])
+            self.assertEqual(best.points, 9)
+
+        self.assertIsNone(find_best_purchase(cards, self.collectionRGBY, self.bank))
+        self.assertIsNone(find_best_purchase(cards, wallet, self.bank, "unknown-policy"))
+
+    def test_purchase_upper_bound(self):
+        """
+        Test that the upper bound is limited by the affordable cards and by the size of the wallet,
+        and that the search counts its work.
+        """
+        wallet = self.collectionRGWBY + self.collectionRGGBY
+        cards = Cards(
+            cards=[self.sad_cardRGWBY, self.happy_cardRGGBY, self.sad_cardRGGBY, self.happy_cardRGWBY]
+        )
+        self.assertEqual(purchase_upper_bound(cards, wallet), 16)
+        self.assertEqual(purchase_upper_bound(cards, wallet, "purchase-size"), 2)
+        self.assertEqual(purchase_upper_bound(cards, self.collectionRGWBY), 8)
+        self.assertEqual(purchase_upper_bound(self.cards_RGGBY, self.collectionRGWBY), 0)
+
+        stats = PurchaseSearchStats()
+        best = find_best_purchase(cards, wallet, self.bank, "purchase-points", stats)
+        self.assertEqual(best, find_best_purchase(cards, wallet, self.bank))
+        self.assertEqual(stats.searches, 1)
+        self.assertGreater(stats.states, 0)
+        self.assertEqual(set(stats.report()), {"searches", "states", "branches_pruned", "exchanges_pruned"})
+
+    def test_find_best_purchase_cache(self):
+        """
+        Test that a cached purchase is rebuilt for the wallet and bank given, without searching again,
+        and that a cached miss (no card affordable) is remembered too.
+        """
+        wallet = self.collectionRGWBY + self.collectionRGGBY
+        reordered = self.collectionRGGBY + self.collectionRGWBY
+        cards = Cards(
+            cards=[self.sad_cardRGWBY, self.happy_cardRGGBY, self.sad_cardRGGBY, self.happy_cardRGWBY]
+        )
+        cache = PurchaseCache()
+        stats = PurchaseSearchStats()
+
+        best = find_best_purchase(cards, wallet, self.bank, "purchase-points", stats, cache)
+        self.assertEqual(best, find_best_purchase(cards, wallet, self.bank))
+        cached = find_best_purchase(cards, reordered, wallet, "purchase-points", stats, cache)
+        self.assertEqual(cached, find_best_purchase(cards, reordered, wallet))
+        self.assertIsNone(find_best_purchase(cards, self.collectionRGBY, self.bank, "purchase-points", stats, cache))
+        self.assertIsNone(find_best_purchase(cards, self.collectionRGBY, self.bank, "purchase-points", stats, cache))
+        self.assertEqual(stats.searches, 2)
+        self.assertEqual(cache.stats(), {"entries": 2, "hits": 2, "misses": 2, "evictions": 0})
+        self.assertIn(("purchase-points", tuple(card.key for card in cards.cards), wallet.pack()), cache.entries)
+
+        find_best_purchase(cards, wallet, self.bank, "purchase-size", stats, cache)
+        self.assertEqual(stats.searches, 3)
 
 if __name__ == "__main__":
     unittest.main()
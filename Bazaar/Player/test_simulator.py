@@ -0,0 +1,85 @@
+import random
+import unittest
+
+from Bazaar.Common.equations import Equation, Equations
+from Bazaar.Common.rule_book import RuleBook
+from Bazaar.Player.simulator import STARTING_BANK, Simulator
+
+
+class TestSimulator(unittest.TestCase):
+
+    def setUp(self):
+        self.trades = Equations(
+            equations=[
+                Equation.deserialize([["red"], ["blue"]]),
+                Equation.deserialize([["blue", "blue"], ["green", "yellow"]]),
+            ]
+        ).compile().trades
+        self.red_to_blue = next(index for index, trade in enumerate(self.trades) if trade.give == (1, 0, 0, 0, 0))
+        self.cheap = ((0, 0, 2, 0, 0), True)
+        self.reds = ((2, 0, 0, 0, 0), False)
+        self.hidden = ((0, 0, 0, 0, 5), False)
+        self.game = Simulator(
+            self.trades,
+            bank=[1, 1, 1, 1, 1],
+            wallets=[[2, 0, 1, 0, 0], [0, 0, 0, 1, 1]],
+            scores=[0, 0],
+            visible=[self.cheap, self.reds],
+            deck=[self.hidden, self.reds],
+        )
+
+    def test_exchange_and_purchase_follow_the_referee(self):
+        """Test that an exchange removes the last card of the deck and that bought cards are refilled from its front."""
+        self.game.exchange((self.red_to_blue,))
+        self.assertEqual(self.game.wallets[0], [1, 0, 2, 0, 0])
+        self.assertEqual(self.game.bank, [2, 1, 0, 1, 1])
+        self.assertEqual(self.game.deck, [self.hidden])
+
+        points = self.game.purchase([self.cheap, self.reds])
+        self.assertEqual(points, RuleBook.card_reward(1, True))
+        self.assertEqual(self.game.visible, [self.reds, self.hidden])
+        self.assertEqual(self.game.deck, [])
+        self.assertEqual(self.game.scores, [points, 0])
+
+        copy = self.game.copy()
+        copy.exchange(())
+        self.assertEqual(copy.visible, [self.reds])
+        self.assertEqual(self.game.visible, [self.reds, self.hidden])
+
+    def test_game_over(self):
+        """Test that a game ends when the last player reaches the winning score or the row is empty."""
+        self.assertFalse(self.game.is_over())
+        self.game.scores[1] = 20
+        self.assertTrue(self.game.is_over())
+        self.game.scores[1] = 0
+        self.game.visible = []
+        self.assertTrue(self.game.is_over())
+        self.assertEqual(self.game.outcome(0), 1.0)
+
+    def test_greedy_move_trades_when_it_can(self):
+        """Test that the greedy model trades towards the best purchase, and that an empty bank can end the game."""
+        path, cards = self.game.greedy_move(RuleBook.card_reward)
+        self.assertEqual(path, (self.red_to_blue,))
+        self.assertEqual(cards, (self.cheap,))
+
+        self.game.turn = 1
+        self.game.bank = [0, 0, 0, 0, 0]
+        self.assertEqual(self.game.greedy_move(RuleBook.card_reward), (None, ()))
+        self.game.play((None, ()))
+        self.assertTrue(self.game.is_over())
+        self.assertEqual(self.game.turn, 1)
+
+    def test_sample_keeps_every_pebble(self):
+        """Test that sampled games deal the unseen pebbles to the opponents and keep the visible cards."""
+        bank, wallet = (15, 16, 20, 20, 19), (1, 0, 0, 0, 0)
+        game = Simulator.sample(self.trades, bank, wallet, [3, 4, 5], [self.cheap] * 4, random.Random(1))
+        self.assertEqual(game.wallets[0], list(wallet))
+        totals = [sum(counts) for counts in zip(game.bank, *game.wallets)]
+        self.assertEqual(totals, list(STARTING_BANK))
+        self.assertEqual(game.scores, [3, 4, 5])
+        self.assertEqual(game.visible, [self.cheap] * 4)
+        self.assertLessEqual(len(game.deck), 16)
+
+
+if __name__ == "__main__":
+    unittest.main()
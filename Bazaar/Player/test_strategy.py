@@ -1,8 +1,13 @@
 import unittest
 
-from Bazaar.Common.cards import Card
-from Bazaar.Common.equations import Equation
+from Bazaar.Common.cards import Card, Cards
+from Bazaar.Common.equations import Equation, Equations
 from Bazaar.Common.pebble import *
+from Bazaar.Common.turn_state import TurnState
+from Bazaar.Player.exchanges import Exchange
+from Bazaar.Player.mechanism import Mechanism
+from Bazaar.Player.purchases import PurchaseSequence
+from Bazaar.Player.strategy import Strategy
 
 
 class TestStrategy(unittest.TestCase):
@@ -60,3 +65,119 @@ class TestStrategy(unittest.TestCase):
         )
 
         self.cards_RGWBY = Cards(cards=[self.happy_cardRGWBY, self.sad_cardRGWBY])
+
+    def test_get_trade_purchase_prunes_exchanges(self):
+        """
+        Test that exchanges whose upper bound cannot reach the best candidate are not searched,
+        and that pruning does not change the chosen exchange and purchase.
+        """
+        equations = Equations(
+            equations=[
+                Equation.deserialize([["red"], ["blue"]]),
+                Equation.deserialize([["blue", "blue"], ["green", "yellow"]]),
+            ]
+        )
+        turn_state = TurnState.deserialize(
+            data={
+                "active": {"score": 0, "wallet": ["red", "red", "green", "white", "white"]},
+                "bank": ["red", "white", "blue", "blue", "green", "yellow"],
+                "cards": [
+                    {"face?": True, "pebbles": ["green", "yellow", "green", "white", "white"]},
+                    {"face?": False, "pebbles": ["blue", "red", "green", "white", "white"]},
+                ],
+                "scores": [0, 0],
+            }
+        )
+        strategy = Strategy(equations=equations, turn_state=turn_state, policy="purchase-points")
+        exchange, purchase = strategy.get_trade_purchase()
+        self.assertEqual(len(exchange.pebble_exchanges), 3)
+        self.assertEqual(purchase.points, 8)
+        self.assertEqual(strategy.search_stats.exchanges_pruned, 1)
+        self.assertEqual(strategy.search_stats.searches, 2)
+
+    def test_tie_break_exchange_and_purchase(self):
+        """
+        Test that the tie-break prefers fewer trades, then more points, then more pebbles left, then the smaller
+        wallet, and that it leaves the purchases of the candidates intact.
+        """
+        strategy = Strategy(
+            equations=Equations(equations=[]),
+            turn_state=TurnState(
+                bank=PebbleCollection(), active_player_wallet=PebbleCollection(), active_player_score=0,
+                player_scores=[], cards=Cards(cards=[]),
+            ),
+            policy="purchase-points",
+        )
+
+        def candidate(trades, wallet, cards=()):
+            exchange = Exchange(wallet=wallet, pebble_exchanges=trades)
+            return exchange, PurchaseSequence(sequence=Cards(cards=list(cards)), wallet=wallet)
+
+        two_trades = candidate([self.eqR_B, self.eqB_G], self.collectionRGWBY, [self.sad_cardRGWBY])
+        three_left = candidate([self.eqG_Y], self.collectionRWB)
+        four_left = candidate([self.eqR_B], self.collectionRGBY)
+        red_green = candidate([self.eqG_R], self.collectionRG)
+        blue_yellow = candidate([self.eqB_G], self.collectionBY)
+        buys_card = candidate([self.eqY_G], self.collectionRGWBY, [self.sad_cardRGWBY])
+
+        self.assertIs(strategy.tie_break_exchange_and_purchase([two_trades, three_left, four_left]), four_left)
+        self.assertIs(strategy.tie_break_exchange_and_purchase([red_green, blue_yellow]), blue_yellow)
+        self.assertEqual(strategy.tie_break_card_purchase([red_green, blue_yellow, buys_card]), [buys_card])
+        self.assertIs(
+            strategy.tie_break_exchange_and_purchase([two_trades, four_left, buys_card, blue_yellow]), buys_card
+        )
+        self.assertEqual(buys_card[1].sequence.cards, [self.sad_cardRGWBY])
+        self.assertIsNone(strategy.tie_break_exchange_and_purchase([]))
+
+
+
+class TestStrategyLifetime(unittest.TestCase):
+
+    def setUp(self):
+        self.equations = Equations(
+            equations=[
+                Equation.deserialize([["red"], ["blue"]]),
+                Equation.deserialize([["blue", "blue"], ["green", "yellow"]]),
+            ]
+        )
+        self.turn_state = TurnState.deserialize(
+            data={
+                "active": {"score": 0, "wallet": ["red", "red", "green", "white", "white"]},
+                "bank": ["red", "white", "blue", "blue", "green", "yellow"],
+                "cards": [
+                    {"face?": True, "pebbles": ["green", "yellow", "green", "white", "white"]},
+                    {"face?": False, "pebbles": ["blue", "red", "green", "white", "white"]},
+                ],
+                "scores": [0, 0],
+            }
+        )
+
+    def test_strategy_kept_for_the_game(self):
+        """
+        Test that the strategy built at setup serves every turn with warm purchase caches, and that it is reset
+        when the player is told the result.
+        """
+        player = Mechanism(name="keeper", policy="purchase-points")
+        player.setup(self.equations)
+        strategy = player.strategy
+
+        trades = player.request_pebble_or_trades(self.turn_state)
+        searches = player.search_stats.searches
+        self.assertEqual(player.request_pebble_or_trades(self.turn_state), trades)
+        self.assertIs(player.strategy, strategy)
+        self.assertIs(strategy.turn_state, self.turn_state)
+        self.assertEqual(player.search_stats.searches, searches)
+        self.assertEqual(strategy.cache_report()["purchases"]["entries"], searches)
+        self.assertGreater(strategy.cache_report()["purchases"]["hits"], 0)
+        warm = strategy.cache_report()["purchases"]["bytes"]
+        self.assertGreater(strategy.cache_report()["exchanges"]["bytes"], 0)
+
+        player.win(False)
+        self.assertIs(player.strategy, strategy)
+        self.assertIsNone(strategy.turn_state)
+        self.assertEqual(strategy.cache_report()["purchases"]["entries"], 0)
+        self.assertLess(strategy.cache_report()["purchases"]["bytes"], warm)
+
+
+if __name__ == "__main__":
+    unittest.main()
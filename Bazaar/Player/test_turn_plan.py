@@ -0,0 +1,71 @@
+import unittest
+
+from Bazaar.Common.equations import Equation, Equations
+from Bazaar.Common.turn_state import TurnState
+from Bazaar.Player.mechanism import Mechanism, TurnPlan
+from Bazaar.Player.strategy import Strategy
+
+
+class TestTurnPlan(unittest.TestCase):
+
+    def setUp(self):
+        self.equations = Equations(
+            equations=[
+                Equation.deserialize([["red"], ["blue"]]),
+                Equation.deserialize([["blue", "blue"], ["green", "yellow"]]),
+            ]
+        )
+        self.data = {
+            "active": {"score": 0, "wallet": ["red", "red", "green", "white", "white"]},
+            "bank": ["red", "white", "blue", "blue", "green", "yellow"],
+            "cards": [
+                {"face?": True, "pebbles": ["green", "yellow", "green", "white", "white"]},
+                {"face?": False, "pebbles": ["blue", "red", "green", "white", "white"]},
+            ],
+            "scores": [0, 0],
+        }
+        self.exchange, self.purchase = Strategy(
+            equations=self.equations, turn_state=TurnState.deserialize(data=self.data), policy="purchase-points"
+        ).get_trade_purchase()
+        self.after = self.data | {
+            "active": {"score": 0, "wallet": self.exchange.wallet.serialize()},
+            "bank": self.exchange.bank.serialize(),
+        }
+
+    def test_matches_predicted_state(self):
+        """Test that a plan matches the state its exchange leads to, and no state with other pebbles or cards."""
+        turn_state = TurnState.deserialize(data=self.data)
+        plan = TurnPlan.predict(self.exchange, turn_state.cards, self.purchase)
+        self.assertEqual(plan.wallet, self.exchange.wallet.counts)
+        self.assertTrue(plan.matches(TurnState.deserialize(data=self.after)))
+        self.assertFalse(plan.matches(turn_state))
+        self.assertFalse(plan.matches(TurnState.deserialize(data=self.after | {"bank": self.data["bank"]})))
+        self.assertFalse(plan.matches(TurnState.deserialize(data=self.after | {"cards": self.data["cards"][::-1]})))
+
+    def test_request_cards_follows_plan(self):
+        """Test that the purchase chosen with the exchange is kept only while the turn goes as predicted."""
+        player = Mechanism(name="planner", policy="purchase-points")
+        player.setup(self.equations)
+
+        self.assertEqual(
+            player.request_pebble_or_trades(TurnState.deserialize(data=self.data)), self.exchange.pebble_exchanges
+        )
+        plan, searches = player.plan, player.search_stats.searches
+        planned = player.request_cards(TurnState.deserialize(data=self.after))
+        self.assertIs(planned, plan.purchase)
+        self.assertEqual(planned.sequence, self.purchase.sequence)
+        self.assertEqual(player.search_stats.searches, searches)
+        self.assertIsNone(player.plan)
+
+        player.request_pebble_or_trades(TurnState.deserialize(data=self.data))
+        plan, searches = player.plan, player.search_stats.searches
+        changed = TurnState.deserialize(data=self.after | {"cards": self.data["cards"][:1]})
+        replanned = player.request_cards(changed)
+        self.assertIsNot(replanned, plan.purchase)
+        self.assertEqual(player.search_stats.searches, searches + 1)
+        expected = Strategy(equations=self.equations, turn_state=changed, policy="purchase-points").get_purchase(changed)
+        self.assertEqual(replanned.sequence, expected.sequence)
+
+
+if __name__ == "__main__":
+    unittest.main()
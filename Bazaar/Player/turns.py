@@ -0,0 +1,214 @@
+from typing import Hashable, List, NamedTuple, Optional, Sequence, Tuple
+
+from Bazaar.Common.equations import DirectedTrade, Equations
+from Bazaar.Common.pebble import PebbleCollection
+from Bazaar.Common.turn_state import TurnState
+from Bazaar.Player.exchanges import Exchange, replay_trades
+from Bazaar.Player.purchases import PurchaseSequence, purchase_along
+from Bazaar.Player.simulator import CardValue, Counts, SimCard, Simulator, can_pay, greedy_exchange
+
+
+class TurnAction(NamedTuple):
+    """
+    One way to play a turn, as the planners tell turns apart.
+
+    key: the action: whether it draws, the wallet after the exchange or draw, and the cards to buy
+    path: indices of the trades of the exchange, None to draw a pebble
+    cards: cards to buy after the exchange, in order
+    positions: positions of those cards in the row, for building the purchase of the real turn
+    """
+
+    key: Hashable
+    path: Optional[Tuple[int, ...]]
+    cards: Tuple[SimCard, ...]
+    positions: Tuple[int, ...] = ()
+
+
+def turn_actions(turn_state: TurnState, equations: Equations, value: CardValue, max_actions: int) -> List[TurnAction]:
+    """
+    Lists the actions of the turn being played: every exchange the closure reaches and the draw, each followed by
+    the best purchase after it or by none. Both halves are ranked by the value of that best purchase (fewer trades
+    first among equals) and cut to max_actions between them.
+
+    :param turn_state: state of the turn to play
+    :type turn_state: TurnState
+    :param equations: equations of the game
+    :type equations: Equations
+    :param value: what a card adds to a purchase
+    :type value: CardValue
+    :param max_actions: number of actions kept, half of them buying and half holding pebbles
+    :type max_actions: int
+    :return: actions, best first
+    :rtype: List[TurnAction]
+    """
+    wallet, bank = turn_state.active_player_wallet.counts, turn_state.bank.counts
+    visible = [card.key for card in turn_state.cards.cards]
+    ends = [(path, counts) for counts, path in equations.compile().closure.reachable(wallet, bank)]
+    drawn = draw_counts(wallet, bank)
+    if drawn is not None:
+        ends.append((None, drawn[0]))
+
+    buying, holding = [], []
+    for path, counts in ends:
+        positions, purchase_value = best_positions(counts, visible, value)
+        cards = tuple(visible[position] for position in positions)
+        rank = (-purchase_value, len(path) if path is not None else 0)
+        buying.append((rank, TurnAction((path is None, counts, cards), path, cards, positions)))
+        if positions:
+            holding.append((rank, TurnAction((path is None, counts, ()), path, ())))
+    buying.sort(key=lambda ranked: ranked[0])
+    holding.sort(key=lambda ranked: ranked[0])
+    half = max(1, max_actions // 2)
+    return [action for _, action in buying[:half] + holding[: max_actions - half]]
+
+
+def next_actions(
+    trades: Sequence[DirectedTrade],
+    wallet: Sequence[int],
+    bank: Sequence[int],
+    visible: Sequence[SimCard],
+    deck_empty: bool,
+    value: CardValue,
+) -> List[TurnAction]:
+    """
+    Lists the actions of a later turn, cheaply: the exchange of the greedy player model, the draw and every single
+    trade, each followed by the greedy purchase after it or by none.
+
+    :param trades: directed trades of the game
+    :type trades: Sequence[DirectedTrade]
+    :param wallet: count vector of the wallet
+    :type wallet: Sequence[int]
+    :param bank: count vector of the bank
+    :type bank: Sequence[int]
+    :param visible: visible cards
+    :type visible: Sequence[SimCard]
+    :param deck_empty: True if an exchange removes the last visible card, because the deck is empty
+    :type deck_empty: bool
+    :param value: what a card adds to a purchase
+    :type value: CardValue
+    :return: actions, the greedy exchange first
+    :rtype: List[TurnAction]
+    """
+    ends = []
+    greedy_path, traded, _ = greedy_exchange(trades, wallet, bank, visible[:-1] if deck_empty else visible, value)
+    if greedy_path:
+        ends.append((greedy_path, tuple(traded)))
+    drawn = draw_counts(wallet, bank)
+    if drawn is not None:
+        ends.append((None, drawn[0]))
+    for index, trade in enumerate(trades):
+        if trade.allowed(wallet, bank):
+            ends.append(((index,), trade_counts(trades, wallet, bank, (index,))[0]))
+
+    actions, keys = [], set()
+    for path, counts in ends:
+        cards, _ = Simulator.best_purchase(counts, visible, value)
+        for bought in (cards, ()):
+            key = (path is None, counts, bought)
+            if key not in keys:
+                keys.add(key)
+                actions.append(TurnAction(key, path, bought))
+    return actions
+
+
+def materialize(turn_state: TurnState, equations: Equations, action: TurnAction) -> Tuple[Exchange, PurchaseSequence]:
+    """
+    Builds the exchange and the purchase of the real turn for an action of turn_actions.
+
+    :param turn_state: state of the turn to play
+    :type turn_state: TurnState
+    :param equations: equations of the game
+    :type equations: Equations
+    :param action: action to play
+    :type action: TurnAction
+    :return: exchange (holding the wallet and bank after the draw if the action draws) and purchase
+    :rtype: Tuple[Exchange, PurchaseSequence]
+    """
+    wallet, bank = turn_state.active_player_wallet, turn_state.bank
+    if action.path is None:
+        wallet_counts, bank_counts = draw_counts(wallet.counts, bank.counts)
+        exchange = Exchange(
+            wallet=PebbleCollection.from_counts(wallet_counts),
+            bank=PebbleCollection.from_counts(bank_counts),
+            pebble_exchanges=[],
+        )
+    else:
+        trades = equations.compile().trades
+        exchange = replay_trades(trades, action.path, {(): Exchange(wallet=wallet, bank=bank, pebble_exchanges=[])})
+    if not action.positions:
+        return exchange, PurchaseSequence(wallet=exchange.wallet, bank=exchange.bank)
+    return exchange, purchase_along(turn_state.cards.cards, action.positions, exchange.wallet, exchange.bank)
+
+
+def draw_counts(wallet: Sequence[int], bank: Sequence[int]) -> Optional[Tuple[Counts, Counts]]:
+    """
+    Returns the wallet and the bank after drawing a pebble, the first color the bank holds, as the referee does.
+
+    :param wallet: count vector of the wallet
+    :type wallet: Sequence[int]
+    :param bank: count vector of the bank
+    :type bank: Sequence[int]
+    :return: count vectors of the wallet and the bank, None if the bank is empty
+    :rtype: Optional[Tuple[Tuple[int, ...], Tuple[int, ...]]]
+    """
+    for color, count in enumerate(bank):
+        if count:
+            wallet = tuple(held + (index == color) for index, held in enumerate(wallet))
+            bank = tuple(held - (index == color) for index, held in enumerate(bank))
+            return wallet, bank
+    return None
+
+
+def trade_counts(
+    trades: Sequence[DirectedTrade], wallet: Sequence[int], bank: Sequence[int], path: Sequence[int]
+) -> Tuple[Counts, Counts]:
+    """
+    Returns the wallet and the bank after making the trades of a path.
+
+    :param trades: directed trades of the game
+    :type trades: Sequence[DirectedTrade]
+    :param wallet: count vector of the wallet
+    :type wallet: Sequence[int]
+    :param bank: count vector of the bank
+    :type bank: Sequence[int]
+    :param path: indices of the trades, in order
+    :type path: Sequence[int]
+    :return: count vectors of the wallet and the bank
+    :rtype: Tuple[Tuple[int, ...], Tuple[int, ...]]
+    """
+    wallet, bank = list(wallet), list(bank)
+    for index in path:
+        for color, amount in enumerate(trades[index].delta):
+            wallet[color] += amount
+            bank[color] -= amount
+    return tuple(wallet), tuple(bank)
+
+
+def best_positions(wallet: Counts, visible: Sequence[SimCard], value: CardValue) -> Tuple[Tuple[int, ...], int]:
+    """
+    Finds the most valuable purchase of the visible cards by trying every order of them, which the four cards of a
+    row allow; the first one found wins among equals.
+
+    :param wallet: count vector of the wallet
+    :type wallet: Tuple[int, ...]
+    :param visible: visible cards
+    :type visible: Sequence[SimCard]
+    :param value: what a card adds to a purchase
+    :type value: CardValue
+    :return: positions of the cards to buy, in order, and the value of the purchase
+    :rtype: Tuple[Tuple[int, ...], int]
+    """
+    best, best_value = (), 0
+
+    def walk(left: List[int], positions: Tuple[int, ...], total: int) -> None:
+        nonlocal best, best_value
+        if total > best_value:
+            best, best_value = positions, total
+        for position, (cost, happy_face) in enumerate(visible):
+            if position in positions or not can_pay(cost, left):
+                continue
+            after = [held - amount for held, amount in zip(left, cost)]
+            walk(after, positions + (position,), total + value(sum(after), happy_face))
+
+    walk(list(wallet), (), 0)
+    return best, best_value
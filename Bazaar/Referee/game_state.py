@@ -39,9 +39,9 @@ class GameState(BaseModel, DrawableComponent):
         return not self.bank.pebbles
 
     def can_any_player_buy_any_card(self):
+        index = self.invisible_deck.affordability
         for player in self.players:
-            filtered_cards = self.invisible_deck.find_matching_cards(player.wallet)
-            if len(filtered_cards.cards) == 0:
+            if not index.affordable(player.wallet.counts):
                 return False
         return True
 
@@ -1,3 +1,4 @@
+import random
 from collections import deque
 from copy import deepcopy, copy
 from enum import Enum
@@ -18,6 +19,7 @@ from Bazaar.Referee.observer import Observer
 from Bazaar.Referee.player_state import PlayerState
 from Bazaar.Common.cards import Cards
 from Bazaar.Player.mechanism import Mechanism
+from Bazaar.Player.policies import PolicyBudget
 from typing import List, Optional
 
 """
@@ -118,6 +120,7 @@ class InitState(State):
         players: List[Mechanism],
         equations: Equations,
         game_state: GameState = None,
+        rng: Optional[random.Random] = None,
     ) -> GameState:
         """
         Set up the initial phase using the given GameState.
@@ -129,13 +132,15 @@ class InitState(State):
         :type players: Equations
         :param game_state: game state to be used
         :type game_state: Optional[GameState]
+        :param rng: random number generator for the deck of a new game state, the global random module if not given
+        :type rng: Optional[random.Random]
         :return: initial game state
         :rtype: GameState
         """
         self.game_state = game_state
 
         if not self.game_state:
-            self.game_state = InitState.__create_game_state(players, equations)
+            self.game_state = InitState.__create_game_state(players, equations, rng)
 
         self.game_state.equations = equations
         self.game_state.fill_actors(players)
@@ -164,7 +169,9 @@ class InitState(State):
         return player_state
 
     @staticmethod
-    def __create_game_state(players: List[Mechanism], equations: Equations) -> GameState:
+    def __create_game_state(
+        players: List[Mechanism], equations: Equations, rng: Optional[random.Random] = None
+    ) -> GameState:
         """
         Initializes the start-of-the-game game state.
 
@@ -172,11 +179,13 @@ class InitState(State):
         :type equations: Equations
         :param players: list of player mechanisms
         :type players: List[Mechanism]
+        :param rng: random number generator for the deck, the global random module if not given
+        :type rng: Optional[random.Random]
         :return: game state for the beginning of the game
         :rtype: GameState
         """
         bank = init_bank()
-        all_cards = Cards.generate_random()
+        all_cards = Cards.generate_random(rng=rng)
         visible_cards = Cards(cards=all_cards.cards[-4:])
         invisible_cards = Cards(cards=all_cards.cards[:-4])
         player_deque = deque([InitState.get_player_state(player) for player in players])
@@ -265,9 +274,9 @@ class ExchangeState(State):
         )
         if pebbleTuple:
             if len(self.game_state.invisible_deck.cards) > 0:
-                self.game_state.invisible_deck.cards.pop()
+                self.game_state.invisible_deck.pop_card(-1)
             elif len(self.game_state.visibles.cards) > 0:
-                self.game_state.visibles.cards.pop()
+                self.game_state.visibles.pop_card(-1)
         return pebbleTuple
 
     def __validate_draw_pebble(
@@ -387,11 +396,11 @@ class PurchaseState(State):
         if pebbleTuple:
             card_num = len(cards.sequence.cards)
             for card in cards.sequence.cards:
-                self.game_state.visibles.cards.remove(card)
+                self.game_state.visibles.remove_card(card)
             if len(self.game_state.invisible_deck.cards) > 0:
                 num_to_draw = min(card_num, len(self.game_state.invisible_deck.cards))
                 for _ in range(num_to_draw):
-                    card = self.game_state.invisible_deck.cards.pop(0)
+                    card = self.game_state.invisible_deck.pop_card(0)
                     self.game_state.visibles.add_card(card)
 
         return pebbleTuple, cards
@@ -462,9 +471,17 @@ class BonusType(Enum):
     SEY = "SEY"
 
 class Referee(BaseModel):
+    """
+    Runs games. If no equations are given, they are generated at the start of the game, followed by the deck,
+    both from rng when it is set (e.g. GameGenerator.rng(index) to replay GameGenerator.game(index)).
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
     equations: Optional[Equations] = None
     bonus: Optional[BonusType] = None
     observers: List[Observer] = Field(default_factory=list)
+    rng: Optional[random.Random] = None
 
     def notify_result(
         self,
@@ -536,7 +553,7 @@ class Referee(BaseModel):
          :return: InitState
         """
         state = InitState()
-        state.set_initial_state(players, self.equations, game_state)
+        state.set_initial_state(players, self.equations, game_state, self.rng)
         return state
 
     def execute_game(
@@ -553,7 +570,8 @@ class Referee(BaseModel):
         :rtype: tuple[list[PlayerState], list[PlayerState]]
         """
         if not self.equations:
-            self.equations = Equations.generate_random(MAX_EQUATION_NUM)
+            self.equations = Equations.generate_random(MAX_EQUATION_NUM, self.rng)
+        self.equations.compile()
 
         state = self.init_game_state(players, game_state)
 
@@ -610,6 +628,23 @@ class Referee(BaseModel):
             except Exception:
                 self.observers.pop(observer_index)
 
+    @staticmethod
+    def compute_budgets(players: List[Mechanism]) -> List[Optional[PolicyBudget]]:
+        """
+        Returns the compute every player declares it needs per turn (see Mechanism.compute_budget), e.g. to schedule
+        house players before a game. Players that declare none, such as remote players, get None.
+
+        :param players: players of a game
+        :type players: List[Mechanism]
+        :return: budget of every player, in the order of players
+        :rtype: List[Optional[PolicyBudget]]
+        """
+        budgets = []
+        for player in players:
+            compute_budget = getattr(player, "compute_budget", None)
+            budgets.append(compute_budget() if compute_budget is not None else None)
+        return budgets
+
     def register_observer(self, observer: Observer) -> None:
         """
         Adds the given observer to the observers list.